@@ -0,0 +1,78 @@
+import logging
+from typing import List, Optional
+
+from pydub import AudioSegment
+
+from .normalize import PcmFormat, normalize, segment_format
+
+logger = logging.getLogger('AudioProcessor')
+
+
+class SegmentAccumulator:
+    """
+    线性时间的音频拼接器
+
+    AudioSegment 的 += 每次都会复制已累积的全部数据，拼接 n 个文件是 O(n²)。
+    这里只保存各段 PCM 数据的引用，导出时一次性拼接成一个 AudioSegment。
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._format: Optional[PcmFormat] = None
+        self.frame_count = 0
+
+    def __len__(self) -> int:
+        """已累积的时长（毫秒），与 AudioSegment 的 len() 一致"""
+        if self._format is None:
+            return 0
+        return round(1000 * (self.frame_count / self._format[0]))
+
+    @property
+    def empty(self) -> bool:
+        return not self._chunks
+
+    @property
+    def nbytes(self) -> int:
+        """已累积的 PCM 字节数"""
+        return sum(len(chunk) for chunk in self._chunks)
+
+    def append(self, segment: AudioSegment):
+        """
+        追加一段音频
+
+        与 pydub 的拼接规则一致，格式不同时统一到采样率、位宽、声道数中的较大者；
+        目标格式提升时会把已累积的数据转换一次；AudioProcessor 在解码后已按整组的目标格式
+        归一化（见 normalize.target_format），这里只在元数据缺失、无法预先确定格式时发生。
+        """
+        seg_format = segment_format(segment)
+        if self._format is None:
+            self._format = seg_format
+        elif seg_format != self._format:
+            target = tuple(max(a, b) for a, b in zip(self._format, seg_format))
+            if target != self._format:
+                self._convert_chunks(target)
+            segment = normalize(segment, target)
+
+        self._chunks.append(segment.raw_data)
+        self.frame_count += int(segment.frame_count())
+
+    def to_segment(self) -> AudioSegment:
+        """一次性拼接成 AudioSegment，之后累积器被清空"""
+        if self._format is None:
+            raise ValueError("没有可拼接的音频")
+        frame_rate, sample_width, channels = self._format
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return AudioSegment(data=data, sample_width=sample_width, frame_rate=frame_rate, channels=channels)
+
+    def _convert_chunks(self, target: PcmFormat):
+        """把已累积的数据转换到新的目标格式"""
+        frame_rate, sample_width, channels = self._format
+        logger.debug(f"拼接格式提升: {self._format} -> {target}")
+        merged = AudioSegment(data=b''.join(self._chunks), sample_width=sample_width,
+                              frame_rate=frame_rate, channels=channels)
+        merged = normalize(merged, target)
+        self._chunks = [merged.raw_data]
+        self.frame_count = int(merged.frame_count())
+        self._format = target
+
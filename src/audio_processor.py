@@ -1,9 +1,34 @@
 import os
+import asyncio
 import logging
 from pydub import AudioSegment
 from pathlib import Path
-from typing import List, Tuple, Optional, Callable
-import uuid
+from typing import AsyncIterator, Iterator, List, Tuple, Optional, Callable, Dict
+import time
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .probe import AudioMetadata
+from .metadata_index import MetadataIndex
+from .decode_cache import DecodeCache
+from .parallel import create_executor, decode_file, imap_ordered, probe_file, resolve_jobs
+from .planner import GroupPlan, MergeGroup, output_name, plan_groups
+from .pipeline import MergePipeline
+from .streaming import StreamingExport, estimate_pcm_bytes
+from .normalize import PcmFormat, normalize, segment_format, target_format
+from .stream_copy import can_stream_copy, concat_copy
+from .wav_splice import SpliceError, compatible_layouts, splice_wav
+from .ffmpeg_concat import DEFAULT_MAX_INPUTS, concat_encode, concat_encode_async
+from .output_format import OutputFormat, container_for, output_suffix
+from .manifest import Manifest, load_manifest, save_manifest
+from .shard import shard_groups, shard_report_path, write_shard_report
+from .journal import RunJournal, journal_path, load_completed, partial_path
+from .watcher import DirectoryWatcher
+from .scanner import read_file_list, scan_audio_files
+from .progress_log import ProgressLog
+from .progress import ProgressListener, ProgressTracker
+from .profiling import StageTimer, ThreadProfiler
 
 # 配置日志
 logging.basicConfig(
@@ -15,7 +40,21 @@ logger = logging.getLogger('AudioProcessor')
 class AudioProcessor:
     """音频批量处理工具，将短音频拼接成大于指定时长的音频文件"""
     
-    def __init__(self, input_dir: str, output_dir: str, min_duration_ms: int = 15000):
+    def __init__(self, input_dir: str, output_dir: str, min_duration_ms: int = 15000,
+                 index_path: Optional[str] = None, rebuild_index: bool = False,
+                 decode_cache_mb: int = 256, jobs: int = 1,
+                 encode_workers: int = 1, queue_size: int = 8,
+                 stream_copy: bool = False, strategy: str = 'greedy',
+                 shard: Optional[Tuple[int, int]] = None, resume: bool = False,
+                 journal_dir: Optional[str] = None, recursive: bool = False,
+                 include: Optional[List[str]] = None, exclude: Optional[List[str]] = None,
+                 files_from: Optional[str] = None,
+                 progress_listener: Optional[ProgressListener] = None,
+                 profile: bool = False, stream_export: bool = False,
+                 max_memory_mb: int = 0, native_wav: bool = False,
+                 ffmpeg_concat: bool = False, ffmpeg_max_inputs: int = DEFAULT_MAX_INPUTS,
+                 output_format: Optional[OutputFormat] = None,
+                 thread_profiler: Optional[ThreadProfiler] = None):
         """
         初始化音频处理器
         
@@ -23,10 +62,75 @@ class AudioProcessor:
             input_dir: 输入音频文件夹路径
             output_dir: 输出音频文件夹路径
             min_duration_ms: 最小音频时长（毫秒），默认15000ms即15秒
+            index_path: 元数据索引文件路径，为 None 时不使用索引
+            rebuild_index: 是否清除输入目录下的索引记录后重新分析
+            decode_cache_mb: 解码缓存的内存上限（MB），0 表示禁用
+            jobs: 分析与解码使用的进程数，1 为单进程，0 为全部 CPU
+            encode_workers: 导出线程数
+            queue_size: 流水线各级队列的容量
+            stream_copy: 组内编码参数一致时直接拼接码流，不解码也不重新编码
+            strategy: 分组策略，greedy / ffd / balanced
+            shard: (分片序号, 分片总数)，只执行计划中属于该分片的组，序号从 1 开始
+            resume: 跳过日志中已完成的组，并清理上次中断留下的临时文件
+            journal_dir: 运行日志目录，为 None 时不记录进度（也就无法恢复）
+            recursive: 是否扫描子目录
+            include: 只处理相对路径或文件名匹配其中任一通配符的文件
+            exclude: 跳过相对路径或文件名匹配其中任一通配符的文件和目录
+            files_from: 从该文件（"-" 表示标准输入）读取输入文件列表，不扫描目录
+            progress_listener: 进度监听器，参数为 (ProgressEvent, ProgressSnapshot)，
+                可能在工作线程中调用；之后也可通过 self.progress.add_listener 注册
+            profile: 记录各阶段的耗时、次数与字节数，通过 profile_report() 获取
+            stream_export: 所有组都边解码边写出，内存占用与组时长无关
+            max_memory_mb: 单组拼接预计占用的内存（MB）超过该值时自动改为流式导出，0 表示不限制
+            native_wav: 格式一致的 PCM WAV 组不经过 pydub 和 ffmpeg，直接拼接采样数据
+            ffmpeg_concat: 每组只启动一个 ffmpeg 进程完成解码、拼接与编码，不逐个文件解码
+            ffmpeg_max_inputs: ffmpeg_concat 时单条命令的输入文件数上限，超过时分段拼接
+            output_format: 输出格式与编码参数（见 resolve_output_format），为 None 时沿用组内最后一个文件的格式
+            thread_profiler: 用 cProfile 分别分析合并阶段的各个工作线程（多进程中的任务不在其列）
         """
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
         self.min_duration_ms = min_duration_ms
+        self.index_path = Path(index_path) if index_path else None
+        self.rebuild_index = rebuild_index
+        self.jobs = jobs
+        self.encode_workers = encode_workers
+        self.queue_size = queue_size
+        self.stream_copy = stream_copy
+        self.strategy = strategy
+        self.shard = shard
+        self.resume = resume
+        self.journal_dir = Path(journal_dir) if journal_dir else None
+        self.recursive = recursive
+        self.include = include
+        self.exclude = exclude
+        self.files_from = files_from
+        self.stream_export = stream_export
+        self.max_memory_mb = max_memory_mb
+        self.native_wav = native_wav
+        self.ffmpeg_concat = ffmpeg_concat
+        self.ffmpeg_max_inputs = ffmpeg_max_inputs
+        self.output_format = output_format
+        self.thread_profiler = thread_profiler
+        
+        # 每次运行的统计报告
+        self.report: Dict[str, int] = {'stream_copy': 0, 'reencode': 0}
+        self.outputs: List[Path] = []
+        # 从日志恢复、本次跳过的组数
+        self.resumed = 0
+        # 解码后需要格式转换的输入: (文件路径, 原格式, 目标格式)，格式为 (采样率, 位宽, 声道数)
+        self.conversions: List[Tuple[Path, PcmFormat, PcmFormat]] = []
+        self._targets: Dict[Path, PcmFormat] = {}
+        self._executor = None
+        self._journal: Optional[RunJournal] = None
+        
+        # 结构化进度事件
+        self.progress = ProgressTracker()
+        if progress_listener is not None:
+            self.progress.add_listener(progress_listener)
+        
+        # 各阶段计时，禁用时几乎没有开销
+        self.timer = StageTimer(enabled=profile)
         
         logger.info(f"初始化音频处理器: 输入目录={self.input_dir}, 输出目录={self.output_dir}, 最小时长={self.min_duration_ms/1000}秒")
         
@@ -37,6 +141,12 @@ class AudioProcessor:
         self.supported_formats = {'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.aac'}
         logger.info(f"支持的音频格式: {', '.join(self.supported_formats)}")
         
+        # 探测得到的元数据（时长、采样率、声道、编码）
+        self.audio_metadata: Dict[Path, AudioMetadata] = {}
+        
+        # 分析阶段不得不解码时保留 PCM，供合并阶段复用
+        self.decode_cache = DecodeCache(decode_cache_mb * 1024 * 1024)
+        
     def process(self) -> int:
         """
         处理音频文件：读取、拼接并保存
@@ -45,17 +155,268 @@ class AudioProcessor:
             生成的音频文件数量
         """
         logger.info("开始处理音频文件...")
+        self.progress.reset()
+        self.timer.reset()
+        
+        with self._worker_pool():
+            plan = self._plan()
+            if plan is None:
+                self.progress.start_stage('done')
+                return 0
+            return self._execute(plan)
+    
+    def plan(self) -> Optional[GroupPlan]:
+        """
+        规划阶段：扫描、分析并分组，不解码也不写出任何音频
+        
+        Returns:
+            分组计划，没有可用的音频时返回 None
+        """
+        self.progress.reset()
+        self.timer.reset()
+        with self._worker_pool():
+            plan = self._plan()
+        self.progress.start_stage('done')
+        return plan
+    
+    def execute(self, plan: GroupPlan) -> int:
+        """
+        执行阶段：按分组计划解码、拼接并导出，不会重新扫描或分析
+        
+        Args:
+            plan: 分组计划（来自 plan() 或 manifest）
+            
+        Returns:
+            生成的音频文件数量
+        """
+        with self._worker_pool():
+            return self._execute(plan)
+    
+    async def process_async(self, concurrency: int = 0,
+                            limiter: Optional[asyncio.Semaphore] = None) -> int:
+        """
+        process 的 asyncio 版本，供异步服务在事件循环中调用
+        
+        Args:
+            concurrency: 同时处理的组数，0 表示与 jobs 相同
+            limiter: 多个处理器共享的信号量，指定时忽略 concurrency
+            
+        Returns:
+            生成的音频文件数量
+        """
+        merged_count = 0
+        async for _ in self.iter_groups_async(concurrency, limiter):
+            merged_count += 1
+        return self.resumed + merged_count
+    
+    async def iter_groups_async(self, concurrency: int = 0, limiter: Optional[asyncio.Semaphore] = None
+                                ) -> AsyncIterator[Tuple[MergeGroup, Path]]:
+        """
+        规划并执行，每完成一组就产出 (组, 输出文件路径)，产出顺序为完成顺序
+        
+        扫描、分析、直接拼接与直接复制在线程中执行，不阻塞事件循环；启用 ffmpeg_concat 时
+        每组的 ffmpeg 进程由事件循环驱动。需要逐个文件解码的组一次只有一组进入解码流水线
+        （流水线内部已按 jobs 并行解码），concurrency 对这些组不起作用。
+        
+        停止迭代或取消所在任务时终止正在运行的 ffmpeg 进程并删除临时文件；已在线程中
+        开始的组会先完成（或失败）再传播取消，因此不会留下临时文件。
+        
+        Args:
+            concurrency: 同时处理的组数（逐个文件解码的组除外），0 表示与 jobs 相同
+            limiter: 多个处理器共享的信号量，用于限制同一事件循环中所有任务的总并发数，
+                指定时忽略 concurrency
+        """
+        logger.info("开始处理音频文件...")
+        self.progress.reset()
+        self.timer.reset()
+        if limiter is None:
+            limiter = asyncio.Semaphore(concurrency or resolve_jobs(self.jobs))
+        
+        async with self._worker_pool_async():
+            plan = await self._in_thread(self._plan)
+            if plan is None:
+                self.progress.start_stage('done')
+                return
+            
+            groups, pending = self._start_execute(plan)
+            self._targets = self._group_targets(pending)
+            self._journal = self._open_journal()
+            # 解码流水线自身已按 jobs 并行，多组同时进入只会争抢解码进程
+            pipeline_lock = asyncio.Lock()
+            tasks = [asyncio.ensure_future(self._export_group_async(g, limiter, pipeline_lock))
+                     for g in pending]
+            merged_count = self.resumed
+            try:
+                with self.timer.measure('execute', count=len(pending)):
+                    for next_done in asyncio.as_completed(tasks):
+                        group, output_path, mode = await next_done
+                        if output_path is None:
+                            continue
+                        self.outputs.append(output_path)
+                        self.report[mode] += 1
+                        merged_count += 1
+                        yield group, output_path
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self._close_journal()
+        
+        logger.info(f"运行报告: 直接复制码流 {self.report['stream_copy']} 组, "
+                    f"解码后重新编码 {self.report['reencode']} 组, "
+                    f"格式转换 {len(self.conversions)} 个文件")
+        self._finish_execute(groups, merged_count)
+    
+    def watch(self, idle_timeout_s: float = 60.0, poll_interval_s: float = 1.0,
+              stop_event: Optional[threading.Event] = None, use_inotify: bool = True) -> int:
+        """
+        持续监视输入目录，增量合并新到达的文件
+        
+        只分析新文件，按到达顺序放入当前待合并组；组时长达到最小时长立即导出，
+        超过 idle_timeout_s 没有新文件或停止时导出剩余部分。
+        启动前已存在的文件不会处理。
+        
+        Args:
+            idle_timeout_s: 空闲多久（秒）后导出不足最小时长的待合并组
+            poll_interval_s: 每次等待新文件的最长时间（秒）
+            stop_event: 设置后结束监视，为 None 时运行到 KeyboardInterrupt
+            use_inotify: 是否尝试使用 inotify，否则轮询目录
+            
+        Returns:
+            生成的音频文件数量
+        """
+        logger.info(f"开始监视 {self.input_dir}，空闲 {idle_timeout_s} 秒后导出剩余音频")
+        self.report = {'stream_copy': 0, 'reencode': 0}
+        self.outputs = []
+        self.progress.reset()
+        self.progress.start_stage('execute')
+        watcher = DirectoryWatcher(self.input_dir, self.supported_formats, poll_interval_s, use_inotify)
+        pending = MergeGroup(index=0)
+        emitted = 0
+        last_arrival = time.monotonic()
+        
+        with self._worker_pool():
+            self._journal = self._open_journal(append=True)
+            try:
+                while stop_event is None or not stop_event.is_set():
+                    new_files = watcher.wait()
+                    if new_files:
+                        last_arrival = time.monotonic()
+                        for member in self._watch_members(new_files):
+                            pending.members.append(member)
+                            if pending.duration_ms >= self.min_duration_ms:
+                                emitted += self._emit_pending(pending)
+                                pending = MergeGroup(index=pending.index + 1)
+                    elif pending.members and time.monotonic() - last_arrival >= idle_timeout_s:
+                        logger.info(f"空闲超过 {idle_timeout_s} 秒，导出待合并组")
+                        emitted += self._emit_pending(pending)
+                        pending = MergeGroup(index=pending.index + 1)
+            except KeyboardInterrupt:
+                logger.info("收到中断，停止监视")
+            finally:
+                try:
+                    if pending.members:
+                        logger.info("停止监视，导出待合并组")
+                        emitted += self._emit_pending(pending)
+                finally:
+                    watcher.close()
+                    if self._journal is not None:
+                        self._journal.close()
+                        self._journal = None
         
+        self.progress.start_stage('done')
+        logger.info(f"监视结束: 共生成 {emitted} 个音频文件")
+        return emitted
+    
+    def _watch_members(self, new_files: List[Path]) -> List[Tuple[Path, int]]:
+        """只分析新文件，按到达顺序返回 (文件路径, 时长)"""
+        logger.info(f"发现 {len(new_files)} 个新文件")
+        self._get_audio_info(new_files)
+        return [(p, self.audio_metadata[p].duration_ms) for p in new_files if p in self.audio_metadata]
+    
+    def _emit_pending(self, group: MergeGroup) -> int:
+        """导出监视模式下的待合并组"""
+        group.output_name = self._output_name(group, {p.name for p in self.outputs})
+        merged = self._merge_groups([group])
+        # 长时间运行时不保留已合并文件的元数据
+        for file_path in group.paths:
+            self.audio_metadata.pop(file_path, None)
+        return merged
+    
+    def profile_report(self) -> Dict:
+        """
+        各阶段耗时报告（需要以 profile=True 创建）
+        
+        Returns:
+            包含 wall_s、stages 与本次运行统计的字典
+        """
+        report = self.timer.report()
+        report['run'] = dict(self.report, outputs=len(self.outputs), resumed=self.resumed,
+                             converted=len(self.conversions))
+        return report
+    
+    def save_manifest(self, plan: GroupPlan, manifest_path: str):
+        """把分组计划连同成员元数据写成 JSON 清单"""
+        save_manifest(manifest_path, Manifest(
+            plan=plan,
+            input_dir=self.input_dir,
+            output_dir=self.output_dir,
+            metadata={p: self.audio_metadata[p] for g in plan.groups for p in g.paths
+                      if p in self.audio_metadata}
+        ))
+    
+    def load_manifest(self, manifest_path: str) -> GroupPlan:
+        """读取 JSON 清单，恢复分组计划与成员元数据（不会重新分析文件）"""
+        return self.apply_manifest(load_manifest(manifest_path))
+    
+    def apply_manifest(self, manifest: Manifest) -> GroupPlan:
+        """使用已读取的清单中的成员元数据，返回其分组计划"""
+        self.audio_metadata.update(manifest.metadata)
+        return manifest.plan
+    
+    @contextmanager
+    def _worker_pool(self):
+        """在一次运行期间持有进程池"""
+        if self._executor is not None:
+            yield self._executor
+            return
+        self._executor = create_executor(self.jobs)
+        try:
+            yield self._executor
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+    
+    @asynccontextmanager
+    async def _worker_pool_async(self):
+        """
+        _worker_pool 的 asyncio 版本：每次运行使用自己的进程池，并在线程中关闭
+        
+        提前停止迭代时异步生成器可能在之后才被关闭，那时同一处理器可能已开始新的运行，
+        因此只关闭自己创建的进程池；关闭会等待子进程退出，不能在事件循环中执行。
+        """
+        pool = create_executor(self.jobs)
+        self._executor = pool
+        try:
+            yield pool
+        finally:
+            if self._executor is pool:
+                self._executor = None
+            if pool is not None:
+                await asyncio.get_running_loop().run_in_executor(None, partial(pool.shutdown, cancel_futures=True))
+    
+    def _plan(self) -> Optional[GroupPlan]:
+        """plan 的主体，在进程池上下文中执行"""
+        self.progress.start_stage('scan')
         # 获取所有音频文件
         audio_files = self._get_audio_files()
         
         if not audio_files:
             logger.warning(f"未在 {self.input_dir} 找到支持的音频文件")
-            return 0
+            return None
         
         logger.info(f"找到 {len(audio_files)} 个音频文件")
-        for file in audio_files:
-            logger.info(f"  - {file.name}")
             
         # 获取所有音频的长度并排序
         logger.info("开始分析音频文件时长...")
@@ -63,11 +424,73 @@ class AudioProcessor:
         
         if not audio_info:
             logger.warning("音频分析异常")
-            return 0
+            return None
+        
+        return self._plan_groups(audio_info)
+    
+    def _plan_groups(self, audio_info: List[Tuple[Path, int]]) -> GroupPlan:
+        """根据探测时长分组，并确定每组的输出文件名"""
+        self.progress.start_stage('plan')
+        with self.timer.measure('plan', count=len(audio_info)):
+            plan = plan_groups(audio_info, self.min_duration_ms, self.strategy)
+            used = set()
+            for group in plan.groups:
+                group.output_name = self._output_name(group, used)
+                used.add(group.output_name)
+        self.progress.emit('plan', count=plan.expected_outputs,
+                           audio_ms=sum(g.duration_ms for g in plan.groups))
+        return plan
+    
+    def _execute(self, plan: GroupPlan) -> int:
+        """execute 的主体，在进程池上下文中执行"""
+        groups, pending = self._start_execute(plan)
+        self._journal = self._open_journal()
+        try:
+            with self.timer.measure('execute', count=len(pending)):
+                merged_count = self.resumed + self._merge_groups(pending)
+        finally:
+            self._close_journal()
+        return self._finish_execute(groups, merged_count)
+    
+    def _start_execute(self, plan: GroupPlan) -> Tuple[List[MergeGroup], List[MergeGroup]]:
+        """
+        重置运行统计，按分片与运行日志筛选本次要执行的组
+        
+        Returns:
+            (本分片的全部组, 其中尚未完成的组)
+        """
+        self.report = {'stream_copy': 0, 'reencode': 0}
+        self.outputs = []
+        self.resumed = 0
+        self.conversions = []
+        
+        groups = plan.groups
+        if self.shard:
+            shard_index, shard_count = self.shard
+            groups = shard_groups(groups, shard_index, shard_count)
+            logger.info(f"分片 {shard_index}/{shard_count}: 执行 {len(groups)}/{len(plan.groups)} 组")
+        
+        pending = self._skip_completed(groups) if self.resume else groups
         
         # 拼接音频
         logger.info("开始拼接音频文件...")
-        merged_count = self._merge_audio_files(audio_info)
+        self.progress.start_stage('execute', total=len(pending),
+                                  audio_ms=sum(g.duration_ms for g in pending))
+        return groups, pending
+    
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+    
+    def _finish_execute(self, groups: List[MergeGroup], merged_count: int) -> int:
+        """清理缓存、写出分片报告并记录结果"""
+        logger.info(f"解码缓存统计: {self.decode_cache.stats()}")
+        self.decode_cache.clear()
+        
+        if self.shard:
+            self._write_shard_report(groups)
+        self.progress.start_stage('done')
         
         if merged_count > 0:
             logger.info(f"处理完成: 成功生成 {merged_count} 个音频文件")
@@ -76,23 +499,81 @@ class AudioProcessor:
             
         return merged_count
     
+    def _open_journal(self, append: bool = False) -> Optional[RunJournal]:
+        """打开本次运行的日志，失败时不记录进度"""
+        if self.journal_dir is None:
+            return None
+        try:
+            return RunJournal(journal_path(self.journal_dir, self.output_dir, self.shard),
+                              resume=self.resume or append)
+        except Exception as e:
+            logger.warning(f"无法打开运行日志，本次运行将不能恢复: {str(e)}")
+            return None
+    
+    def _skip_completed(self, groups: List[MergeGroup]) -> List[MergeGroup]:
+        """
+        跳过日志中已完成且输出文件完整的组，删除未完成组留下的临时文件
+        
+        Returns:
+            仍需执行的组
+        """
+        completed = {}
+        if self.journal_dir is None:
+            logger.warning("未启用运行日志，无法判断哪些组已完成，将重新执行所有组")
+        else:
+            try:
+                completed = load_completed(self.journal_dir, self.output_dir)
+            except Exception as e:
+                logger.warning(f"无法读取运行日志，将重新执行所有组: {str(e)}")
+        pending = []
+        for group in groups:
+            output_path = self._output_path(group)
+            record = completed.get(output_path.name)
+            if record and output_path.exists() and output_path.stat().st_size == record['size']:
+                self.outputs.append(output_path)
+                self.resumed += 1
+                continue
+            
+            partial = partial_path(output_path)
+            if partial.exists():
+                logger.info(f"清理未完成的临时文件: {partial.name}")
+                partial.unlink()
+            pending.append(group)
+        
+        logger.info(f"恢复运行: 跳过已完成的 {self.resumed} 组, 剩余 {len(pending)} 组")
+        return pending
+    
     def _get_audio_files(self) -> List[Path]:
         """获取所有支持的音频文件路径"""
-        logger.info(f"扫描目录: {self.input_dir}")
-        audio_files = []
+        with self.timer.measure('scan') as m:
+            audio_files = list(self.iter_audio_files())
+            m.count = len(audio_files)
+        return audio_files
+    
+    def iter_audio_files(self) -> Iterator[Path]:
+        """
+        逐个产出输入音频文件，不预先构建完整列表
         
+        指定了 files_from 时只读取列表，不遍历目录；否则扫描输入目录，
+        目录内按文件名排序，保证不同节点得到相同的计划。
+        """
+        if self.files_from:
+            logger.info(f"从 {'标准输入' if self.files_from == '-' else self.files_from} 读取文件列表")
+            for file_path in read_file_list(self.files_from, self.supported_formats):
+                self.progress.emit('scan', file_path)
+                yield file_path
+            return
+        
+        logger.info(f"扫描目录: {self.input_dir}{' (包括子目录)' if self.recursive else ''}")
         if not self.input_dir.exists():
             logger.error(f"输入目录 {self.input_dir} 不存在")
-            return audio_files
-        
-        for file_path in self.input_dir.iterdir():
-            if file_path.is_file() and file_path.suffix.lower() in self.supported_formats:
-                audio_files.append(file_path)
-                logger.info(f"找到音频文件: {file_path.name}")
-            elif file_path.is_file():
-                logger.info(f"跳过不支持的文件: {file_path.name}")
+            return
         
-        return audio_files
+        for file_path in scan_audio_files(self.input_dir, self.supported_formats, self.recursive,
+                                          self.include, self.exclude, skip_dirs=[self.output_dir]):
+            logger.debug(f"找到音频文件: {file_path}")
+            self.progress.emit('scan', file_path)
+            yield file_path
     
     def _get_audio_info(self, audio_files: List[Path]) -> List[Tuple[Path, int]]:
         """
@@ -105,27 +586,130 @@ class AudioProcessor:
             包含(文件路径, 时长)的列表
         """
         audio_info = []
+        index = self._open_index()
+        new_entries = []
+        stats = {}
+        to_probe = []
         
+        index_start = time.perf_counter()
         for file_path in audio_files:
+            self.audio_metadata.pop(file_path, None)
             try:
-                logger.info(f"分析音频: {file_path.name}")
+                stat = file_path.stat()
+                stats[file_path] = stat
                 
-                # 加载音频文件
-                audio = AudioSegment.from_file(file_path)
-                    
-                audio_info.append((file_path, len(audio)))
-                logger.info(f"音频 {file_path.name} 时长: {len(audio)/1000:.2f}秒")
+                # 未变化的文件直接使用索引记录，不再打开
+                metadata = index.lookup(file_path, stat) if index else None
+                if metadata is None and index:
+                    # 被 touch 或改名的文件按内容指纹沿用原记录，并以新的键写回
+                    moved = index.lookup_content(file_path, stat)
+                    if moved is not None:
+                        metadata, fingerprint = moved
+                        new_entries.append((file_path, stat, metadata, fingerprint))
+                if metadata is None:
+                    to_probe.append(file_path)
+                else:
+                    self.audio_metadata[file_path] = metadata
+            except Exception as e:
+                logger.error(f"处理音频 {file_path} 时出错: {str(e)}")
+                self.progress.emit('error', file_path, message=str(e))
+        
+        self.timer.add('index', time.perf_counter() - index_start, len(audio_files))
+        
+        # 只读取文件头，不解码音频；多进程时按输入顺序收集结果
+        probe_start = time.perf_counter()
+        probe = partial(probe_file, with_fingerprint=index is not None)
+        window = resolve_jobs(self.jobs) * 4
+        progress = ProgressLog("分析音频", len(to_probe))
+        self.progress.start_stage('probe', total=len(to_probe))
+        for file_path, future in imap_ordered(probe, to_probe, self._executor, window):
+            progress.step()
+            self.progress.emit('probe', file_path)
+            try:
+                logger.debug(f"分析音频: {file_path.name}")
+                metadata, fingerprint, decoded = future.result()
+                if decoded is not None:
+                    self.decode_cache.put(file_path, decoded)
+                if index:
+                    new_entries.append((file_path, stats[file_path], metadata, fingerprint))
+                self.audio_metadata[file_path] = metadata
             except Exception as e:
                 logger.error(f"处理音频 {file_path} 时出错: {str(e)}")
+                self.progress.emit('error', file_path, message=str(e))
+        if to_probe:
+            progress.done()
+            self.timer.add('probe', time.perf_counter() - probe_start, len(to_probe))
+        
+        for file_path in audio_files:
+            metadata = self.audio_metadata.get(file_path)
+            if metadata is None:
+                continue
+            audio_info.append((file_path, metadata.duration_ms))
+            logger.debug(f"音频 {file_path.name} 时长: {metadata.duration_ms/1000:.2f}秒 "
+                        f"({metadata.codec}, {metadata.sample_rate}Hz, {metadata.channels}声道)")
+        
+        if index:
+            try:
+                index.store_many(new_entries)
+                logger.info(f"元数据索引: 命中 {index.hits} 个, 新分析 {index.misses} 个")
+            finally:
+                index.close()
         
         # 按时长排序（从短到长）
         sorted_info = sorted(audio_info, key=lambda x: x[1])
-        logger.info("音频文件按时长排序:")
+        logger.debug("音频文件按时长排序:")
         for path, duration in sorted_info:
-            logger.info(f"  - {path.name}: {duration/1000:.2f}秒")
+            logger.debug(f"  - {path.name}: {duration/1000:.2f}秒")
         
         return sorted_info
     
+    def _open_index(self) -> Optional[MetadataIndex]:
+        """打开元数据索引，失败时退化为不使用索引"""
+        if self.index_path is None:
+            return None
+        try:
+            index = MetadataIndex(str(self.index_path))
+            if self.rebuild_index:
+                logger.info(f"重建索引: 清除 {self.input_dir} 下的记录")
+                index.clear(self.input_dir)
+                self.rebuild_index = False
+            return index
+        except Exception as e:
+            logger.warning(f"无法打开元数据索引 {self.index_path}: {str(e)}")
+            return None
+    
+    def _load_audio(self, file_path: Path) -> AudioSegment:
+        """解码音频，优先使用分析阶段缓存的结果，未命中时交给进程池解码"""
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+        try:
+            with self.timer.measure('decode', bytes=size):
+                audio = self.decode_cache.take(file_path)
+                if audio is None:
+                    if self._executor is None:
+                        audio = decode_file(file_path)
+                    else:
+                        audio = self._executor.submit(decode_file, file_path).result()
+        except Exception as e:
+            self.progress.emit('error', file_path, message=str(e))
+            raise
+        self.progress.emit('decode', file_path, bytes=size, audio_ms=len(audio))
+        return self._normalize(file_path, audio)
+    
+    def _normalize(self, file_path: Path, audio: AudioSegment) -> AudioSegment:
+        """把解码结果一次性转换到所在组的目标格式，并记录发生了转换的输入"""
+        target = self._targets.get(file_path)
+        if target is None or segment_format(audio) == target:
+            return audio
+        source = segment_format(audio)
+        with self.timer.measure('normalize', bytes=len(audio.raw_data)):
+            audio = normalize(audio, target)
+        self.conversions.append((file_path, source, target))
+        logger.debug(f"格式转换 {file_path.name}: {source} -> {target}")
+        return audio
+    
     def _merge_audio_files(self, audio_info: List[Tuple[Path, int]]) -> int:
         """
         合并音频文件，保证每个合并后的文件时长大于最小时长
@@ -139,64 +723,423 @@ class AudioProcessor:
         if not audio_info:
             return 0
         
-        merged_count = 0
-        current_segment = None
-        current_duration = 0
-        current_files = []
+        # 分组只依赖探测得到的时长，不需要先解码
+        return self._merge_groups(self._plan_groups(audio_info).groups)
+    
+    def _merge_groups(self, groups: List[MergeGroup]) -> int:
+        """
+        按分组解码、拼接并导出
         
-        for file_path, duration in audio_info:
-            try:
-                logger.info(f"处理音频: {file_path.name} (时长: {duration/1000:.2f}秒)")
-                
-                # 加载当前音频
-                audio = AudioSegment.from_file(file_path)
-                
-                # 如果是第一个音频或当前音频段为空
-                if current_segment is None:
-                    logger.info(f"开始新的拼接段，第一个文件: {file_path.name}")
-                    current_segment = audio
-                    current_duration = duration
-                    current_files = [file_path.name]
-                else:
-                    # 拼接音频
-                    logger.info(f"拼接音频: {file_path.name} 到当前段 (当前段时长: {current_duration/1000:.2f}秒)")
-                    current_segment += audio
-                    current_duration += duration
-                    current_files.append(file_path.name)
-                    logger.info(f"拼接后时长: {current_duration/1000:.2f}秒")
-                
-                # 如果当前拼接段长度已超过最小时长，保存并重置
-                if current_duration >= self.min_duration_ms:
-                    output_filename = f"merged_{uuid.uuid4().hex[:8]}_{current_duration/1000:.1f}s{file_path.suffix}"
-                    output_path = self.output_dir / output_filename
-                    
-                    logger.info(f"当前段时长({current_duration/1000:.2f}秒)已超过最小时长({self.min_duration_ms/1000}秒)，准备导出")
-                    logger.info(f"拼接段包含的文件: {', '.join(current_files)}")
-                    
-                    current_segment.export(output_path, format=file_path.suffix.lstrip('.'))
-                    merged_count += 1
-                    logger.info(f"成功生成音频: {output_filename} (时长: {current_duration/1000:.2f}秒)")
-                    
-                    # 重置当前段
-                    current_segment = None
-                    current_duration = 0
-                    current_files = []
+        Args:
+            groups: 分组列表
             
-            except Exception as e:
-                logger.error(f"处理音频 {file_path} 时出错: {str(e)}")
+        Returns:
+            生成的音频文件数量
+        """
+        merged_count = 0
+        self._targets = self._group_targets(groups)
+        if self.native_wav:
+            groups, merged_count = self._splice_wav_groups(groups)
+        if self.stream_copy:
+            groups, copied = self._stream_copy_groups(groups)
+            merged_count += copied
+        if self.ffmpeg_concat:
+            groups, encoded = self._ffmpeg_concat_groups(groups)
+            merged_count += encoded
         
-        # 处理剩余音频段（如果有）
-        if current_segment is not None:
-            # 如果剩余段太短，需要使用最后一个文件的格式
-            suffix = audio_info[-1][0].suffix
-            output_filename = f"merged_{uuid.uuid4().hex[:8]}_{current_duration/1000:.1f}s{suffix}"
-            output_path = self.output_dir / output_filename
-            
-            logger.info(f"处理剩余音频段 (时长: {current_duration/1000:.2f}秒)")
-            logger.info(f"剩余段包含的文件: {', '.join(current_files)}")
+        if groups:
+            outputs = self._pipeline_groups(groups)
+            self.outputs.extend(outputs)
+            self.report['reencode'] += len(outputs)
+            merged_count += len(outputs)
+        
+        logger.info(f"运行报告: 直接复制码流 {self.report['stream_copy']} 组, "
+                    f"解码后重新编码 {self.report['reencode']} 组, "
+                    f"格式转换 {len(self.conversions)} 个文件")
+        return merged_count
+    
+    def _pipeline_groups(self, groups: List[MergeGroup]) -> List[Path]:
+        """通过解码 → 拼接 → 编码流水线导出各组，返回输出文件路径"""
+        pipeline = MergePipeline(
+            decode=self._load_audio,
+            export=self._export_group,
+            decode_workers=resolve_jobs(self.jobs),
+            encode_workers=self.encode_workers,
+            queue_size=self.queue_size,
+            timer=self.timer,
+            open_stream=self._open_stream,
+            finish_stream=self._finish_stream,
+            thread_profiler=self.thread_profiler
+        )
+        return pipeline.run(groups)
+    
+    def _group_targets(self, groups: List[MergeGroup]) -> Dict[Path, PcmFormat]:
+        """按探测元数据预先确定每组的目标格式，返回 成员路径 -> 目标格式"""
+        targets = {}
+        for group in groups:
+            target = target_format(self.audio_metadata.get(p) for p in group.paths)
+            if target is not None:
+                targets.update((p, target) for p in group.paths)
+        return targets
+    
+    def _splice_wav_groups(self, groups: List[MergeGroup]) -> Tuple[List[MergeGroup], int]:
+        """
+        对格式一致的 PCM WAV 组写出文件头后直接拼接采样数据，计入直接复制码流的组数
+        
+        Returns:
+            (仍需其他方式处理的组, 拼接成功的组数)
+        """
+        return self._export_each(groups, self._splice_wav_group, 'stream_copy')
+    
+    def _splice_wav_group(self, group: MergeGroup) -> Optional[Path]:
+        """直接拼接一组 PCM WAV，不适用或失败时返回 None"""
+        output_path = self._output_path(group)
+        if output_path.suffix.lower() != '.wav' or any(p.suffix.lower() != '.wav' for p in group.paths):
+            return None
+        try:
+            layouts = compatible_layouts(group.paths)
+        except (SpliceError, OSError, ValueError) as e:
+            logger.debug(f"第 {group.index + 1} 组不能直接拼接 WAV: {str(e)}")
+            return None
+        
+        tmp_path = partial_path(output_path)
+        try:
+            self._log_export(group)
+            with self.timer.measure('splice', count=len(layouts)) as m:
+                m.bytes = splice_wav(layouts, tmp_path)
+            with self.timer.measure('commit'):
+                os.replace(tmp_path, output_path)
+                self._record_done(group, output_path, 'native_wav')
+        except Exception as e:
+            logger.warning(f"第 {group.index + 1} 组直接拼接 WAV 失败，改用其他方式: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return None
+        self.progress.emit('export', output_path, audio_ms=group.duration_ms)
+        logger.info(f"成功生成音频(直接拼接 WAV): {output_path.name} (时长: {group.duration_ms/1000:.2f}秒)")
+        return output_path
+    
+    def _ffmpeg_concat_groups(self, groups: List[MergeGroup]) -> Tuple[List[MergeGroup], int]:
+        """
+        每组用一个 ffmpeg 进程解码、拼接并编码，多组在 jobs 个线程中并行
+        
+        目标格式需要由探测元数据确定；无法确定或 ffmpeg 失败（例如组内有损坏文件）的组
+        交给解码流水线处理，由它跳过无法解码的文件。
+        
+        Returns:
+            (仍需解码重新编码的组, 成功导出的组数)
+        """
+        candidates = [g for g in groups if g.paths and g.paths[0] in self._targets]
+        if not candidates:
+            return groups, 0
+        
+        export = self._ffmpeg_concat_group
+        if self.thread_profiler is not None:
+            export = self.thread_profiler.wrap(export)
+        with ThreadPoolExecutor(max_workers=resolve_jobs(self.jobs)) as pool:
+            results = dict(zip(map(id, candidates), pool.map(export, candidates)))
+        return self._export_each(groups, lambda g: results.get(id(g)), 'reencode')
+    
+    def _ffmpeg_concat_group(self, group: MergeGroup) -> Optional[Path]:
+        """用一个 ffmpeg 进程导出一组，失败时返回 None"""
+        output_path = self._output_path(group)
+        tmp_path = partial_path(output_path)
+        try:
+            self._log_export(group)
+            with self.timer.measure('ffmpeg', count=len(group.paths)) as m:
+                invocations = concat_encode(group.paths, tmp_path, self._targets[group.paths[0]],
+                                            suffix=output_path.suffix, max_inputs=self.ffmpeg_max_inputs,
+                                            encoder_args=self._encoder_args())
+                m.bytes = tmp_path.stat().st_size if self.timer.enabled else 0
+            with self.timer.measure('commit'):
+                os.replace(tmp_path, output_path)
+                self._record_done(group, output_path, 'reencode')
+        except Exception as e:
+            self._ffmpeg_failed(group, tmp_path, e)
+            return None
+        self._ffmpeg_done(group, output_path, invocations)
+        return output_path
+    
+    async def _export_group_async(self, group: MergeGroup, limiter: asyncio.Semaphore,
+                                  pipeline_lock: asyncio.Lock) -> Tuple[MergeGroup, Optional[Path], str]:
+        """
+        按与 _merge_groups 相同的顺序尝试各种导出方式
+        
+        Returns:
+            (组, 输出文件路径, 计入运行报告的方式)，所有方式都失败时输出路径为 None
+        """
+        async with limiter:
+            if self.native_wav:
+                output_path = await self._in_thread(self._splice_wav_group, group)
+                if output_path is not None:
+                    return group, output_path, 'stream_copy'
+            if self.stream_copy:
+                output_path = await self._in_thread(self._stream_copy_group, group)
+                if output_path is not None:
+                    return group, output_path, 'stream_copy'
+            if self.ffmpeg_concat and group.paths and group.paths[0] in self._targets:
+                output_path = await self._ffmpeg_concat_group_async(group)
+                if output_path is not None:
+                    return group, output_path, 'reencode'
+        
+        async with pipeline_lock, limiter:
+            outputs = await self._in_thread(self._pipeline_groups, [group])
+        return group, (outputs[0] if outputs else None), 'reencode'
+    
+    async def _ffmpeg_concat_group_async(self, group: MergeGroup) -> Optional[Path]:
+        """_ffmpeg_concat_group 的 asyncio 版本，取消时删除临时文件"""
+        output_path = self._output_path(group)
+        tmp_path = partial_path(output_path)
+        try:
+            self._log_export(group)
+            with self.timer.measure('ffmpeg', count=len(group.paths)) as m:
+                invocations = await concat_encode_async(
+                    group.paths, tmp_path, self._targets[group.paths[0]], suffix=output_path.suffix,
+                    max_inputs=self.ffmpeg_max_inputs, encoder_args=self._encoder_args())
+                m.bytes = tmp_path.stat().st_size if self.timer.enabled else 0
+            with self.timer.measure('commit'):
+                os.replace(tmp_path, output_path)
+                self._record_done(group, output_path, 'reencode')
+        except asyncio.CancelledError:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+        except Exception as e:
+            self._ffmpeg_failed(group, tmp_path, e)
+            return None
+        self._ffmpeg_done(group, output_path, invocations)
+        return output_path
+    
+    @staticmethod
+    async def _in_thread(func: Callable, *args):
+        """在线程中执行 func；被取消时先等它结束再传播取消，避免留下写了一半的文件"""
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            await asyncio.wait([future])
+            raise
+    
+    def _ffmpeg_failed(self, group: MergeGroup, tmp_path: Path, error: Exception):
+        """记录 ffmpeg 拼接失败并清理临时文件"""
+        stderr = getattr(error, 'stderr', None)
+        detail = stderr.decode('utf-8', 'replace').strip() if isinstance(stderr, bytes) else str(error)
+        logger.warning(f"第 {group.index + 1} 组 ffmpeg 拼接失败，改为逐个文件解码: {detail}")
+        if tmp_path.exists():
+            tmp_path.unlink()
+    
+    def _ffmpeg_done(self, group: MergeGroup, output_path: Path, invocations: int):
+        self.progress.emit('export', output_path, audio_ms=group.duration_ms)
+        logger.info(f"成功生成音频(ffmpeg 拼接, {invocations} 个进程): {output_path.name} "
+                    f"(时长: {group.duration_ms/1000:.2f}秒)")
+    
+    def _stream_copy_groups(self, groups: List[MergeGroup]) -> Tuple[List[MergeGroup], int]:
+        """
+        对编码参数一致的组直接拼接码流
+        
+        Returns:
+            (仍需解码重新编码的组, 直接复制成功的组数)
+        """
+        return self._export_each(groups, self._stream_copy_group, 'stream_copy')
+    
+    def _stream_copy_group(self, group: MergeGroup) -> Optional[Path]:
+        """直接复制一组的码流，不适用或失败时返回 None"""
+        metadata = [self.audio_metadata.get(p) for p in group.paths]
+        output_path = self._output_path(group)
+        if (not can_stream_copy(group.paths, metadata)
+                or output_path.suffix.lower() != group.paths[0].suffix.lower()):
+            return None
+        
+        tmp_path = partial_path(output_path)
+        try:
+            self._log_export(group)
+            with self.timer.measure('stream_copy', count=len(group.paths)) as m:
+                concat_copy(group.paths, tmp_path, suffix=output_path.suffix)
+                m.bytes = tmp_path.stat().st_size if self.timer.enabled else 0
+            with self.timer.measure('commit'):
+                os.replace(tmp_path, output_path)
+                self._record_done(group, output_path, 'stream_copy')
+        except Exception as e:
+            logger.warning(f"第 {group.index + 1} 组直接复制失败，改为解码重新编码: {str(e)}")
+            if tmp_path.exists():
+                tmp_path.unlink()
+            return None
+        self.progress.emit('export', output_path, audio_ms=group.duration_ms)
+        logger.info(f"成功生成音频(直接复制): {output_path.name} (时长: {group.duration_ms/1000:.2f}秒)")
+        return output_path
+    
+    def _export_each(self, groups: List[MergeGroup], export: Callable[[MergeGroup], Optional[Path]],
+                     mode: str) -> Tuple[List[MergeGroup], int]:
+        """
+        依次尝试导出各组并计入运行报告
+        
+        Returns:
+            (export 返回 None、仍需其他方式处理的组, 导出成功的组数)
+        """
+        remaining = []
+        exported = 0
+        for group in groups:
+            output_path = export(group)
+            if output_path is None:
+                remaining.append(group)
+                continue
+            self.outputs.append(output_path)
+            self.report[mode] += 1
+            exported += 1
+        return remaining, exported
+    
+    def _output_name(self, group: MergeGroup, used: Optional[set] = None) -> str:
+        """
+        生成输出文件名（未指定输出格式时使用组内最后一个文件的格式）
+        
+        名称由组内成员的相对路径哈希得到，同一计划在任何节点上都得到相同的名称；
+        与 used 中已有名称冲突时加长哈希。
+        """
+        suffix = output_suffix(self.output_format, group.paths[-1])
+        return output_name([self._relative_name(p) for p in group.paths], group.duration_ms, suffix, used)
+    
+    def _relative_name(self, file_path: Path) -> str:
+        """文件相对于输入目录的路径，各节点挂载位置不同时也保持一致"""
+        try:
+            return file_path.relative_to(self.input_dir).as_posix()
+        except ValueError:
+            return file_path.as_posix()
+    
+    def _output_path(self, group: MergeGroup) -> Path:
+        """输出文件路径，文件名在规划阶段确定（按清单执行时改用当前的输出格式后缀）"""
+        if group.output_name is None:
+            group.output_name = self._output_name(group)
+        elif self.output_format is not None and Path(group.output_name).suffix != self.output_format.suffix:
+            group.output_name = Path(group.output_name).stem + self.output_format.suffix
+        return self.output_dir / group.output_name
+    
+    def _encoder_args(self) -> List[str]:
+        """ffmpeg 编码参数，未指定输出格式时为空"""
+        return self.output_format.encoder_args() if self.output_format is not None else []
+    
+    def _export_kwargs(self, output_path: Path) -> Dict:
+        """AudioSegment.export 的参数，未指定输出格式时按后缀换算封装格式名"""
+        if self.output_format is not None:
+            return self.output_format.export_kwargs()
+        return {'format': container_for(output_path.suffix)}
+    
+    def _record_done(self, group: MergeGroup, output_path: Path, mode: str):
+        """输出文件就位后写入日志"""
+        if self._journal is None:
+            return
+        try:
+            self._journal.record(output_path, group.index, mode)
+        except Exception as e:
+            logger.warning(f"写入运行日志失败: {str(e)}")
+    
+    def _write_shard_report(self, groups: List[MergeGroup]):
+        """在共享输出目录下写出本分片的运行报告，供合并步骤汇总"""
+        shard_index, shard_count = self.shard
+        produced = {p.name for p in self.outputs}
+        report = {
+            'shard_index': shard_index,
+            'shard_count': shard_count,
+            'groups': len(groups),
+            'outputs': sorted(produced),
+            'failed_groups': [g.index for g in groups if g.output_name not in produced],
+            'stream_copy': self.report['stream_copy'],
+            'reencode': self.report['reencode'],
+        }
+        try:
+            write_shard_report(shard_report_path(self.output_dir, shard_index, shard_count), report)
+        except Exception as e:
+            logger.error(f"写出分片报告失败: {str(e)}")
+    
+    def _log_export(self, group: MergeGroup):
+        """导出前记录组信息"""
+        current_duration = group.duration_ms
+        if current_duration >= self.min_duration_ms:
+            logger.debug(f"当前段时长({current_duration/1000:.2f}秒)已超过最小时长({self.min_duration_ms/1000}秒)，准备导出")
+        else:
+            logger.debug(f"处理剩余音频段 (时长: {current_duration/1000:.2f}秒)")
+        logger.debug(f"拼接段包含的文件: {', '.join(p.name for p in group.paths)}")
+    
+    def _export_group(self, group: MergeGroup, segment: AudioSegment) -> Path:
+        """
+        导出一组拼接结果
+        
+        Args:
+            group: 分组
+            segment: 拼接后的音频
             
-            current_segment.export(output_path, format=suffix.lstrip('.'))
-            merged_count += 1
-            logger.info(f"成功生成音频: {output_filename} (时长: {current_duration/1000:.2f}秒)")
+        Returns:
+            输出文件路径
+        """
+        output_path = self._output_path(group)
+        tmp_path = partial_path(output_path)
+        self._log_export(group)
+        
+        def encode():
+            with self.timer.measure('encode', bytes=len(segment.raw_data)):
+                segment.export(tmp_path, **self._export_kwargs(output_path)).close()
+        
+        return self._commit_output(group, output_path, tmp_path, encode)
+    
+    def _open_stream(self, group: MergeGroup) -> Optional[StreamingExport]:
+        """
+        需要时为一组创建流式导出器（写入临时文件）
         
-        return merged_count 
\ No newline at end of file
+        stream_export 开启时所有组都流式导出；否则按探测元数据估算整组 PCM，
+        内存拼接时已累积的数据与拼接结果会同时存在，估算值的两倍超过 max_memory_mb 时改为流式导出。
+        """
+        if not self.stream_export and not self.max_memory_mb:
+            return None
+        pcm_format = target_format(self.audio_metadata.get(p) for p in group.paths)
+        if not self.stream_export:
+            estimate = estimate_pcm_bytes(group.duration_ms, pcm_format)
+            if 2 * estimate <= self.max_memory_mb * 1024 * 1024:
+                return None
+            logger.info(f"第 {group.index + 1} 组预计占用 {2 * estimate / (1024 * 1024):.0f}MB 内存，"
+                        f"超过上限 {self.max_memory_mb}MB，改为流式导出")
+        output_path = self._output_path(group)
+        self._log_export(group)
+        return StreamingExport(partial_path(output_path), pcm_format, suffix=output_path.suffix,
+                               encoder_args=self._encoder_args())
+    
+    def _finish_stream(self, group: MergeGroup, stream: StreamingExport) -> Path:
+        """结束一组流式导出并把临时文件移动到位"""
+        output_path = self._output_path(group)
+        
+        def encode():
+            try:
+                with self.timer.measure('encode', count=0):
+                    stream.finish()
+            except Exception:
+                stream.abort()
+                raise
+        
+        return self._commit_output(group, output_path, stream.output_path, encode)
+    
+    def _commit_output(self, group: MergeGroup, output_path: Path, tmp_path: Path,
+                       encode: Callable[[], None]) -> Path:
+        """
+        写出临时文件后原子重命名到输出路径，并记录日志与进度
+        
+        Args:
+            group: 分组
+            output_path: 最终输出路径
+            tmp_path: 临时文件路径
+            encode: 把音频完整写入临时文件的函数
+            
+        Returns:
+            输出文件路径
+        """
+        # 先写临时文件，完整写出后再原子重命名，中断时不会留下半个输出文件
+        try:
+            encode()
+            with self.timer.measure('commit'):
+                os.replace(tmp_path, output_path)
+                self._record_done(group, output_path, 'reencode')
+        except Exception as e:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            self.progress.emit('error', output_path, message=str(e))
+            raise
+        self.progress.emit('export', output_path, audio_ms=group.duration_ms)
+        logger.info(f"成功生成音频: {output_path.name} (时长: {group.duration_ms/1000:.2f}秒)")
+        return output_path
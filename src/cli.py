@@ -1,8 +1,53 @@
 import argparse
+import cProfile
+import json
 import sys
+import time
+import signal
+import threading
 import logging
 from pathlib import Path
 from .audio_processor import AudioProcessor
+from .metadata_index import default_index_path
+from .planner import STRATEGIES
+from .manifest import load_manifest
+from .journal import default_journal_dir
+from .shard import find_shard_reports, merge_reports, parse_shard
+from .progress import format_progress
+from .profiling import ThreadProfiler, write_profile
+from .ffmpeg_concat import DEFAULT_MAX_INPUTS
+from .output_format import OUTPUT_FORMATS, PRESETS, resolve_output_format
+from .job_store import default_job_db_path
+from .job_server import JobServer, make_http_server
+
+class ConsoleProgress:
+    """在 stderr 上原地刷新的单行进度显示（最多每 interval_s 秒刷新一次）"""
+    
+    def __init__(self, stream=None, interval_s=0.2):
+        self.stream = stream or sys.stderr
+        self.interval_s = interval_s
+        self._lock = threading.Lock()
+        self._last = 0.0
+        self._width = 0
+    
+    def __call__(self, event, snapshot):
+        now = time.monotonic()
+        if event.kind != 'stage' and now - self._last < self.interval_s:
+            return
+        with self._lock:
+            self._last = now
+            text = format_progress(snapshot)
+            self.stream.write('\r' + text.ljust(self._width))
+            self.stream.flush()
+            self._width = len(text)
+    
+    def close(self):
+        """结束进度行"""
+        with self._lock:
+            if self._width:
+                self.stream.write('\n')
+                self.stream.flush()
+                self._width = 0
 
 def parse_args():
     """解析命令行参数"""
@@ -13,8 +58,29 @@ def parse_args():
     
     parser.add_argument(
         '-i', '--input-dir', 
-        required=True,
-        help='输入音频文件夹路径'
+        help='输入音频文件夹路径（使用 --from-manifest 或 --files-from 时可省略）'
+    )
+    parser.add_argument(
+        '-r', '--recursive',
+        action='store_true',
+        help='同时扫描输入目录的子目录'
+    )
+    parser.add_argument(
+        '--include',
+        action='append',
+        metavar='GLOB',
+        help='只处理相对路径或文件名匹配该通配符的文件，可重复指定'
+    )
+    parser.add_argument(
+        '--exclude',
+        action='append',
+        metavar='GLOB',
+        help='跳过相对路径或文件名匹配该通配符的文件和目录，可重复指定'
+    )
+    parser.add_argument(
+        '--files-from',
+        metavar='FILE',
+        help='从文件逐行读取输入文件列表（"-" 表示标准输入），不扫描目录'
     )
     parser.add_argument(
         '-o', '--output-dir', 
@@ -27,6 +93,171 @@ def parse_args():
         default=15.0,
         help='最小音频时长（秒）'
     )
+    parser.add_argument(
+        '--index',
+        default=str(default_index_path()),
+        help='元数据索引文件路径（SQLite）'
+    )
+    parser.add_argument(
+        '--no-index',
+        action='store_true',
+        help='不使用元数据索引，每次重新分析所有文件'
+    )
+    parser.add_argument(
+        '--rebuild-index',
+        action='store_true',
+        help='清除输入目录下的索引记录并重新分析'
+    )
+    parser.add_argument(
+        '--decode-cache-mb',
+        type=int,
+        default=256,
+        help='解码缓存的内存上限（MB），0 表示禁用'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='分析与解码使用的进程数，0 表示使用全部 CPU'
+    )
+    parser.add_argument(
+        '--encode-workers',
+        type=int,
+        default=1,
+        help='导出（编码）线程数'
+    )
+    parser.add_argument(
+        '--queue-size',
+        type=int,
+        default=8,
+        help='解码/拼接/编码流水线各级队列的容量'
+    )
+    parser.add_argument(
+        '--output-format',
+        choices=list(OUTPUT_FORMATS),
+        help='输出格式（默认沿用每组最后一个输入文件的格式）'
+    )
+    parser.add_argument(
+        '--preset',
+        choices=list(PRESETS),
+        help='编码预设: fast-lossless 快速 FLAC, archive 高压缩 FLAC, mp3-vbr 高质量 VBR MP3, compact 64k Opus'
+    )
+    parser.add_argument(
+        '--bitrate',
+        help='编码码率，例如 192k（覆盖预设）'
+    )
+    parser.add_argument(
+        '--quality',
+        help='编码质量，作为 -q:a 传给编码器，含义因编码器而异（覆盖预设）'
+    )
+    parser.add_argument(
+        '--encoder-threads',
+        type=int,
+        default=0,
+        help='每个编码进程使用的线程数，0 表示由 ffmpeg 决定'
+    )
+    parser.add_argument(
+        '--native-wav',
+        action='store_true',
+        help='格式一致的 PCM WAV 组直接拼接采样数据，不经过 pydub 和 ffmpeg'
+    )
+    parser.add_argument(
+        '--ffmpeg-concat',
+        action='store_true',
+        help='每组只启动一个 ffmpeg 进程完成解码、拼接与编码（输入为大量压缩格式短文件时更快）'
+    )
+    parser.add_argument(
+        '--ffmpeg-max-inputs',
+        type=int,
+        default=DEFAULT_MAX_INPUTS,
+        help='--ffmpeg-concat 时单条命令的输入文件数上限，超过时分段拼接'
+    )
+    parser.add_argument(
+        '--stream-export',
+        action='store_true',
+        help='边解码边写出每一组，内存占用只与单个输入文件相当（适合很长的输出）'
+    )
+    parser.add_argument(
+        '--max-memory',
+        type=int,
+        default=0,
+        metavar='MB',
+        help='单组拼接预计占用的内存超过该值（MB）时自动改为流式导出，0 表示不限制'
+    )
+    parser.add_argument(
+        '--stream-copy',
+        action='store_true',
+        help='组内文件编码参数一致时直接拼接码流，不重新编码'
+    )
+    parser.add_argument(
+        '--strategy',
+        choices=STRATEGIES,
+        default='greedy',
+        help='分组策略: greedy 从短到长依次累加, ffd 首次适应递减装箱, balanced 尽量减少超出时长'
+    )
+    parser.add_argument(
+        '--plan-only',
+        metavar='MANIFEST',
+        help='只规划分组并写出 JSON 清单，不生成音频'
+    )
+    parser.add_argument(
+        '--from-manifest',
+        metavar='MANIFEST',
+        help='按 JSON 清单执行合并，不重新扫描和分析'
+    )
+    parser.add_argument(
+        '--shard',
+        metavar='K/N',
+        help='只执行计划中第 K 个分片（共 N 个，K 从 1 开始）的组，并在输出目录写出分片报告'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='跳过上次运行中已完成的组，并清理中断留下的临时文件'
+    )
+    parser.add_argument(
+        '--journal-dir',
+        default=str(default_journal_dir()),
+        help='运行日志目录，分片运行时应位于各节点共享的文件系统上'
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='持续监视输入目录，增量合并新到达的文件（Ctrl+C 结束）'
+    )
+    parser.add_argument(
+        '--idle-timeout',
+        type=float,
+        default=60.0,
+        help='监视模式下空闲多久（秒）后导出不足最小时长的待合并组'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=1.0,
+        help='监视模式下等待新文件的间隔（秒）'
+    )
+    parser.add_argument(
+        '--merge-reports',
+        action='store_true',
+        help='汇总输出目录下各分片的报告，不处理音频'
+    )
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='在一行中显示进度（未指定 -v 时只输出警告和错误日志）'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='OUT_JSON',
+        help='记录各阶段（扫描、分析、解码、拼接、编码、写入）的耗时并写出 JSON 报告'
+    )
+    parser.add_argument(
+        '--profile-pstats',
+        metavar='OUT_PSTATS',
+        help='同时用 cProfile 分析主线程与合并阶段的工作线程，合并后写出 pstats 文件'
+             '（-j 大于 1 时在子进程中执行的分析与解码不在其列）'
+    )
     parser.add_argument(
         '-v', '--verbose', 
         action='store_true',
@@ -35,46 +266,280 @@ def parse_args():
     
     return parser.parse_args()
 
+def parse_serve_args(argv):
+    """解析 serve 子命令的参数"""
+    parser = argparse.ArgumentParser(
+        prog='main.py serve',
+        description='任务服务 - 通过本地 HTTP 接口接收合并任务，持久化排队并在固定数量的工作进程中运行',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        '--host',
+        default='127.0.0.1',
+        help='监听地址（接口没有鉴权，只应绑定本机地址）'
+    )
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=8765,
+        help='监听端口'
+    )
+    parser.add_argument(
+        '--socket',
+        metavar='PATH',
+        help='改为监听 Unix 套接字，忽略 --host 与 --port'
+    )
+    parser.add_argument(
+        '--db',
+        default=str(default_job_db_path()),
+        help='任务队列（SQLite）文件路径'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='同时运行的任务数'
+    )
+    parser.add_argument(
+        '--job-threads',
+        type=int,
+        default=1,
+        help='每个任务的分析与解码进程数，总 CPU 占用约为 workers × job-threads'
+    )
+    parser.add_argument(
+        '--index',
+        default=str(default_index_path()),
+        help='元数据索引（SQLite）文件路径，各任务共享'
+    )
+    parser.add_argument(
+        '--no-index',
+        action='store_true',
+        help='禁用元数据索引'
+    )
+    parser.add_argument(
+        '--journal-dir',
+        default=str(default_journal_dir()),
+        help='运行日志目录，服务重启后被中断的任务从这里恢复'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='启用详细日志输出'
+    )
+    return parser.parse_args(argv)
+
+def serve(argv) -> int:
+    """运行任务服务直到收到 Ctrl+C 或 SIGTERM"""
+    args = parse_serve_args(argv)
+    if args.verbose:
+        logging.getLogger('AudioProcessor').setLevel(logging.DEBUG)
+    
+    job_server = JobServer(args.db, workers=args.workers, job_threads=args.job_threads,
+                           journal_dir=args.journal_dir, index_path=None if args.no_index else args.index)
+    try:
+        http_server = make_http_server(job_server, args.host, args.port, args.socket)
+    except OSError as e:
+        print(f"错误: 无法监听 {args.socket or f'{args.host}:{args.port}'}: {str(e)}", file=sys.stderr)
+        return 1
+    
+    # serve_forever 在主线程中运行，shutdown 需要从其他线程调用
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=http_server.shutdown).start())
+    job_server.start()
+    print(f"任务服务监听 {args.socket or f'http://{args.host}:{http_server.server_address[1]}'}，按 Ctrl+C 结束")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        http_server.server_close()
+        job_server.stop()
+    print("任务服务已停止，运行中的任务将在下次启动时恢复")
+    return 0
+
 def main():
     """主函数"""
+    if sys.argv[1:2] == ['serve']:
+        return serve(sys.argv[2:])
     args = parse_args()
     
     # 配置日志级别
     if args.verbose:
         logging.getLogger('AudioProcessor').setLevel(logging.DEBUG)
+    elif args.progress:
+        # 避免逐行日志打断进度行
+        logging.getLogger('AudioProcessor').setLevel(logging.WARNING)
     
     # 转换秒到毫秒
     min_duration_ms = int(args.min_duration * 1000)
     
-    # 检查输入目录是否存在
-    input_dir = Path(args.input_dir)
-    if not input_dir.exists():
-        print(f"错误: 输入目录 '{args.input_dir}' 不存在", file=sys.stderr)
+    if args.merge_reports:
+        return _merge_shard_reports(Path(args.output_dir))
+    
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"错误: {str(e)}", file=sys.stderr)
+            return 1
+    
+    try:
+        output_format = resolve_output_format(args.output_format, args.preset, args.bitrate,
+                                              args.quality, args.encoder_threads)
+    except ValueError as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
         return 1
     
+    manifest = None
+    if args.from_manifest:
+        try:
+            manifest = load_manifest(args.from_manifest)
+        except Exception as e:
+            print(f"错误: 无法读取清单 '{args.from_manifest}': {str(e)}", file=sys.stderr)
+            return 1
+        input_dir = Path(args.input_dir) if args.input_dir else manifest.input_dir
+    elif not args.input_dir and args.files_from:
+        input_dir = Path.cwd()
+    elif not args.input_dir:
+        print("错误: 需要指定 --input-dir、--files-from 或 --from-manifest", file=sys.stderr)
+        return 1
+    else:
+        # 检查输入目录是否存在
+        input_dir = Path(args.input_dir)
+        if not input_dir.exists():
+            print(f"错误: 输入目录 '{args.input_dir}' 不存在", file=sys.stderr)
+            return 1
+    
+    console_progress = ConsoleProgress() if args.progress else None
+    thread_profiler = ThreadProfiler() if args.profile_pstats else None
     try:
         # 创建处理器并执行
         processor = AudioProcessor(
-            input_dir=args.input_dir,
+            input_dir=str(input_dir),
             output_dir=args.output_dir,
-            min_duration_ms=min_duration_ms
+            min_duration_ms=min_duration_ms,
+            index_path=None if args.no_index else args.index,
+            rebuild_index=args.rebuild_index,
+            decode_cache_mb=args.decode_cache_mb,
+            jobs=args.jobs,
+            encode_workers=args.encode_workers,
+            queue_size=args.queue_size,
+            stream_copy=args.stream_copy,
+            strategy=args.strategy,
+            shard=shard,
+            resume=args.resume,
+            journal_dir=args.journal_dir,
+            recursive=args.recursive,
+            include=args.include,
+            exclude=args.exclude,
+            files_from=args.files_from,
+            progress_listener=console_progress,
+            profile=bool(args.profile),
+            stream_export=args.stream_export,
+            max_memory_mb=args.max_memory,
+            native_wav=args.native_wav,
+            ffmpeg_concat=args.ffmpeg_concat,
+            ffmpeg_max_inputs=args.ffmpeg_max_inputs,
+            output_format=output_format,
+            thread_profiler=thread_profiler
         )
         
-        # 开始处理
-        print(f"开始处理音频文件...")
-        count = processor.process()
-        
-        if count > 0:
-            print(f"处理完成: 成功生成 {count} 个音频文件")
-            print(f"输出目录: {args.output_dir}")
-            return 0
-        else:
-            print("未生成任何音频文件，请检查输入文件夹是否包含支持的音频文件")
-            return 1
-            
+        profiler = cProfile.Profile() if args.profile_pstats else None
+        if profiler is not None:
+            profiler.enable()
+        try:
+            return _run(args, processor, input_dir, manifest, console_progress)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                thread_profiler.stats(profiler).dump_stats(args.profile_pstats)
+                print(f"cProfile 结果已写出: {args.profile_pstats}", file=sys.stderr)
+            if args.profile:
+                _end_progress(console_progress)
+                write_profile(args.profile, processor.profile_report())
+                print(f"耗时报告已写出: {args.profile}", file=sys.stderr)
+    
     except Exception as e:
         print(f"处理过程中出错: {str(e)}", file=sys.stderr)
         return 1
+    finally:
+        _end_progress(console_progress)
+
+def _run(args, processor, input_dir, manifest, console_progress) -> int:
+    """按命令行参数执行规划、监视或合并，返回退出码"""
+    if args.plan_only:
+        plan = processor.plan()
+        _end_progress(console_progress)
+        if plan is None:
+            print("未找到可规划的音频文件", file=sys.stderr)
+            return 1
+        processor.save_manifest(plan, args.plan_only)
+        print(plan.summary())
+        print(f"清单已写出: {args.plan_only}")
+        return 0
+    
+    if args.watch:
+        print(f"开始监视 {input_dir}，按 Ctrl+C 结束")
+        count = processor.watch(
+            idle_timeout_s=args.idle_timeout,
+            poll_interval_s=args.poll_interval,
+            stop_event=_stop_on_sigterm()
+        )
+        _end_progress(console_progress)
+        print(f"监视结束: 共生成 {count} 个音频文件")
+        return 0
+    
+    # 开始处理
+    print(f"开始处理音频文件...")
+    if manifest is not None:
+        count = processor.execute(processor.apply_manifest(manifest))
+    else:
+        count = processor.process()
+    _end_progress(console_progress)
+    
+    if count > 0:
+        print(f"处理完成: 成功生成 {count} 个音频文件")
+        print(f"输出目录: {args.output_dir}")
+        return 0
+    else:
+        print("未生成任何音频文件，请检查输入文件夹是否包含支持的音频文件")
+        return 1
+
+def _end_progress(console_progress):
+    """结束进度行，之后的输出从新的一行开始"""
+    if console_progress is not None:
+        console_progress.close()
+
+def _stop_on_sigterm() -> threading.Event:
+    """收到 SIGTERM 时设置停止事件，让监视模式导出待合并组后退出"""
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    return stop_event
+
+def _merge_shard_reports(output_dir: Path) -> int:
+    """汇总各分片报告，写出 report.json 并打印摘要"""
+    report_paths = find_shard_reports(output_dir)
+    if not report_paths:
+        print(f"错误: 在 '{output_dir}' 未找到分片报告", file=sys.stderr)
+        return 1
+    try:
+        merged = merge_reports(report_paths)
+    except Exception as e:
+        print(f"错误: 无法合并分片报告: {str(e)}", file=sys.stderr)
+        return 1
+    
+    with open(output_dir / 'report.json', 'w', encoding='utf-8') as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+    
+    print(f"分片 {len(merged['shards'])}/{merged['shard_count']}: "
+          f"共 {merged['groups']} 组, 生成 {len(merged['outputs'])} 个文件 "
+          f"(直接复制 {merged['stream_copy']}, 重新编码 {merged['reencode']})")
+    if merged['failed_groups']:
+        print(f"失败的组: {', '.join(str(i) for i in merged['failed_groups'])}")
+    if merged['missing_shards']:
+        print(f"缺少分片报告: {', '.join(str(i) for i in merged['missing_shards'])}", file=sys.stderr)
+        return 1
+    return 0 if not merged['failed_groups'] else 1
 
 if __name__ == "__main__":
     sys.exit(main()) 
\ No newline at end of file
@@ -0,0 +1,98 @@
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from pydub import AudioSegment
+
+logger = logging.getLogger('AudioProcessor')
+
+
+class DecodeCache:
+    """按 PCM 字节数限制容量的 LRU 解码缓存"""
+
+    def __init__(self, max_bytes: int):
+        """
+        初始化缓存
+
+        Args:
+            max_bytes: 缓存的 PCM 数据总字节数上限，0 表示禁用缓存
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Path, AudioSegment]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, file_path: Path) -> bool:
+        return file_path in self._entries
+
+    def put(self, file_path: Path, segment: AudioSegment):
+        """
+        缓存一个解码结果，超出容量时淘汰最久未使用的条目
+
+        Args:
+            file_path: 音频文件路径
+            segment: 解码后的音频
+        """
+        size = len(segment.raw_data)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(file_path, None)
+            if old is not None:
+                self.current_bytes -= len(old.raw_data)
+
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted.raw_data)
+                self.evictions += 1
+
+            self._entries[file_path] = segment
+            self.current_bytes += size
+
+    def get(self, file_path: Path) -> Optional[AudioSegment]:
+        """读取缓存并标记为最近使用，未命中时返回 None"""
+        with self._lock:
+            segment = self._entries.get(file_path)
+            if segment is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(file_path)
+            self.hits += 1
+            return segment
+
+    def take(self, file_path: Path) -> Optional[AudioSegment]:
+        """读取并移除缓存条目（合并阶段每个文件只使用一次）"""
+        with self._lock:
+            segment = self._entries.pop(file_path, None)
+            if segment is None:
+                self.misses += 1
+                return None
+            self.current_bytes -= len(segment.raw_data)
+            self.hits += 1
+            return segment
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        """返回命中/未命中/淘汰计数与当前占用"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bytes': self.current_bytes,
+            'max_bytes': self.max_bytes,
+        }
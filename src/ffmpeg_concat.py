@@ -0,0 +1,179 @@
+import os
+import asyncio
+import shutil
+import logging
+import tempfile
+import subprocess
+from itertools import count
+from pathlib import Path
+from typing import List, Optional
+
+from pydub import AudioSegment
+
+from .normalize import PcmFormat
+from .output_format import container_for
+
+logger = logging.getLogger('AudioProcessor')
+
+# 单条命令的默认输入文件数上限，限制命令行长度与同时打开的文件数
+DEFAULT_MAX_INPUTS = 64
+
+# 位宽对应的滤镜采样格式（ffmpeg 没有紧凑的 24 位采样格式，用 s32 承载）
+_SAMPLE_FMTS = {1: 'u8', 2: 's16', 3: 's32', 4: 's32'}
+
+# 输出 WAV 时按位宽选择 PCM 编码，与 pydub 导出的位宽一致
+_PCM_CODECS = {1: 'pcm_u8', 2: 'pcm_s16le', 3: 'pcm_s24le', 4: 'pcm_s32le'}
+
+
+def channel_layout(channels: int) -> str:
+    """声道数对应的 ffmpeg 声道布局名"""
+    return {1: 'mono', 2: 'stereo'}.get(channels, f'{channels}c')
+
+
+def build_command(inputs: List[Path], output_path: Path, target: PcmFormat, container: str,
+                  encoder_args: Optional[List[str]] = None) -> List[str]:
+    """
+    生成一条 ffmpeg 命令：解码全部输入、统一格式后用 concat 滤镜拼接并编码
+
+    Args:
+        inputs: 按拼接顺序排列的输入文件
+        output_path: 输出文件路径
+        target: 目标 (采样率, 位宽, 声道数)
+        container: ffmpeg 封装格式名
+        encoder_args: 编码参数，未指定编码器且输出 WAV 时按位宽选择 PCM 编码
+
+    Returns:
+        命令参数列表
+    """
+    frame_rate, sample_width, channels = target
+    command = [AudioSegment.converter, '-hide_banner', '-loglevel', 'error', '-nostdin', '-y']
+    for path in inputs:
+        # file: 前缀避免文件名中的冒号被当作协议名
+        command += ['-i', 'file:' + os.path.abspath(path)]
+
+    normalize = (f"aresample={frame_rate},aformat=sample_fmts={_SAMPLE_FMTS[sample_width]}"
+                 f":sample_rates={frame_rate}:channel_layouts={channel_layout(channels)}")
+    chains = [f"[{i}:a:0]{normalize}[a{i}]" for i in range(len(inputs))]
+    labels = ''.join(f"[a{i}]" for i in range(len(inputs)))
+    graph = ';'.join(chains + [f"{labels}concat=n={len(inputs)}:v=0:a=1[out]"])
+    command += ['-filter_complex', graph, '-map', '[out]']
+
+    encoder_args = list(encoder_args or [])
+    if container == 'wav' and '-c:a' not in encoder_args:
+        encoder_args = ['-c:a', _PCM_CODECS[sample_width]] + encoder_args
+    command += encoder_args
+    command += ['-f', container, 'file:' + os.path.abspath(output_path)]
+    return command
+
+
+def concat_encode(inputs: List[Path], output_path: Path, target: PcmFormat,
+                  suffix: Optional[str] = None, max_inputs: int = DEFAULT_MAX_INPUTS,
+                  encoder_args: Optional[List[str]] = None) -> int:
+    """
+    用尽量少的 ffmpeg 进程把一组文件拼接并编码为一个输出文件
+
+    输入数不超过 max_inputs 时只启动一个进程；否则每 max_inputs 个输入先拼接成
+    无损的临时 WAV，再拼接这些临时文件（必要时逐层进行）。
+
+    Args:
+        inputs: 按拼接顺序排列的输入文件
+        output_path: 输出文件路径
+        target: 目标 (采样率, 位宽, 声道数)
+        suffix: 决定输出格式的后缀，为 None 时使用 output_path 的后缀
+        max_inputs: 单条命令的输入文件数上限
+        encoder_args: 最终输出的编码参数（中间文件始终是 PCM WAV）
+
+    Returns:
+        启动的 ffmpeg 进程数
+
+    Raises:
+        subprocess.CalledProcessError: ffmpeg 执行失败
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix='concat_'))
+    try:
+        commands = plan_commands(inputs, output_path, target, work_dir, suffix, max_inputs, encoder_args)
+        for command in commands:
+            _run(command)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return len(commands)
+
+
+async def concat_encode_async(inputs: List[Path], output_path: Path, target: PcmFormat,
+                              suffix: Optional[str] = None, max_inputs: int = DEFAULT_MAX_INPUTS,
+                              encoder_args: Optional[List[str]] = None) -> int:
+    """
+    concat_encode 的 asyncio 版本，ffmpeg 进程由事件循环驱动
+
+    任务被取消时终止正在运行的 ffmpeg 进程并删除中间文件，输出文件可能不完整，
+    由调用方删除。参数与返回值同 concat_encode。
+    """
+    work_dir = Path(tempfile.mkdtemp(prefix='concat_'))
+    try:
+        commands = plan_commands(inputs, output_path, target, work_dir, suffix, max_inputs, encoder_args)
+        for command in commands:
+            await run_async(command)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return len(commands)
+
+
+def plan_commands(inputs: List[Path], output_path: Path, target: PcmFormat, work_dir: Path,
+                  suffix: Optional[str] = None, max_inputs: int = DEFAULT_MAX_INPUTS,
+                  encoder_args: Optional[List[str]] = None) -> List[List[str]]:
+    """
+    按执行顺序生成拼接一组文件所需的全部 ffmpeg 命令
+
+    Args:
+        work_dir: 存放分段拼接中间文件的目录
+        其余参数同 concat_encode
+
+    Returns:
+        命令列表，最后一条写出 output_path
+    """
+    commands = []
+    _plan(inputs, output_path, target, (suffix or Path(output_path).suffix).lower(),
+          max(max_inputs, 2), encoder_args, work_dir, count(), commands)
+    return commands
+
+
+def _plan(inputs, output_path, target, suffix, max_inputs, encoder_args, work_dir, part_numbers, commands):
+    if len(inputs) <= max_inputs:
+        commands.append(build_command(inputs, output_path, target, container_for(suffix), encoder_args))
+        return
+
+    parts = []
+    for start in range(0, len(inputs), max_inputs):
+        part = work_dir / f"part_{next(part_numbers):05d}.wav"
+        _plan(inputs[start:start + max_inputs], part, target, '.wav', max_inputs, None,
+              work_dir, part_numbers, commands)
+        parts.append(part)
+    logger.debug(f"{len(inputs)} 个输入超过单条命令上限 {max_inputs}，分 {len(parts)} 段拼接")
+    _plan(parts, output_path, target, suffix, max_inputs, encoder_args, work_dir, part_numbers, commands)
+
+
+def _run(command: List[str]):
+    """执行 ffmpeg，失败时把错误输出附在异常中"""
+    subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, check=True)
+
+
+async def run_async(command: List[str]):
+    """
+    在事件循环中执行 ffmpeg，失败时把错误输出附在异常中
+
+    Raises:
+        subprocess.CalledProcessError: ffmpeg 执行失败
+        asyncio.CancelledError: 任务被取消，ffmpeg 进程已被终止
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command, stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    try:
+        stdout, stderr = await process.communicate()
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        raise
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stdout, stderr)
@@ -2,40 +2,92 @@ import sys
 import os
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, simpledialog
+import queue
 import threading
 import logging
 import webbrowser
 from pathlib import Path
 from .audio_processor import AudioProcessor
+from .metadata_index import default_index_path
+from .progress import format_progress
 
-class RedirectText:
-    """重定向文本到Tkinter Text控件"""
-    def __init__(self, text_widget):
+class LogPane:
+    """
+    线程安全的日志面板
+    
+    任何线程都只把文本放入队列，由 Tk 主循环通过 after() 定期批量取出并写入 Text 控件；
+    控件只保留最近 max_lines 行。
+    """
+    def __init__(self, text_widget, max_lines=5000, interval_ms=100, batch_size=1000):
         self.text_widget = text_widget
-        self.buffer = ""
-
+        self.max_lines = max_lines
+        self.interval_ms = interval_ms
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self.text_widget.after(self.interval_ms, self._drain)
+    
     def write(self, string):
-        self.buffer += string
+        """可在任意线程调用"""
+        self.queue.put(string)
+    
+    def clear(self):
+        """清空面板和尚未显示的文本（仅在主线程调用）"""
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
         self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, string)
-        self.text_widget.see(tk.END)
+        self.text_widget.delete(1.0, tk.END)
         self.text_widget.config(state=tk.DISABLED)
     
+    def _drain(self):
+        """在主线程中把队列中的文本一次性写入控件"""
+        chunks = []
+        try:
+            while len(chunks) < self.batch_size:
+                chunks.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        
+        try:
+            if chunks:
+                self.text_widget.config(state=tk.NORMAL)
+                self.text_widget.insert(tk.END, ''.join(chunks))
+                line_count = int(self.text_widget.index('end-1c').split('.')[0])
+                if line_count > self.max_lines:
+                    self.text_widget.delete(1.0, f"{line_count - self.max_lines + 1}.0")
+                self.text_widget.see(tk.END)
+                self.text_widget.config(state=tk.DISABLED)
+            # 积压较多时尽快继续取，否则按固定间隔轮询
+            delay = 1 if len(chunks) == self.batch_size else self.interval_ms
+            self.text_widget.after(delay, self._drain)
+        except tk.TclError:
+            # 窗口已关闭
+            pass
+
+class RedirectText:
+    """重定向文本到日志面板"""
+    def __init__(self, log_pane):
+        self.log_pane = log_pane
+
+    def write(self, string):
+        self.log_pane.write(string)
+    
     def flush(self):
         pass
 
 class TkTextHandler(logging.Handler):
-    """将日志输出到Tkinter文本框的处理器"""
-    def __init__(self, text_widget):
+    """将日志放入日志面板队列的处理器"""
+    def __init__(self, log_pane):
         logging.Handler.__init__(self)
-        self.text_widget = text_widget
+        self.log_pane = log_pane
         
     def emit(self, record):
-        msg = self.format(record)
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, msg + '\n')
-        self.text_widget.see(tk.END)
-        self.text_widget.config(state=tk.DISABLED)
+        try:
+            self.log_pane.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
 
 class AboutDialog(tk.Toplevel):
     """关于和赞助对话框"""
@@ -188,16 +240,19 @@ class AudioProcessorGUI:
         
         # 设置日志
         self.logger = logging.getLogger('AudioProcessor')
-        self.logger.setLevel(logging.DEBUG)  # 设置为DEBUG级别，显示更详细的日志
+        self.logger.setLevel(logging.INFO)  # 逐个文件的细节为DEBUG级别，界面只显示汇总进度
         
         # 添加日志处理器，将日志输出到文本框
-        self.text_handler = TkTextHandler(self.log_text)
-        self.text_handler.setLevel(logging.DEBUG)
+        self.text_handler = TkTextHandler(self.log_pane)
+        self.text_handler.setLevel(logging.INFO)
         self.text_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
         self.logger.addHandler(self.text_handler)
         
         # 处理中标志
         self.processing = False
+        
+        # 工作线程只保存最新的进度快照，由主线程定期读取
+        self._latest_progress = None
     
     def create_widgets(self):
         """创建GUI组件"""
@@ -243,6 +298,15 @@ class AudioProcessorGUI:
         self.about_button = ttk.Button(button_frame, text="说明/赞助", command=self.show_about_dialog, width=15)
         self.about_button.pack(side=tk.LEFT, padx=5)
         
+        # 进度条
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.pack(fill=tk.X, pady=5)
+        
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        self.progress_bar.pack(fill=tk.X)
+        self.progress_text_var = tk.StringVar(value="")
+        ttk.Label(progress_frame, textvariable=self.progress_text_var).pack(anchor=tk.W)
+        
         # 日志文本框
         log_frame = ttk.LabelFrame(main_frame, text="处理日志")
         log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
@@ -255,7 +319,8 @@ class AudioProcessorGUI:
         self.log_text.config(yscrollcommand=scrollbar.set, state=tk.DISABLED)
         
         # 重定向stdout到日志文本框
-        self.stdout_redirect = RedirectText(self.log_text)
+        self.log_pane = LogPane(self.log_text)
+        self.stdout_redirect = RedirectText(self.log_pane)
         sys.stdout = self.stdout_redirect
         
         # 状态栏
@@ -303,15 +368,19 @@ class AudioProcessorGUI:
             return
         
         # 清空日志
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.delete(1.0, tk.END)
-        self.log_text.config(state=tk.DISABLED)
+        self.log_pane.clear()
         
         # 更新UI状态
         self.processing = True
         self.process_button.config(state=tk.DISABLED)
         self.status_var.set("处理中...")
         
+        # 重置进度显示并开始定期刷新
+        self._latest_progress = None
+        self.progress_bar.config(value=0)
+        self.progress_text_var.set("")
+        self.root.after(200, self.refresh_progress)
+        
         # 在新线程中处理
         thread = threading.Thread(target=self.process_audio_files, 
                                  args=(input_dir, output_dir, min_duration))
@@ -319,13 +388,15 @@ class AudioProcessorGUI:
         thread.start()
     
     def process_audio_files(self, input_dir, output_dir, min_duration):
-        """在后台线程中处理音频文件"""
+        """在后台线程中处理音频文件（界面操作都通过 root.after 交给主线程）"""
         try:
             # 创建处理器
             processor = AudioProcessor(
                 input_dir=input_dir,
                 output_dir=output_dir,
-                min_duration_ms=int(min_duration * 1000)
+                min_duration_ms=int(min_duration * 1000),
+                index_path=str(default_index_path()),
+                progress_listener=self.on_progress
             )
             
             # 开始处理
@@ -335,22 +406,39 @@ class AudioProcessorGUI:
             if count > 0:
                 self.logger.info(f"处理完成: 成功生成 {count} 个音频文件")
                 self.logger.info(f"输出目录: {output_dir}")
-                messagebox.showinfo("成功", f"处理完成: 成功生成 {count} 个音频文件")
+                self.root.after(0, lambda: messagebox.showinfo("成功", f"处理完成: 成功生成 {count} 个音频文件"))
             else:
                 self.logger.warning("未生成任何音频文件，请检查输入文件夹是否包含支持的音频文件")
-                messagebox.showwarning("警告", "未生成任何音频文件，请检查输入文件夹是否包含支持的音频文件")
+                self.root.after(0, lambda: messagebox.showwarning("警告", "未生成任何音频文件，请检查输入文件夹是否包含支持的音频文件"))
                 
         except Exception as e:
             self.logger.error(f"处理过程中出错: {str(e)}")
-            messagebox.showerror("错误", f"处理过程中出错: {str(e)}")
+            error = str(e)
+            self.root.after(0, lambda: messagebox.showerror("错误", f"处理过程中出错: {error}"))
         
         finally:
             # 恢复UI状态
             self.root.after(0, self.reset_ui)
     
+    def on_progress(self, event, snapshot):
+        """进度监听器（在工作线程中调用），只保存快照"""
+        self._latest_progress = snapshot
+    
+    def refresh_progress(self):
+        """在主线程中把最新的进度快照显示到进度条"""
+        snapshot = self._latest_progress
+        if snapshot is not None:
+            fraction = snapshot.fraction
+            if fraction is not None:
+                self.progress_bar.config(value=fraction * 100)
+            self.progress_text_var.set(format_progress(snapshot))
+        if self.processing:
+            self.root.after(200, self.refresh_progress)
+    
     def reset_ui(self):
         """重置UI状态"""
         self.processing = False
+        self.refresh_progress()
         self.process_button.config(state=tk.NORMAL)
         self.status_var.set("就绪")
 
@@ -0,0 +1,242 @@
+import io
+import wave
+import struct
+import logging
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydub import AudioSegment
+
+from .accumulator import SegmentAccumulator
+from .normalize import PcmFormat, normalize, segment_format, target_format
+from .output_format import OutputFormat, container_for, output_suffix
+from .parallel import resolve_jobs
+from .planner import MergeGroup, output_name, plan_groups
+from .probe import AudioMetadata, ProbeError, probe_stream
+from .streaming import pcm_input_args, wav_frames
+
+logger = logging.getLogger('AudioProcessor')
+
+# 输入可以是字节串或可读的二进制流
+AudioSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+# 名称没有后缀时输出 WAV
+_DEFAULT_SUFFIX = '.wav'
+
+# 写入 ffmpeg 标准输入的块大小
+_PIPE_CHUNK_BYTES = 1024 * 1024
+
+
+@dataclass
+class MergedClip:
+    """一个拼接结果"""
+    name: str
+    members: List[str]
+    duration_ms: int
+    data: Optional[bytes] = None  # 写入调用方提供的流时为 None
+
+
+def merge_clips(inputs: Iterable[Tuple[str, AudioSource]], min_duration_ms: int = 15000,
+                strategy: str = 'greedy', output_format: Optional[OutputFormat] = None,
+                open_output: Optional[Callable[[str], BinaryIO]] = None, jobs: int = 1) -> List[MergedClip]:
+    """
+    在内存中拼接音频，不读写任何文件
+
+    输入按名称的后缀判断格式，分组与输出文件名的规则与 AudioProcessor 相同（名称代替相对路径）。
+    解码与编码都通过管道与 ffmpeg 交换数据；输出 WAV 且没有编码参数时直接生成，不启动 ffmpeg。
+    无法解析或解码的输入会被跳过。
+
+    Args:
+        inputs: (名称, 字节串或二进制流) 序列，名称不能重复
+        min_duration_ms: 最小音频时长（毫秒）
+        strategy: 分组策略（见 planner.STRATEGIES）
+        output_format: 输出格式，为 None 时沿用组内最后一个输入的格式
+        open_output: 按输出名称返回可写的二进制流；指定时结果写入该流（调用方负责关闭），
+            否则以字节串返回
+        jobs: 同时处理的组数，0 表示使用全部 CPU 核心
+
+    Returns:
+        按分组顺序排列的拼接结果
+
+    Raises:
+        ValueError: 输入名称重复
+    """
+    sources = _read_sources(inputs)
+    metadata: Dict[Path, AudioMetadata] = {}
+    decoded: Dict[Path, AudioSegment] = {}
+    audio_info = []
+    for path, data in sources.items():
+        try:
+            metadata[path] = _probe(path, data, decoded)
+        except Exception as e:
+            logger.error(f"无法读取音频 {path.name}: {str(e)}")
+            continue
+        audio_info.append((path, metadata[path].duration_ms))
+
+    if not audio_info:
+        logger.warning("没有可用的音频输入")
+        return []
+
+    plan = plan_groups(sorted(audio_info, key=lambda x: x[1]), min_duration_ms, strategy)
+    used = set()
+    for group in plan.groups:
+        suffix = output_suffix(output_format, group.paths[-1]) or _DEFAULT_SUFFIX
+        group.output_name = output_name([p.as_posix() for p in group.paths], group.duration_ms, suffix, used)
+        used.add(group.output_name)
+    logger.info(plan.summary())
+
+    def merge(group: MergeGroup) -> Optional[MergedClip]:
+        try:
+            return _merge_group(group, sources, metadata, decoded, output_format, open_output)
+        except Exception as e:
+            logger.error(f"处理第 {group.index + 1} 组时出错: {str(e)}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=resolve_jobs(jobs)) as pool:
+        results = [clip for clip in pool.map(merge, plan.groups) if clip is not None]
+    logger.info(f"处理完成: 成功生成 {len(results)} 个音频")
+    return results
+
+
+def encode_segment(segment: AudioSegment, stream: BinaryIO, suffix: str,
+                   encoder_args: Optional[List[str]] = None):
+    """
+    把音频编码后写入二进制流
+
+    WAV 且没有编码参数时预先写好帧数，不需要回写文件头，因此流可以不支持随机访问；
+    其他格式由 ffmpeg 从标准输入读取 PCM、向标准输出写出编码结果。
+
+    Raises:
+        subprocess.CalledProcessError: ffmpeg 执行失败
+    """
+    container = container_for(suffix)
+    encoder_args = list(encoder_args or [])
+    if container == 'wav' and not encoder_args:
+        with wave.open(stream, 'wb') as writer:
+            writer.setnchannels(segment.channels)
+            writer.setsampwidth(segment.sample_width)
+            writer.setframerate(segment.frame_rate)
+            writer.setnframes(int(segment.frame_count()))
+            writer.writeframesraw(wav_frames(segment.raw_data, segment.sample_width))
+        return
+
+    if container == 'ipod':
+        # MP4 默认在结尾回写索引，写入管道时需要分片
+        encoder_args += ['-movflags', 'frag_keyframe+empty_moov']
+    command = [AudioSegment.converter, '-hide_banner', '-loglevel', 'error', '-nostdin',
+               *pcm_input_args(segment_format(segment)), *encoder_args, '-f', container, 'pipe:1']
+    process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    stderr = []
+    feeder = threading.Thread(target=_feed, args=(process, memoryview(segment.raw_data), stderr))
+    feeder.start()
+    try:
+        while True:
+            chunk = process.stdout.read(_PIPE_CHUNK_BYTES)
+            if not chunk:
+                break
+            stream.write(chunk)
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        feeder.join()
+        process.stdout.close()
+        process.wait()
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, stderr=b''.join(stderr))
+
+
+def _feed(process: subprocess.Popen, data: memoryview, stderr: List[bytes]):
+    """向 ffmpeg 写入全部 PCM 后读取错误输出"""
+    try:
+        for start in range(0, len(data), _PIPE_CHUNK_BYTES):
+            process.stdin.write(data[start:start + _PIPE_CHUNK_BYTES])
+    except (BrokenPipeError, ValueError):
+        # ffmpeg 提前退出（出错或被终止），错误由返回码报告
+        pass
+    finally:
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+    stderr.append(process.stderr.read())
+    process.stderr.close()
+
+
+def _read_sources(inputs: Iterable[Tuple[str, AudioSource]]) -> Dict[Path, bytes]:
+    """读入全部输入，以名称对应的路径为键（与 AudioProcessor 的分组接口一致）"""
+    sources: Dict[Path, bytes] = {}
+    for name, source in inputs:
+        path = Path(name)
+        if path in sources:
+            raise ValueError(f"输入名称重复: {name}")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            sources[path] = bytes(source)
+        else:
+            sources[path] = source.read()
+    return sources
+
+
+def _probe(path: Path, data: bytes, decoded: Dict[Path, AudioSegment]) -> AudioMetadata:
+    """解析文件头，无法解析时完整解码并保留结果供拼接复用"""
+    try:
+        return probe_stream(io.BytesIO(data))
+    except (ProbeError, OSError, struct.error, ValueError, IndexError) as e:
+        logger.debug(f"文件头解析失败 {path.name}: {str(e)}")
+
+    audio = _decode(path, data)
+    decoded[path] = audio
+    return AudioMetadata(
+        duration_ms=len(audio),
+        sample_rate=audio.frame_rate,
+        channels=audio.channels,
+        codec='pcm',
+        sample_width=audio.sample_width,
+        source='decode',
+    )
+
+
+def _decode(path: Path, data: bytes) -> AudioSegment:
+    """从内存解码，非 WAV 格式通过管道交给 ffmpeg"""
+    return AudioSegment.from_file(io.BytesIO(data), format=path.suffix.lstrip('.').lower() or None)
+
+
+def _merge_group(group: MergeGroup, sources: Dict[Path, bytes], metadata: Dict[Path, AudioMetadata],
+                 decoded: Dict[Path, AudioSegment], output_format: Optional[OutputFormat],
+                 open_output: Optional[Callable[[str], BinaryIO]]) -> Optional[MergedClip]:
+    """解码、统一格式并拼接一组，编码后写入输出流或返回字节串"""
+    target: Optional[PcmFormat] = target_format(metadata.get(p) for p in group.paths)
+    accumulator = SegmentAccumulator()
+    members = []
+    for path in group.paths:
+        try:
+            audio = decoded.pop(path, None)
+            if audio is None:
+                audio = _decode(path, sources[path])
+        except Exception as e:
+            logger.error(f"处理文件 {path.name} 时出错: {str(e)}")
+            continue
+        if target is not None and segment_format(audio) != target:
+            audio = normalize(audio, target)
+        accumulator.append(audio)
+        members.append(path.as_posix())
+
+    if accumulator.empty:
+        return None
+    segment = accumulator.to_segment()
+    suffix = Path(group.output_name).suffix
+    encoder_args = output_format.encoder_args() if output_format is not None else []
+    if open_output is not None:
+        encode_segment(segment, open_output(group.output_name), suffix, encoder_args)
+        data = None
+    else:
+        buffer = io.BytesIO()
+        encode_segment(segment, buffer, suffix, encoder_args)
+        data = buffer.getvalue()
+    logger.info(f"成功生成音频: {group.output_name} (时长: {len(segment)/1000:.2f}秒)")
+    return MergedClip(group.output_name, members, len(segment), data)
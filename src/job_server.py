@@ -0,0 +1,403 @@
+import os
+import json
+import time
+import signal
+import logging
+import threading
+import socketserver
+import multiprocessing
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .audio_processor import AudioProcessor
+from .job_store import JOB_STATUSES, JobStore
+from .journal import partial_path
+from .output_format import resolve_output_format
+from .planner import STRATEGIES
+from .progress import ProgressSnapshot
+
+logger = logging.getLogger('AudioProcessor')
+
+# 任务参数中允许的选项及其类型（与命令行参数同名，时长单位为秒）
+_OPTION_TYPES = {
+    'min_duration': (int, float),
+    'strategy': str,
+    'recursive': bool,
+    'include': list,
+    'exclude': list,
+    'stream_copy': bool,
+    'native_wav': bool,
+    'ffmpeg_concat': bool,
+    'stream_export': bool,
+    'output_format': str,
+    'preset': str,
+    'bitrate': str,
+    'quality': (str, int),
+}
+
+# 运行中任务的进度最多每隔多久写入一次任务队列（秒）
+_PROGRESS_INTERVAL_S = 0.5
+
+# 终止任务进程后等待其退出的时间（秒），超时后强制结束
+_KILL_TIMEOUT_S = 5.0
+
+
+def processor_kwargs(spec: Dict) -> Dict:
+    """
+    校验任务参数并转换为 AudioProcessor 的构造参数（不含进程数等由服务决定的参数）
+
+    Raises:
+        ValueError: 参数缺失、类型错误、取值未知或输入目录不存在
+    """
+    for key in ('input_dir', 'output_dir'):
+        if not isinstance(spec.get(key), str) or not spec[key]:
+            raise ValueError(f"缺少参数: {key}")
+    unknown = set(spec) - set(_OPTION_TYPES) - {'input_dir', 'output_dir'}
+    if unknown:
+        raise ValueError(f"未知的参数: {', '.join(sorted(unknown))}")
+    for key, value in spec.items():
+        if key in _OPTION_TYPES and value is not None and not isinstance(value, _OPTION_TYPES[key]):
+            raise ValueError(f"参数 {key} 的类型不正确")
+    if not Path(spec['input_dir']).is_dir():
+        raise ValueError(f"输入目录不存在: {spec['input_dir']}")
+    strategy = spec.get('strategy') or 'greedy'
+    if strategy not in STRATEGIES:
+        raise ValueError(f"未知的分组策略: {strategy}（可选: {', '.join(STRATEGIES)}）")
+
+    return {
+        'input_dir': spec['input_dir'],
+        'output_dir': spec['output_dir'],
+        'min_duration_ms': int((spec.get('min_duration') or 15) * 1000),
+        'strategy': strategy,
+        'recursive': bool(spec.get('recursive')),
+        'include': spec.get('include'),
+        'exclude': spec.get('exclude'),
+        'stream_copy': bool(spec.get('stream_copy')),
+        'native_wav': bool(spec.get('native_wav')),
+        'ffmpeg_concat': bool(spec.get('ffmpeg_concat')),
+        'stream_export': bool(spec.get('stream_export')),
+        'output_format': resolve_output_format(spec.get('output_format'), spec.get('preset'),
+                                               spec.get('bitrate'), spec.get('quality')),
+    }
+
+
+def run_job(db_path: str, job_id: int, spec: Dict, jobs: int, journal_dir: Optional[str],
+            index_path: Optional[str], resume: bool):
+    """
+    任务子进程的入口：执行一个任务并把进度与结果写回任务队列
+
+    子进程自成一个进程组，取消时连同它启动的解码进程与 ffmpeg 一起终止。
+    规划完成后先记录计划写出的文件名，取消时只清理这些文件的临时文件。
+    """
+    if hasattr(os, 'setpgrp'):
+        os.setpgrp()
+    store = JobStore(db_path)
+    try:
+        reporter = _ProgressReporter(store, job_id)
+        processor = AudioProcessor(**processor_kwargs(spec), jobs=jobs, journal_dir=journal_dir,
+                                   index_path=index_path, resume=resume, progress_listener=reporter)
+        plan = processor.plan()
+        count = 0
+        if plan is not None:
+            store.set_outputs(job_id, [g.output_name for g in plan.groups])
+            count = processor.execute(plan)
+        store.finish(job_id, 'succeeded', result={
+            'outputs': count,
+            'files': sorted(p.name for p in processor.outputs),
+            'report': processor.report,
+        })
+    except Exception as e:
+        logger.error(f"任务 {job_id} 失败: {str(e)}")
+        store.finish(job_id, 'failed', error=str(e))
+    finally:
+        store.close()
+
+
+class _ProgressReporter:
+    """把进度快照节流后写入任务队列"""
+
+    def __init__(self, store: JobStore, job_id: int):
+        self.store = store
+        self.job_id = job_id
+        self._lock = threading.Lock()
+        self._last = 0.0
+
+    def __call__(self, event, snapshot: ProgressSnapshot):
+        now = time.monotonic()
+        if event.kind != 'stage' and now - self._last < _PROGRESS_INTERVAL_S:
+            return
+        with self._lock:
+            self._last = now
+            progress = asdict(snapshot)
+            progress['fraction'] = snapshot.fraction
+            progress['eta_s'] = snapshot.eta_s
+            try:
+                self.store.update_progress(self.job_id, progress)
+            except Exception as e:
+                logger.debug(f"写入任务 {self.job_id} 的进度失败: {str(e)}")
+
+
+class JobServer:
+    """
+    批量任务服务
+
+    固定数量的工作线程从持久化队列中取出任务，每个任务在独立的子进程中运行 AudioProcessor，
+    因此同时占用的 CPU 不超过 workers × job_threads 个进程，与排队的任务数无关。
+    提交只写入一行数据库记录。服务退出时运行中的任务保持 running 状态，
+    下次启动时重新排队并从运行日志恢复。
+    """
+
+    def __init__(self, db_path: str, workers: int = 1, job_threads: int = 1,
+                 journal_dir: Optional[str] = None, index_path: Optional[str] = None,
+                 poll_interval_s: float = 0.2):
+        """
+        Args:
+            db_path: 任务队列的 SQLite 文件路径
+            workers: 同时运行的任务数
+            job_threads: 每个任务的分析与解码进程数（AudioProcessor 的 jobs）
+            journal_dir: 运行日志目录，用于恢复被中断的任务
+            index_path: 元数据索引文件路径，为 None 时不使用索引
+            poll_interval_s: 工作线程检查新任务与取消请求的间隔（秒）
+        """
+        self.store = JobStore(db_path)
+        self.workers = max(workers, 1)
+        self.job_threads = max(job_threads, 1)
+        self.journal_dir = journal_dir
+        self.index_path = index_path
+        self.poll_interval_s = poll_interval_s
+        # 服务进程中有多个线程，fork 出的子进程可能继承被持有的锁
+        self._context = multiprocessing.get_context('spawn')
+        self._wakeup = threading.Condition()
+        self._submit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """重新排队上次中断的任务并启动工作线程"""
+        requeued = self.store.requeue_interrupted()
+        if requeued:
+            logger.info(f"重新排队上次中断的任务: {requeued} 个")
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i + 1}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"任务服务已启动: {self.workers} 个工作进程, 每个任务 {self.job_threads} 个解码进程")
+
+    def stop(self):
+        """停止工作线程并终止运行中的任务（保持 running 状态，下次启动时恢复）"""
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.store.close()
+
+    def submit(self, spec: Dict) -> Dict:
+        """
+        校验参数后加入队列
+
+        Args:
+            spec: 任务参数，可包含 client 字段指定提交方
+
+        Returns:
+            新任务
+
+        Raises:
+            ValueError: 参数不合法，或输出目录已被排队中或运行中的任务使用
+        """
+        spec = dict(spec)
+        client = spec.pop('client', None) or 'default'
+        if not isinstance(client, str):
+            raise ValueError("参数 client 的类型不正确")
+        processor_kwargs(spec)
+        output_dir = Path(spec['output_dir']).resolve()
+        with self._submit_lock:
+            # 同一输出目录的任务会互相覆盖运行日志与临时文件
+            for job in self.store.active_jobs():
+                if Path(job['spec']['output_dir']).resolve() == output_dir:
+                    raise ValueError(f"输出目录已被任务 {job['id']} 使用: {spec['output_dir']}")
+            job_id = self.store.submit(spec, client)
+        with self._wakeup:
+            self._wakeup.notify()
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: int) -> Optional[Dict]:
+        """取消任务，不存在时返回 None"""
+        return self.store.cancel(job_id)
+
+    def _work(self):
+        """工作线程：依次取出并运行任务"""
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim_next()
+            except Exception as e:
+                logger.error(f"读取任务队列失败: {str(e)}")
+                job = None
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.poll_interval_s)
+                continue
+            try:
+                self._run(job)
+            except Exception as e:
+                logger.error(f"运行任务 {job['id']} 时出错: {str(e)}")
+                self.store.finish(job['id'], 'failed', error=str(e))
+
+    def _run(self, job: Dict):
+        """在子进程中运行任务，等待其结束或处理取消请求"""
+        job_id = job['id']
+        logger.info(f"开始任务 {job_id} (提交方: {job['client']}, 第 {job['attempts']} 次运行)")
+        process = self._context.Process(
+            target=run_job, name=f"job-{job_id}",
+            args=(str(self.store.db_path), job_id, job['spec'], self.job_threads,
+                  self.journal_dir, self.index_path, job['attempts'] > 1))
+        process.start()
+        while True:
+            process.join(self.poll_interval_s)
+            if not process.is_alive():
+                break
+            if self._stop.is_set():
+                _kill(process)
+                return
+            if self.store.cancel_requested(job_id):
+                _kill(process)
+                _remove_partials(Path(job['spec']['output_dir']), self.store.get(job_id)['outputs'] or [])
+                self.store.finish(job_id, 'cancelled')
+                logger.info(f"任务 {job_id} 已取消")
+                return
+
+        # 子进程正常结束时已写回结果，这里只处理崩溃或被外部终止的情况
+        self.store.finish(job_id, 'failed', error=f"任务进程异常退出 (exit code {process.exitcode})")
+        logger.info(f"任务 {job_id} 结束: {self.store.get(job_id)['status']}")
+
+
+def _kill(process: multiprocessing.Process):
+    """终止任务进程及其进程组（解码进程与 ffmpeg），超时后强制结束"""
+    for force in (False, True):
+        try:
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            # 不支持进程组（Windows），或子进程还没来得及建立进程组
+            if force:
+                process.kill()
+            else:
+                process.terminate()
+        process.join(_KILL_TIMEOUT_S)
+        if not process.is_alive():
+            return
+
+
+def _remove_partials(output_dir: Path, outputs: List[str]):
+    """删除被终止的任务留下的临时文件（只删除该任务计划写出的文件对应的临时文件）"""
+    for name in outputs:
+        partial = partial_path(output_dir / name)
+        try:
+            partial.unlink()
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"无法删除临时文件 {partial.name}: {str(e)}")
+
+
+class _JobRequestHandler(BaseHTTPRequestHandler):
+    """
+    任务接口
+
+        POST   /jobs              提交任务，返回 201 与任务
+        GET    /jobs[?status=]    列出任务
+        GET    /jobs/<id>         查询任务状态与进度
+        POST   /jobs/<id>/cancel  取消任务（也可用 DELETE /jobs/<id>）
+    """
+
+    server_version = 'AudioProcessorJobs'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = url.path.strip('/').split('/')
+        if parts == ['jobs']:
+            status = parse_qs(url.query).get('status', [None])[0]
+            if status is not None and status not in JOB_STATUSES:
+                return self._send(400, {'error': f"未知的状态: {status}"})
+            return self._send(200, {'jobs': self.server.job_server.store.list_jobs(status)})
+        job_id = self._job_id(parts)
+        if job_id is not None:
+            job = self.server.job_server.store.get(job_id)
+            return self._send(200, job) if job else self._send(404, {'error': f"任务不存在: {job_id}"})
+        self._send(404, {'error': '未知的路径'})
+
+    def do_POST(self):
+        parts = urlparse(self.path).path.strip('/').split('/')
+        if parts == ['jobs']:
+            try:
+                spec = json.loads(self.rfile.read(int(self.headers.get('Content-Length') or 0)) or b'{}')
+                if not isinstance(spec, dict):
+                    raise ValueError("请求体应为 JSON 对象")
+                return self._send(201, self.server.job_server.submit(spec))
+            except ValueError as e:
+                return self._send(400, {'error': str(e)})
+        if len(parts) == 3 and parts[2] == 'cancel':
+            return self._cancel(self._job_id(parts[:2]))
+        self._send(404, {'error': '未知的路径'})
+
+    def do_DELETE(self):
+        self._cancel(self._job_id(urlparse(self.path).path.strip('/').split('/')))
+
+    def _cancel(self, job_id: Optional[int]):
+        if job_id is None:
+            return self._send(404, {'error': '未知的路径'})
+        job = self.server.job_server.cancel(job_id)
+        self._send(200, job) if job else self._send(404, {'error': f"任务不存在: {job_id}"})
+
+    @staticmethod
+    def _job_id(parts) -> Optional[int]:
+        if len(parts) == 2 and parts[0] == 'jobs' and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(f"HTTP {self.address_string()} {format % args}")
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """监听 Unix 套接字的 HTTP 服务"""
+    daemon_threads = True
+
+    def get_request(self):
+        # BaseHTTPRequestHandler 需要 (host, port) 形式的客户端地址
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+def make_http_server(job_server: JobServer, host: str = '127.0.0.1', port: int = 8765,
+                     socket_path: Optional[str] = None) -> socketserver.BaseServer:
+    """
+    创建任务接口的 HTTP 服务（调用 serve_forever 开始处理请求）
+
+    Args:
+        job_server: 任务服务
+        host: 监听地址，只应绑定本机地址
+        port: 监听端口，0 表示由系统分配
+        socket_path: 指定时改为监听该 Unix 套接字，忽略 host 与 port
+    """
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = _UnixHTTPServer(socket_path, _JobRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), _JobRequestHandler)
+        server.daemon_threads = True
+    server.job_server = job_server
+    return server
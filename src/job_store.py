@@ -0,0 +1,225 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger('AudioProcessor')
+
+# 任务状态
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+
+# 已结束的状态
+FINAL_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+# 等待其他进程释放写锁的最长时间（秒）
+_BUSY_TIMEOUT_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    progress TEXT,
+    outputs TEXT,
+    result TEXT,
+    error TEXT,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, client)
+"""
+
+
+def default_job_db_path() -> Path:
+    """默认任务队列位置：与元数据索引相同的用户缓存目录"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home) / 'audio_processor' / 'jobs.sqlite'
+
+
+class JobStore:
+    """
+    持久化的任务队列
+
+    同一进程内的多个线程可共享一个实例（内部加锁）；服务进程与任务子进程各自打开连接，
+    由 WAL 模式与 busy timeout 协调并发写入。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        打开（或创建）任务队列
+
+        Args:
+            db_path: SQLite 文件路径
+        """
+        self.db_path = Path(db_path)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=_BUSY_TIMEOUT_S,
+                                    check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(f"PRAGMA busy_timeout = {int(_BUSY_TIMEOUT_S * 1000)}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, spec: Dict, client: str = 'default') -> int:
+        """
+        加入队列
+
+        Args:
+            spec: 任务参数（JSON 可序列化）
+            client: 提交方，调度时在提交方之间轮流
+
+        Returns:
+            任务 ID
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO jobs (client, spec, status, submitted_at) VALUES (?, ?, 'queued', ?)",
+                (client, json.dumps(spec, ensure_ascii=False), time.time()))
+            return cursor.lastrowid
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """查询任务，不存在时返回 None"""
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_dict(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """按提交顺序倒序列出任务"""
+        with self._lock:
+            if status is None:
+                rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+            else:
+                rows = self.conn.execute("SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?",
+                                         (status, limit))
+            return [_to_dict(row) for row in rows]
+
+    def active_jobs(self) -> List[Dict]:
+        """排队中与运行中的任务"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY id")
+            return [_to_dict(row) for row in rows]
+
+    def claim_next(self) -> Optional[Dict]:
+        """
+        取出下一个排队的任务并标记为运行中
+
+        优先选择当前运行中任务最少的提交方，同一提交方内先进先出，
+        避免一个提交方的大量任务占满所有工作进程。
+
+        Returns:
+            任务；队列为空时返回 None
+        """
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    "SELECT q.id FROM jobs q WHERE q.status = 'queued' ORDER BY "
+                    "(SELECT COUNT(*) FROM jobs r WHERE r.status = 'running' AND r.client = q.client), "
+                    "q.id LIMIT 1").fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 "
+                    "WHERE id = ?", (time.time(), row['id']))
+                job = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (row['id'],)).fetchone()
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return _to_dict(job)
+
+    def update_progress(self, job_id: int, progress: Dict):
+        """记录运行中任务的进度"""
+        with self._lock:
+            self.conn.execute("UPDATE jobs SET progress = ? WHERE id = ? AND status = 'running'",
+                              (json.dumps(progress), job_id))
+
+    def set_outputs(self, job_id: int, outputs: List[str]):
+        """记录运行中任务计划写出的文件名，取消时只清理这些文件的临时文件"""
+        with self._lock:
+            self.conn.execute("UPDATE jobs SET outputs = ? WHERE id = ? AND status = 'running'",
+                              (json.dumps(outputs, ensure_ascii=False), job_id))
+
+    def finish(self, job_id: int, status: str, result: Optional[Dict] = None,
+               error: Optional[str] = None) -> bool:
+        """
+        把运行中的任务标记为结束
+
+        Returns:
+            任务是否仍处于运行中（已被取消或已结束时不覆盖其状态）
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = 'running'",
+                (status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+            return cursor.rowcount > 0
+
+    def cancel(self, job_id: int) -> Optional[Dict]:
+        """
+        取消任务：排队中的任务立即取消，运行中的任务由工作线程终止
+
+        Returns:
+            取消后的任务；不存在时返回 None
+        """
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id))
+            self.conn.execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                              (job_id,))
+        return self.get(job_id)
+
+    def cancel_requested(self, job_id: int) -> bool:
+        """运行中的任务是否被请求取消"""
+        with self._lock:
+            row = self.conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def requeue_interrupted(self) -> int:
+        """
+        把上次服务退出时仍在运行的任务重新排队（被请求取消的直接标记为已取消）
+
+        Returns:
+            重新排队的任务数
+        """
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? "
+                "WHERE status = 'running' AND cancel_requested = 1", (time.time(),))
+            cursor = self.conn.execute("UPDATE jobs SET status = 'queued' WHERE status = 'running'")
+            return cursor.rowcount
+
+
+def _to_dict(row: sqlite3.Row) -> Dict:
+    """数据库行转换为 API 返回的字典"""
+    job = dict(row)
+    job['spec'] = json.loads(job['spec'])
+    job['cancel_requested'] = bool(job['cancel_requested'])
+    for key in ('progress', 'outputs', 'result'):
+        if job[key] is not None:
+            job[key] = json.loads(job[key])
+    return job
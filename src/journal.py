@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger('AudioProcessor')
+
+# 日志文件名（前缀由输出目录决定），分片运行时每个分片各写一份，避免多个节点追加同一文件
+JOURNAL_PATTERN = '{key}.jsonl'
+SHARD_JOURNAL_PATTERN = '{key}.shard-{index}-of-{count}.jsonl'
+
+# 导出过程中使用的临时文件后缀
+PARTIAL_SUFFIX = '.partial'
+
+
+def default_journal_dir() -> Path:
+    """默认日志目录：与元数据索引相同的用户缓存目录"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home) / 'audio_processor' / 'journals'
+
+
+def _journal_key(output_dir: Path) -> str:
+    """由输出目录的绝对路径得到日志文件名前缀"""
+    return hashlib.sha1(str(Path(output_dir).resolve()).encode('utf-8')).hexdigest()[:16]
+
+
+def journal_path(journal_dir: Path, output_dir: Path, shard: Optional[Tuple[int, int]] = None) -> Path:
+    """本次运行的日志文件路径"""
+    key = _journal_key(output_dir)
+    if shard:
+        return Path(journal_dir) / SHARD_JOURNAL_PATTERN.format(key=key, index=shard[0], count=shard[1])
+    return Path(journal_dir) / JOURNAL_PATTERN.format(key=key)
+
+
+def partial_path(output_path: Path) -> Path:
+    """导出时先写入的临时文件路径，完成后原子重命名为 output_path"""
+    return output_path.with_name(output_path.name + PARTIAL_SUFFIX)
+
+
+def load_completed(journal_dir: Path, output_dir: Path) -> Dict[str, Dict]:
+    """
+    读取同一输出目录的所有日志（包括各分片的日志），返回已完成的组
+
+    崩溃时最后一行可能只写了一半，无法解析的行会被忽略。
+
+    Returns:
+        输出文件名到完成记录的映射
+    """
+    completed = {}
+    for path in sorted(Path(journal_dir).glob(f"{_journal_key(output_dir)}*.jsonl")):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"忽略日志 {path.name} 中不完整的记录")
+                    continue
+                completed[record['output_name']] = record
+    return completed
+
+
+class RunJournal:
+    """
+    预写日志：每导出完成一组追加一行 JSON 并 fsync
+
+    只有输出文件已经原子重命名到最终位置后才写入记录，
+    因此日志中的每一项都对应一个完整的输出文件。
+    """
+
+    def __init__(self, path: Path, resume: bool = False):
+        """
+        打开日志
+
+        Args:
+            path: 日志文件路径
+            resume: 为 True 时在已有日志后追加，否则清空重新记录
+        """
+        self.path = Path(path)
+        os.makedirs(self.path.parent, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a' if resume else 'w', encoding='utf-8')
+        # 上次中断时最后一行可能没有写完，另起一行，避免新记录与之连在一起
+        if resume and self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def record(self, output_path: Path, group_index: int, mode: str):
+        """
+        记录一组已完成
+
+        Args:
+            output_path: 最终输出文件路径
+            group_index: 组在计划中的序号
+            mode: 导出方式，stream_copy、native_wav 或 reencode
+        """
+        entry = {
+            'output_name': output_path.name,
+            'group': group_index,
+            'size': output_path.stat().st_size,
+            'mode': mode,
+            'finished_at': time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """关闭日志"""
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict
+
+from .probe import AudioMetadata
+from .planner import GroupPlan, MergeGroup
+
+logger = logging.getLogger('AudioProcessor')
+
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class Manifest:
+    """合并计划清单：分组、成员文件及其元数据、输出文件名"""
+    plan: GroupPlan
+    input_dir: Path
+    output_dir: Path
+    metadata: Dict[Path, AudioMetadata] = field(default_factory=dict)
+
+
+def save_manifest(manifest_path: str, manifest: Manifest):
+    """
+    把合并计划写成 JSON 文件（先写临时文件再原子替换）
+
+    Args:
+        manifest_path: 清单文件路径
+        manifest: 合并计划清单
+    """
+    plan = manifest.plan
+    groups = []
+    for group in plan.groups:
+        members = []
+        for file_path, duration in group.members:
+            member = {'path': str(file_path), 'duration_ms': duration}
+            metadata = manifest.metadata.get(file_path)
+            if metadata is not None:
+                member['metadata'] = asdict(metadata)
+            members.append(member)
+        groups.append({
+            'index': group.index,
+            'output_name': group.output_name,
+            'format': Path(group.output_name or group.paths[-1].name).suffix.lstrip('.'),
+            'duration_ms': group.duration_ms,
+            'members': members,
+        })
+
+    data = {
+        'version': MANIFEST_VERSION,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'input_dir': str(manifest.input_dir),
+        'output_dir': str(manifest.output_dir),
+        'strategy': plan.strategy,
+        'min_duration_ms': plan.min_duration_ms,
+        'expected_outputs': plan.expected_outputs,
+        'total_overshoot_ms': plan.total_overshoot_ms,
+        'groups': groups,
+    }
+
+    manifest_path = Path(manifest_path)
+    os.makedirs(manifest_path.parent, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    logger.info(f"已写出合并计划: {manifest_path} ({plan.expected_outputs} 组)")
+
+
+def load_manifest(manifest_path: str) -> Manifest:
+    """
+    读取合并计划清单
+
+    Args:
+        manifest_path: 清单文件路径
+
+    Returns:
+        合并计划清单
+
+    Raises:
+        ValueError: 清单版本不受支持
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if data.get('version') != MANIFEST_VERSION:
+        raise ValueError(f"不支持的清单版本: {data.get('version')}")
+
+    metadata = {}
+    groups = []
+    for entry in data['groups']:
+        members = []
+        for member in entry['members']:
+            file_path = Path(member['path'])
+            members.append((file_path, int(member['duration_ms'])))
+            if 'metadata' in member:
+                metadata[file_path] = AudioMetadata(**member['metadata'])
+        groups.append(MergeGroup(index=int(entry['index']), members=members,
+                                 output_name=entry.get('output_name')))
+
+    plan = GroupPlan(strategy=data['strategy'], min_duration_ms=int(data['min_duration_ms']), groups=groups)
+    return Manifest(
+        plan=plan,
+        input_dir=Path(data['input_dir']),
+        output_dir=Path(data['output_dir']),
+        metadata=metadata,
+    )
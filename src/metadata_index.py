@@ -0,0 +1,218 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from .probe import AudioMetadata
+
+logger = logging.getLogger('AudioProcessor')
+
+# 计算内容指纹时读取的文件首尾字节数
+_FINGERPRINT_BLOCK = 64 * 1024
+
+# 等待其他进程释放写锁的最长时间（秒）
+_BUSY_TIMEOUT_S = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_metadata (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    sample_rate INTEGER NOT NULL,
+    channels INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    sample_width INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audio_metadata_content ON audio_metadata (size, fingerprint)
+"""
+
+
+def default_index_path() -> Path:
+    """默认索引位置：用户缓存目录下的 SQLite 文件"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(cache_home) / 'audio_processor' / 'metadata.sqlite'
+
+
+def file_fingerprint(file_path: Path, size: int) -> str:
+    """根据文件大小与首尾各 64KB 内容计算指纹"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode())
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(_FINGERPRINT_BLOCK))
+        if size > 2 * _FINGERPRINT_BLOCK:
+            f.seek(-_FINGERPRINT_BLOCK, os.SEEK_END)
+            digest.update(f.read(_FINGERPRINT_BLOCK))
+    return digest.hexdigest()
+
+
+class MetadataIndex:
+    """
+    持久化的音频元数据索引，以 (路径, 大小, mtime_ns) 为键
+
+    键不匹配时（文件被 touch 或改名）再按 (大小, 内容指纹) 查找，
+    只有索引中存在同样大小的记录时才读取文件首尾计算指纹。
+    """
+
+    def __init__(self, db_path: str):
+        """
+        打开（或创建）索引文件
+
+        Args:
+            db_path: SQLite 文件路径
+        """
+        self.db_path = Path(db_path)
+        os.makedirs(self.db_path.parent, exist_ok=True)
+
+        # WAL 模式允许读写并发，busy timeout 让多个进程排队等待写锁
+        self.conn = sqlite3.connect(str(self.db_path), timeout=_BUSY_TIMEOUT_S)
+        self.conn.execute(f"PRAGMA busy_timeout = {int(_BUSY_TIMEOUT_S * 1000)}")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def lookup(self, file_path: Path, stat: os.stat_result) -> Optional[AudioMetadata]:
+        """
+        查询未变化文件的元数据
+
+        Args:
+            file_path: 音频文件路径
+            stat: 文件的 stat 结果
+
+        Returns:
+            元数据；文件不在索引中或大小/修改时间已变化时返回 None
+        """
+        row = self.conn.execute(
+            "SELECT duration_ms, sample_rate, channels, codec, sample_width, source "
+            "FROM audio_metadata WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (_key(file_path), stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return AudioMetadata(
+            duration_ms=row[0],
+            sample_rate=row[1],
+            channels=row[2],
+            codec=row[3],
+            sample_width=row[4],
+            source=row[5],
+        )
+
+    def lookup_content(self, file_path: Path, stat: os.stat_result) -> Optional[Tuple[AudioMetadata, str]]:
+        """
+        lookup 未命中后按内容查找：修改时间或路径变化但内容指纹相同的文件沿用原记录
+
+        Returns:
+            (元数据, 内容指纹)；没有内容相同的记录时返回 None
+        """
+        if self.conn.execute("SELECT 1 FROM audio_metadata WHERE size = ? LIMIT 1",
+                             (stat.st_size,)).fetchone() is None:
+            return None
+        fingerprint = file_fingerprint(file_path, stat.st_size)
+        row = self.conn.execute(
+            "SELECT duration_ms, sample_rate, channels, codec, sample_width, source "
+            "FROM audio_metadata WHERE size = ? AND fingerprint = ? LIMIT 1",
+            (stat.st_size, fingerprint),
+        ).fetchone()
+        if row is None:
+            return None
+
+        # lookup 已把该文件记为未命中
+        self.misses -= 1
+        self.hits += 1
+        metadata = AudioMetadata(
+            duration_ms=row[0],
+            sample_rate=row[1],
+            channels=row[2],
+            codec=row[3],
+            sample_width=row[4],
+            source=row[5],
+        )
+        return metadata, fingerprint
+
+    def fingerprint(self, file_path: Path) -> Optional[str]:
+        """返回索引中记录的内容指纹"""
+        row = self.conn.execute(
+            "SELECT fingerprint FROM audio_metadata WHERE path = ?", (_key(file_path),)
+        ).fetchone()
+        return row[0] if row else None
+
+    def store_many(self, entries: Iterable[Tuple[Path, os.stat_result, AudioMetadata, str]]):
+        """
+        在一个事务内写入多条记录，已存在的记录会被替换
+
+        Args:
+            entries: (文件路径, stat 结果, 元数据, 内容指纹) 的序列
+        """
+        now = time.time()
+        rows = [
+            (_key(path), stat.st_size, stat.st_mtime_ns, m.duration_ms, m.sample_rate,
+             m.channels, m.codec, m.sample_width, m.source, fingerprint, now)
+            for path, stat, m, fingerprint in entries
+        ]
+        if not rows:
+            return
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO audio_metadata VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def invalidate(self, paths: Iterable[Path]) -> int:
+        """删除指定文件的记录，返回删除条数"""
+        with self.conn:
+            cursor = self.conn.executemany(
+                "DELETE FROM audio_metadata WHERE path = ?", [(_key(p),) for p in paths]
+            )
+        return cursor.rowcount
+
+    def clear(self, directory: Optional[Path] = None) -> int:
+        """
+        清空索引
+
+        Args:
+            directory: 仅清除该目录下的记录；为 None 时清除全部
+
+        Returns:
+            删除的记录条数
+        """
+        with self.conn:
+            if directory is None:
+                cursor = self.conn.execute("DELETE FROM audio_metadata")
+            else:
+                prefix = _key(directory).rstrip(os.sep) + os.sep
+                cursor = self.conn.execute(
+                    "DELETE FROM audio_metadata WHERE substr(path, 1, ?) = ?",
+                    (len(prefix), prefix),
+                )
+        logger.info(f"已清除 {cursor.rowcount} 条索引记录")
+        return cursor.rowcount
+
+
+def _key(file_path: Path) -> str:
+    """索引键使用绝对路径"""
+    return os.path.abspath(str(file_path))
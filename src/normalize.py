@@ -0,0 +1,133 @@
+import logging
+from typing import Iterable, Optional, Tuple
+
+from pydub import AudioSegment
+
+from .probe import AudioMetadata
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop
+
+try:
+    import numpy as np
+except ImportError:  # 没有 NumPy 时多声道互转退回 pydub
+    np = None
+
+logger = logging.getLogger('AudioProcessor')
+
+# (frame_rate, sample_width, channels)
+PcmFormat = Tuple[int, int, int]
+
+# 未知位宽（压缩格式）时按 16 位处理，与 pydub 解码压缩格式的默认输出一致
+DEFAULT_SAMPLE_WIDTH = 2
+
+
+def segment_format(segment: AudioSegment) -> PcmFormat:
+    """音频段的 (采样率, 位宽, 声道数)"""
+    return segment.frame_rate, segment.sample_width, segment.channels
+
+
+def target_format(metadata: Iterable[Optional[AudioMetadata]]) -> Optional[PcmFormat]:
+    """
+    由组内成员的探测元数据预先确定整组的目标格式
+
+    与 pydub 的拼接规则一致，取采样率、位宽、声道数中的较大者；
+    任何成员缺少采样率或声道数时返回 None，由拼接时遇到的格式决定。
+    """
+    frame_rate = sample_width = channels = 0
+    for m in metadata:
+        if m is None or m.sample_rate <= 0 or m.channels <= 0:
+            return None
+        frame_rate = max(frame_rate, m.sample_rate)
+        sample_width = max(sample_width, m.sample_width or DEFAULT_SAMPLE_WIDTH)
+        channels = max(channels, m.channels)
+    if not frame_rate:
+        return None
+    return frame_rate, sample_width, channels
+
+
+def normalize(segment: AudioSegment, target: PcmFormat) -> AudioSegment:
+    """
+    把音频一次性转换到目标格式
+
+    与 pydub 一样用 audioop 混合声道、重采样（ratecv）与转换位宽，结果逐字节相同，
+    但直接在字节串上依次转换，不为每一步构造 AudioSegment；
+    pydub 不支持的多声道互转（例如 6 声道混为立体声）由 NumPy 完成。
+    """
+    if segment_format(segment) == target:
+        return segment
+    if np is None and _needs_numpy(segment.channels, target[2]):
+        return _normalize_pydub(segment, target)
+    return _normalize_bytes(segment, target)
+
+
+def _normalize_pydub(segment: AudioSegment, target: PcmFormat) -> AudioSegment:
+    frame_rate, sample_width, channels = target
+    if segment.channels != channels:
+        segment = segment.set_channels(channels)
+    if segment.frame_rate != frame_rate:
+        segment = segment.set_frame_rate(frame_rate)
+    if segment.sample_width != sample_width:
+        segment = segment.set_sample_width(sample_width)
+    return segment
+
+
+def _needs_numpy(src_channels: int, dst_channels: int) -> bool:
+    """audioop 只能在单声道与立体声之间转换"""
+    current = 1 if dst_channels < src_channels else src_channels
+    return (dst_channels < src_channels != 2) or (current != dst_channels and (current, dst_channels) != (1, 2))
+
+
+def _normalize_bytes(segment: AudioSegment, target: PcmFormat) -> AudioSegment:
+    frame_rate, sample_width, channels = target
+    data = segment.raw_data
+    width = segment.sample_width
+    current = segment.channels
+
+    # 与 pydub 的顺序相同：减少声道时先混合，重采样只处理较少的声道，增加声道放在最后
+    if channels < current:
+        data = audioop.tomono(data, width, 0.5, 0.5) if current == 2 else \
+            _to_bytes(_mix_down(_to_ints(data, width, current)), width)
+        current = 1
+    if frame_rate != segment.frame_rate:
+        data = audioop.ratecv(data, width, current, segment.frame_rate, frame_rate, None)[0]
+    if width != sample_width:
+        data = audioop.lin2lin(data, width, sample_width)
+    if current != channels:
+        if current == 1 and channels == 2:
+            data = audioop.tostereo(data, sample_width, 1, 1)
+        else:
+            samples = _mix_down(_to_ints(data, sample_width, current))
+            data = _to_bytes(np.repeat(samples, channels, axis=1), sample_width)
+
+    return AudioSegment(data=data, sample_width=sample_width, frame_rate=frame_rate, channels=channels)
+
+
+def _to_ints(data: bytes, sample_width: int, channels: int):
+    """把交织的整数 PCM 转成 (帧数, 声道数) 的 int32 数组（8 位按 pydub 的存储方式为有符号数）"""
+    if sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        samples = np.empty((raw.shape[0], 4), dtype=np.uint8)
+        samples[:, 0] = 0
+        samples[:, 1:] = raw
+        # 放在高 24 位后算术右移，得到带符号的 24 位值
+        samples = samples.view('<i4').reshape(-1) >> 8
+    else:
+        samples = np.frombuffer(data, dtype={1: np.int8, 2: '<i2', 4: '<i4'}[sample_width]).astype(np.int32)
+    return samples.reshape(-1, channels)
+
+
+def _to_bytes(samples, sample_width: int) -> bytes:
+    """把整数数组交织成指定位宽的 PCM"""
+    if sample_width == 3:
+        return samples.astype('<i4').reshape(-1).view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+    return samples.astype({1: np.int8, 2: '<i2', 4: '<i4'}[sample_width]).tobytes()
+
+
+def _mix_down(samples):
+    """多声道取平均（向下取整）混为单声道"""
+    if samples.shape[1] == 1:
+        return samples
+    return (samples.sum(axis=1, dtype=np.int64, keepdims=True) // samples.shape[1]).astype(np.int32)
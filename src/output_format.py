@@ -0,0 +1,137 @@
+import logging
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .stream_copy import CONTAINER_FORMATS
+
+logger = logging.getLogger('AudioProcessor')
+
+# 格式名 -> (文件后缀, ffmpeg 默认编码器)，封装格式名由后缀经 CONTAINER_FORMATS 得到
+OUTPUT_FORMATS = {
+    'wav': ('.wav', None),
+    'flac': ('.flac', 'flac'),
+    'mp3': ('.mp3', 'libmp3lame'),
+    'ogg': ('.ogg', 'libvorbis'),
+    'opus': ('.opus', 'libopus'),
+    'm4a': ('.m4a', 'aac'),
+    'aac': ('.aac', 'aac'),
+}
+
+# 补充 stream_copy 未覆盖的封装格式
+_EXTRA_CONTAINERS = {'.opus': 'opus'}
+
+
+@dataclass(frozen=True)
+class OutputFormat:
+    """输出格式与编码参数，未设置的参数使用 ffmpeg 的默认值"""
+    name: str
+    suffix: str
+    codec: Optional[str] = None
+    bitrate: Optional[str] = None  # 例如 '192k'
+    quality: Optional[str] = None  # 编码器的 -q:a 取值，含义因编码器而异
+    compression_level: Optional[int] = None  # FLAC 等无损编码的压缩级别
+    threads: int = 0  # 编码线程数，0 表示由 ffmpeg 决定
+
+    @property
+    def container(self) -> str:
+        """ffmpeg 的封装格式名"""
+        return container_for(self.suffix)
+
+    def encoder_args(self) -> List[str]:
+        """传给 ffmpeg 的编码参数（写在输出文件之前）"""
+        args = []
+        if self.codec:
+            args += ['-c:a', self.codec]
+        if self.bitrate:
+            args += ['-b:a', self.bitrate]
+        if self.quality is not None:
+            args += ['-q:a', str(self.quality)]
+        if self.compression_level is not None:
+            args += ['-compression_level', str(self.compression_level)]
+        if self.threads:
+            args += ['-threads', str(self.threads)]
+        return args
+
+    def export_kwargs(self) -> Dict:
+        """传给 AudioSegment.export 的参数；WAV 没有编码参数时由 pydub 直接写出"""
+        kwargs = {'format': self.container}
+        if self.codec:
+            kwargs['codec'] = self.codec
+        if self.bitrate:
+            kwargs['bitrate'] = self.bitrate
+        parameters = self.encoder_args()
+        # codec 与 bitrate 已由 pydub 自己传递
+        for flag in ('-c:a', '-b:a'):
+            if flag in parameters:
+                i = parameters.index(flag)
+                del parameters[i:i + 2]
+        if parameters:
+            kwargs['parameters'] = parameters
+        return kwargs
+
+
+# 命名预设：按部署场景在编码速度、体积与音质之间取舍
+PRESETS = {
+    'fast-lossless': OutputFormat('flac', '.flac', codec='flac', compression_level=0),
+    'archive': OutputFormat('flac', '.flac', codec='flac', compression_level=8),
+    'mp3-vbr': OutputFormat('mp3', '.mp3', codec='libmp3lame', quality='2'),
+    'compact': OutputFormat('opus', '.opus', codec='libopus', bitrate='64k'),
+}
+
+
+def container_for(suffix: str) -> str:
+    """文件后缀对应的 ffmpeg 封装格式名（.m4a -> ipod, .aac -> adts）"""
+    suffix = suffix.lower()
+    return CONTAINER_FORMATS.get(suffix) or _EXTRA_CONTAINERS.get(suffix) or suffix.lstrip('.')
+
+
+def resolve_output_format(name: Optional[str] = None, preset: Optional[str] = None,
+                          bitrate: Optional[str] = None, quality: Optional[str] = None,
+                          threads: int = 0) -> Optional[OutputFormat]:
+    """
+    由格式名、预设与单项参数组合出输出格式，单项参数覆盖预设
+
+    Args:
+        name: 格式名（见 OUTPUT_FORMATS）
+        preset: 预设名（见 PRESETS）
+        bitrate: 码率，例如 '192k'
+        quality: 编码器的 -q:a 取值
+        threads: 编码线程数
+
+    Returns:
+        输出格式；都未指定时返回 None，表示沿用组内最后一个文件的格式
+
+    Raises:
+        ValueError: 格式名或预设名未知，或格式与预设冲突
+    """
+    if name is None and preset is None:
+        if bitrate or quality is not None or threads:
+            raise ValueError("设置码率、质量或编码线程时需要同时指定输出格式或预设")
+        return None
+
+    if preset is not None:
+        if preset not in PRESETS:
+            raise ValueError(f"未知的预设: {preset}（可选: {', '.join(PRESETS)}）")
+        output_format = PRESETS[preset]
+        if name is not None and name != output_format.name:
+            raise ValueError(f"预设 {preset} 的输出格式是 {output_format.name}，与 {name} 冲突")
+    else:
+        if name not in OUTPUT_FORMATS:
+            raise ValueError(f"未知的输出格式: {name}（可选: {', '.join(OUTPUT_FORMATS)}）")
+        suffix, codec = OUTPUT_FORMATS[name]
+        output_format = OutputFormat(name, suffix, codec=codec)
+
+    overrides = {}
+    if bitrate:
+        overrides['bitrate'] = bitrate
+    if quality is not None:
+        overrides['quality'] = str(quality)
+    if threads:
+        overrides['threads'] = threads
+    return replace(output_format, **overrides) if overrides else output_format
+
+
+def output_suffix(output_format: Optional[OutputFormat], last_input: Path) -> str:
+    """输出文件后缀：指定了输出格式时使用该格式，否则沿用组内最后一个文件的后缀"""
+    return output_format.suffix if output_format is not None else last_input.suffix
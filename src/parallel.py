@@ -0,0 +1,87 @@
+import os
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+from pydub import AudioSegment
+
+from .probe import AudioMetadata, probe_audio
+from .metadata_index import file_fingerprint
+
+logger = logging.getLogger('AudioProcessor')
+
+
+def resolve_jobs(jobs: int) -> int:
+    """将 jobs 参数转换为实际进程数，0 或负数表示使用全部 CPU"""
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def create_executor(jobs: int) -> Optional[Executor]:
+    """创建进程池，单进程时返回 None 以走串行路径"""
+    jobs = resolve_jobs(jobs)
+    if jobs == 1:
+        return None
+    logger.info(f"启用进程池: {jobs} 个进程")
+    return ProcessPoolExecutor(max_workers=jobs)
+
+
+def imap_ordered(fn: Callable, items: Iterable, executor: Optional[Executor] = None,
+                 window: int = 1) -> Iterator[Tuple[object, Future]]:
+    """
+    按输入顺序产出 (输入, Future)，保证结果顺序与串行执行一致
+
+    Args:
+        fn: 任务函数（使用进程池时必须可被 pickle）
+        items: 输入序列
+        executor: 进程池，为 None 时在当前进程中按需串行执行
+        window: 同时在途的最大任务数，用于限制内存占用
+
+    Yields:
+        (输入, 已提交或已完成的 Future)
+    """
+    if executor is None:
+        for item in items:
+            future = Future()
+            try:
+                future.set_result(fn(item))
+            except Exception as e:
+                future.set_exception(e)
+            yield item, future
+        return
+
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= max(window, 1):
+            yield pending.popleft()
+    while pending:
+        yield pending.popleft()
+
+
+def probe_file(file_path: Path,
+               with_fingerprint: bool = True) -> Tuple[AudioMetadata, Optional[str], Optional[AudioSegment]]:
+    """
+    在工作进程中分析单个文件
+
+    Args:
+        file_path: 音频文件路径
+        with_fingerprint: 是否计算内容指纹（仅写入索引时需要）
+
+    Returns:
+        (元数据, 内容指纹或 None, 兜底解码得到的音频或 None)
+    """
+    decoded = []
+    metadata = probe_audio(file_path, on_decode=lambda _, audio: decoded.append(audio))
+    fingerprint = None
+    if with_fingerprint:
+        fingerprint = file_fingerprint(file_path, os.path.getsize(file_path))
+    return metadata, fingerprint, decoded[0] if decoded else None
+
+
+def decode_file(file_path: Path) -> AudioSegment:
+    """在工作进程中解码单个文件"""
+    return AudioSegment.from_file(file_path)
@@ -0,0 +1,260 @@
+import queue
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from pydub import AudioSegment
+
+from .planner import MergeGroup
+from .accumulator import SegmentAccumulator
+from .profiling import StageTimer, ThreadProfiler
+from .streaming import StreamingExport
+
+logger = logging.getLogger('AudioProcessor')
+
+# 队列结束标记
+_DONE = object()
+
+
+class MergePipeline:
+    """
+    解码 → 拼接 → 编码 三级流水线
+
+    解码线程、拼接线程与编码线程之间通过有界队列连接，
+    编码第 N 组的同时可以解码第 N+1 组；队列满时上游阻塞（反压），
+    已解码但尚未拼接的文件数不超过 queue_size + decode_workers。
+
+    提供 open_stream 时，返回了 StreamingExport 的组不在内存中拼接：
+    拼接线程把每个成员直接写入导出器，编码线程只负责结束写入，
+    整组 PCM 不会同时驻留内存。
+    """
+
+    def __init__(self,
+                 decode: Callable[[Path], AudioSegment],
+                 export: Callable[[MergeGroup, AudioSegment], Optional[Path]],
+                 decode_workers: int = 2,
+                 encode_workers: int = 1,
+                 queue_size: int = 8,
+                 timer: Optional[StageTimer] = None,
+                 open_stream: Optional[Callable[[MergeGroup], Optional[StreamingExport]]] = None,
+                 finish_stream: Optional[Callable[[MergeGroup, StreamingExport], Optional[Path]]] = None,
+                 thread_profiler: Optional[ThreadProfiler] = None):
+        """
+        初始化流水线
+
+        Args:
+            decode: 解码单个文件的函数（会在多个线程中调用）
+            export: 导出一组拼接结果的函数，返回输出路径，失败时返回 None
+            decode_workers: 解码线程数
+            encode_workers: 编码线程数
+            queue_size: 每个队列的容量
+            timer: 阶段计时器，记录拼接耗时
+            open_stream: 组开始时调用，返回流式导出器表示该组改为边解码边写出，返回 None 则照常拼接
+            finish_stream: 结束一组流式导出的函数，返回输出路径，失败时返回 None
+            thread_profiler: 用 cProfile 分别分析各个线程
+        """
+        self.decode = decode
+        self.export = export
+        self.decode_workers = max(decode_workers, 1)
+        self.encode_workers = max(encode_workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.timer = timer or StageTimer()
+        self.open_stream = open_stream
+        self.finish_stream = finish_stream
+        self.thread_profiler = thread_profiler
+
+        self._decode_queue = queue.Queue(maxsize=self.queue_size)
+        self._decoded_queue = queue.Queue(maxsize=self.queue_size)
+        self._encode_queue = queue.Queue(maxsize=self.queue_size)
+        self._reorder_buffer: Dict[int, object] = {}
+        # 限制已解码但尚未拼接的文件数量
+        self._decoded_slots = threading.BoundedSemaphore(self.queue_size + self.decode_workers)
+
+        # 拼接线程意外退出后不再送入新的解码任务
+        self._aborted = threading.Event()
+        self._lock = threading.Lock()
+        self._outputs: List[Path] = []
+        self._max_depths = {name: 0 for name in self.queue_depths()}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """返回各级队列的当前深度"""
+        return {
+            'decode': self._decode_queue.qsize(),
+            'decoded': self._decoded_queue.qsize(),
+            'reorder': len(self._reorder_buffer),
+            'encode': self._encode_queue.qsize(),
+        }
+
+    def max_queue_depths(self) -> Dict[str, int]:
+        """返回运行期间各级队列的最大深度"""
+        return dict(self._max_depths)
+
+    def run(self, groups: List[MergeGroup]) -> List[Path]:
+        """
+        执行流水线
+
+        Args:
+            groups: 分组列表，组内成员按拼接顺序排列
+
+        Returns:
+            成功导出的输出文件路径（按完成顺序）
+        """
+        wrap = self.thread_profiler.wrap if self.thread_profiler is not None else (lambda target: target)
+        threads = [threading.Thread(target=wrap(self._feed), args=(groups,), name='pipeline-feed')]
+        threads += [
+            threading.Thread(target=wrap(self._decode_worker), name=f'pipeline-decode-{i}')
+            for i in range(self.decode_workers)
+        ]
+        threads.append(threading.Thread(target=wrap(self._assemble), args=(groups,), name='pipeline-assemble'))
+        threads += [
+            threading.Thread(target=wrap(self._encode_worker), name=f'pipeline-encode-{i}')
+            for i in range(self.encode_workers)
+        ]
+
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        logger.info(f"流水线队列最大深度: {self._max_depths}")
+        return self._outputs
+
+    def _sample_depths(self):
+        """记录队列深度峰值"""
+        for name, depth in self.queue_depths().items():
+            if depth > self._max_depths[name]:
+                self._max_depths[name] = depth
+
+    def _feed(self, groups: List[MergeGroup]):
+        """按拼接顺序把解码任务放入队列"""
+        paths = (file_path for group in groups for file_path in group.paths)
+        for seq, file_path in enumerate(paths):
+            self._decoded_slots.acquire()
+            if self._aborted.is_set():
+                break
+            self._decode_queue.put((seq, file_path))
+            self._sample_depths()
+        for _ in range(self.decode_workers):
+            self._decode_queue.put(_DONE)
+
+    def _decode_worker(self):
+        """解码线程：从任务队列取文件，解码后放入结果队列"""
+        while True:
+            task = self._decode_queue.get()
+            if task is _DONE:
+                self._decoded_queue.put(_DONE)
+                return
+            seq, file_path = task
+            try:
+                result = self.decode(file_path)
+            except Exception as e:
+                logger.error(f"处理音频 {file_path} 时出错: {str(e)}")
+                result = None
+            self._decoded_queue.put((seq, result))
+            self._sample_depths()
+
+    def _assemble(self, groups: List[MergeGroup]):
+        """拼接线程：按顺序把解码结果拼接成组，完整的组交给编码线程"""
+        group_iter = iter(groups)
+        group = next(group_iter, None)
+        remaining = len(group.members) if group else 0
+        accumulator = None
+        next_seq = 0
+        finished_decoders = 0
+        failed = False
+
+        try:
+            accumulator = self._new_sink(group)
+            while finished_decoders < self.decode_workers:
+                item = self._decoded_queue.get()
+                if item is _DONE:
+                    finished_decoders += 1
+                    continue
+                seq, result = item
+                self._reorder_buffer[seq] = result
+
+                while next_seq in self._reorder_buffer:
+                    audio = self._reorder_buffer.pop(next_seq)
+                    self._decoded_slots.release()
+                    next_seq += 1
+
+                    if audio is not None and not failed:
+                        stage = 'concat' if isinstance(accumulator, SegmentAccumulator) else 'encode'
+                        try:
+                            with self.timer.measure(stage, bytes=len(audio.raw_data)):
+                                accumulator.append(audio)
+                        except Exception as e:
+                            # 放弃该组，其余成员到达时直接丢弃
+                            logger.error(f"拼接第 {group.index + 1} 组时出错，跳过该组: {str(e)}")
+                            failed = True
+                    remaining -= 1
+
+                    if remaining == 0:
+                        if failed or accumulator.empty:
+                            if not failed:
+                                logger.warning(f"第 {group.index + 1} 组没有可用的音频，跳过")
+                            if isinstance(accumulator, StreamingExport):
+                                accumulator.abort()
+                        else:
+                            self._encode_queue.put((group, accumulator))
+                            self._sample_depths()
+                        group = next(group_iter, None)
+                        remaining = len(group.members) if group else 0
+                        accumulator = self._new_sink(group)
+                        failed = False
+        except Exception as e:
+            # 拼接线程意外退出：让送料线程停止，并继续取走解码结果直到各解码线程结束，
+            # 否则它们会阻塞在信号量或已满的队列上，run() 无法返回
+            logger.error(f"拼接线程出错，放弃剩余的组: {str(e)}")
+            self._aborted.set()
+            if isinstance(accumulator, StreamingExport):
+                accumulator.abort()
+            for _ in self._reorder_buffer:
+                self._decoded_slots.release()
+            self._reorder_buffer.clear()
+            while finished_decoders < self.decode_workers:
+                item = self._decoded_queue.get()
+                if item is _DONE:
+                    finished_decoders += 1
+                else:
+                    self._decoded_slots.release()
+        finally:
+            # 拼接线程意外退出时也要让编码线程结束，run() 才能返回
+            for _ in range(self.encode_workers):
+                self._encode_queue.put(_DONE)
+
+    def _encode_worker(self):
+        """编码线程：导出拼接好的组"""
+        while True:
+            item = self._encode_queue.get()
+            if item is _DONE:
+                return
+            group, accumulator = item
+            try:
+                if isinstance(accumulator, StreamingExport):
+                    output_path = self.finish_stream(group, accumulator)
+                else:
+                    # 在导出时才一次性拼接整组数据
+                    with self.timer.measure('concat', count=0):
+                        segment = accumulator.to_segment()
+                    output_path = self.export(group, segment)
+            except Exception as e:
+                logger.error(f"导出第 {group.index + 1} 组时出错: {str(e)}")
+                output_path = None
+            if output_path is not None:
+                with self._lock:
+                    self._outputs.append(output_path)
+
+    def _new_sink(self, group: Optional[MergeGroup]):
+        """为一组创建拼接器，需要流式导出时创建导出器"""
+        if group is not None and self.open_stream is not None:
+            try:
+                stream = self.open_stream(group)
+            except Exception as e:
+                logger.warning(f"第 {group.index + 1} 组无法流式导出，改为内存拼接: {str(e)}")
+                stream = None
+            if stream is not None:
+                return stream
+        return SegmentAccumulator()
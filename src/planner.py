@@ -0,0 +1,276 @@
+import heapq
+import hashlib
+import logging
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger('AudioProcessor')
+
+# 可选的分组策略
+STRATEGIES = ('greedy', 'ffd', 'balanced')
+
+
+@dataclass
+class MergeGroup:
+    """一个输出文件对应的输入文件组"""
+    index: int
+    members: List[Tuple[Path, int]] = field(default_factory=list)
+    output_name: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> int:
+        """组内文件探测时长之和"""
+        return sum(duration for _, duration in self.members)
+
+    @property
+    def paths(self) -> List[Path]:
+        """组内文件路径（按拼接顺序）"""
+        return [path for path, _ in self.members]
+
+
+@dataclass
+class GroupPlan:
+    """分组计划及其统计信息"""
+    strategy: str
+    min_duration_ms: int
+    groups: List[MergeGroup]
+
+    @property
+    def expected_outputs(self) -> int:
+        """预计输出文件数"""
+        return len(self.groups)
+
+    @property
+    def total_overshoot_ms(self) -> int:
+        """所有组超出最小时长的部分之和"""
+        return sum(max(0, g.duration_ms - self.min_duration_ms) for g in self.groups)
+
+    @property
+    def undersized(self) -> int:
+        """时长不足最小时长的组数"""
+        return sum(1 for g in self.groups if g.duration_ms < self.min_duration_ms)
+
+    def summary(self) -> str:
+        """一行计划摘要"""
+        return (f"分组计划({self.strategy}): 预计输出 {self.expected_outputs} 个文件, "
+                f"总超出时长 {self.total_overshoot_ms/1000:.1f}秒, 不足最小时长 {self.undersized} 组")
+
+
+def output_name(member_names: List[str], duration_ms: int, suffix: str,
+                used: Optional[set] = None) -> str:
+    """
+    由组内成员名称的哈希生成输出文件名，同一组在任何节点上都得到相同的名称
+
+    Args:
+        member_names: 成员名称（按拼接顺序，通常是相对于输入目录的路径）
+        duration_ms: 组的探测时长
+        suffix: 输出文件后缀
+        used: 已使用的名称，冲突时加长哈希
+    """
+    digest = hashlib.sha1('\n'.join(member_names).encode('utf-8')).hexdigest()
+    length = 8
+    while True:
+        name = f"merged_{digest[:length]}_{duration_ms/1000:.1f}s{suffix}"
+        if not used or name not in used or length >= len(digest):
+            return name
+        length += 4
+
+
+def plan_groups(audio_info: List[Tuple[Path, int]], min_duration_ms: int,
+                strategy: str = 'greedy') -> GroupPlan:
+    """
+    只根据探测时长规划分组，不加载任何音频
+
+    Args:
+        audio_info: 包含(文件路径, 时长)的列表（已按时长从短到长排序）
+        min_duration_ms: 最小音频时长（毫秒）
+        strategy: greedy（原有的从短到长依次累加）、ffd（以最小时长为容量首次适应递减装箱）
+            或 balanced（每组以最长文件开头，用恰好能补足差额的最短文件收尾）
+
+    Returns:
+        分组计划
+    """
+    if strategy == 'greedy':
+        groups = greedy_groups(audio_info, min_duration_ms)
+    elif strategy == 'ffd':
+        groups = ffd_groups(audio_info, min_duration_ms)
+    elif strategy == 'balanced':
+        groups = balanced_groups(audio_info, min_duration_ms)
+    else:
+        raise ValueError(f"未知的分组策略: {strategy}")
+
+    plan = GroupPlan(strategy=strategy, min_duration_ms=min_duration_ms, groups=groups)
+    logger.info(plan.summary())
+    return plan
+
+
+def greedy_groups(audio_info: List[Tuple[Path, int]], min_duration_ms: int) -> List[MergeGroup]:
+    """
+    按给定顺序依次累加，达到最小时长即切分为一组，剩余部分单独成组
+
+    Args:
+        audio_info: 包含(文件路径, 时长)的列表
+        min_duration_ms: 最小音频时长（毫秒）
+
+    Returns:
+        分组列表
+    """
+    groups = []
+    current = MergeGroup(index=0)
+    current_duration = 0
+
+    for file_path, duration in audio_info:
+        current.members.append((file_path, duration))
+        current_duration += duration
+        if current_duration >= min_duration_ms:
+            groups.append(current)
+            current = MergeGroup(index=len(groups))
+            current_duration = 0
+
+    if current.members:
+        groups.append(current)
+
+    return groups
+
+
+def ffd_groups(audio_info: List[Tuple[Path, int]], min_duration_ms: int) -> List[MergeGroup]:
+    """
+    首次适应递减：以最小时长为箱子容量，从长到短把每个文件放入第一个放得下（不超出）的箱子
+
+    没有箱子放得下时新开一个箱子；恰好装满的箱子不再放入文件。装箱结束后仍不足最小时长的
+    箱子按顺序合并成组，最后仍不足的部分逐个并入当前总时长最短的组。
+    用线段树维护各箱子的剩余容量以查找第一个放得下的箱子，复杂度 O(n log n)。
+    """
+    items = sorted(audio_info, key=lambda x: x[1], reverse=True)
+    size = 1
+    while size < max(len(items), 1):
+        size *= 2
+    # 线段树叶子为各箱子的剩余容量（未开的箱子为 -1），内部节点为子树最大值
+    gaps = [-1] * (2 * size)
+
+    def set_gap(i, gap):
+        i += size
+        gaps[i] = gap
+        while i > 1:
+            i //= 2
+            gaps[i] = max(gaps[2 * i], gaps[2 * i + 1])
+
+    def first_fit(duration):
+        if gaps[1] < duration:
+            return None
+        i = 1
+        while i < size:
+            i = 2 * i if gaps[2 * i] >= duration else 2 * i + 1
+        return i - size
+
+    bins = []
+    for item in items:
+        i = first_fit(item[1])
+        if i is None:
+            i = len(bins)
+            bins.append([0, []])
+        bins[i][0] += item[1]
+        bins[i][1].append(item)
+        # 装满的箱子剩余容量记为 -1，不再放入文件
+        gap = min_duration_ms - bins[i][0]
+        set_gap(i, gap if gap > 0 else -1)
+
+    groups = [b for b in bins if b[0] >= min_duration_ms]
+    current = [0, []]
+    for total, members in (b for b in bins if b[0] < min_duration_ms):
+        current[0] += total
+        current[1].extend(members)
+        if current[0] >= min_duration_ms:
+            groups.append(current)
+            current = [0, []]
+    if current[1]:
+        _merge_leftover(groups, current)
+
+    return _to_groups([members for _, members in groups])
+
+
+def balanced_groups(audio_info: List[Tuple[Path, int]], min_duration_ms: int) -> List[MergeGroup]:
+    """
+    尽量减少超出时长的分组
+
+    每组先放入剩余最长的文件，然后反复选择“刚好能补足差额的最短文件”；
+    若没有文件能一次补足，则放入剩余最长的文件继续。
+    最后不足最小时长的文件逐个并入当前总时长最短的组。
+    使用并查集维护“下一个未使用的位置”，总体复杂度 O(n log n)。
+    """
+    items = sorted(audio_info, key=lambda x: x[1])
+    durations = [duration for _, duration in items]
+    n = len(items)
+
+    # next_free[i]: i 及其右侧第一个未使用的位置（n 表示不存在）
+    next_free = list(range(n + 1))
+    # prev_free[i + 1]: i 及其左侧第一个未使用的位置加一（0 表示不存在）
+    prev_free = list(range(n + 1))
+
+    def find(parent, i):
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def take(i):
+        next_free[i] = i + 1
+        prev_free[i + 1] = i
+        return items[i]
+
+    def largest():
+        return find(prev_free, n) - 1
+
+    bins = []
+    remaining = n
+    while remaining:
+        current = [take(largest())]
+        remaining -= 1
+        total = current[0][1]
+
+        while total < min_duration_ms and remaining:
+            gap = min_duration_ms - total
+            k = find(next_free, bisect_left(durations, gap))
+            if k >= n:
+                k = largest()
+            current.append(take(k))
+            remaining -= 1
+            total += durations[k]
+
+        bins.append((total, current))
+
+    if len(bins) > 1 and bins[-1][0] < min_duration_ms:
+        _merge_leftover(bins, bins.pop())
+
+    return _to_groups([members for _, members in bins])
+
+
+def _merge_leftover(bins: List, leftover: List):
+    """
+    把不足最小时长的剩余文件逐个并入当前总时长最短的组；没有其他组时剩余文件单独成组
+
+    Args:
+        bins: [(总时长, 成员列表)] 形式的各组，成员列表会被原地修改
+        leftover: 剩余部分的 (总时长, 成员列表)
+    """
+    if not bins:
+        bins.append(leftover)
+        return
+    heap = [(total, i) for i, (total, _) in enumerate(bins)]
+    heapq.heapify(heap)
+    for item in leftover[1]:
+        total, i = heapq.heappop(heap)
+        bins[i][1].append(item)
+        heapq.heappush(heap, (total + item[1], i))
+
+
+def _to_groups(bins: List[List[Tuple[Path, int]]]) -> List[MergeGroup]:
+    """组内按时长从短到长排列，保持原有的拼接顺序习惯"""
+    return [
+        MergeGroup(index=i, members=sorted(members, key=lambda x: x[1]))
+        for i, members in enumerate(bins)
+    ]
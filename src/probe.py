@@ -0,0 +1,417 @@
+import json
+import logging
+import struct
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional
+
+from pydub import AudioSegment
+from pydub.utils import get_prober_name
+
+logger = logging.getLogger('AudioProcessor')
+
+# 读取文件尾部用于查找最后一个 Ogg 页的字节数
+_OGG_TAIL_BYTES = 64 * 1024
+
+# MP3 帧头查找范围（跳过 ID3 之后）
+_MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class AudioMetadata:
+    """音频元数据（时长、采样率、声道数、编码）"""
+    duration_ms: int
+    sample_rate: int
+    channels: int
+    codec: str
+    sample_width: int = 0  # 每个采样的字节数，0 表示未知（压缩格式）
+    source: str = 'header'  # 元数据来源: header / ffprobe / decode
+
+
+class ProbeError(Exception):
+    """无法从文件头解析元数据"""
+
+
+def probe_audio(file_path: Path,
+                on_decode: Optional[Callable[[Path, AudioSegment], None]] = None) -> AudioMetadata:
+    """
+    获取音频元数据，优先解析文件头，其次调用一次 ffprobe，最后才完整解码
+
+    Args:
+        file_path: 音频文件路径
+        on_decode: 不得不完整解码时，用解码结果回调（供合并阶段复用）
+
+    Returns:
+        音频元数据
+    """
+    file_path = Path(file_path)
+
+    try:
+        return probe_header(file_path)
+    except (ProbeError, OSError, struct.error) as e:
+        logger.debug(f"文件头解析失败 {file_path.name}: {str(e)}")
+
+    try:
+        return probe_ffprobe(file_path)
+    except (ProbeError, OSError, ValueError, subprocess.SubprocessError) as e:
+        logger.debug(f"ffprobe 解析失败 {file_path.name}: {str(e)}")
+
+    return probe_decode(file_path, on_decode)
+
+
+def probe_header(file_path: Path) -> AudioMetadata:
+    """根据文件头魔数选择原生解析器"""
+    with open(file_path, 'rb') as f:
+        return probe_stream(f)
+
+
+def probe_stream(f: BinaryIO) -> AudioMetadata:
+    """
+    解析已打开的可随机访问的二进制流（文件或 BytesIO）的文件头
+
+    Raises:
+        ProbeError: 无法识别或解析文件头
+    """
+    f.seek(0)
+    head = f.read(12)
+    f.seek(0)
+    if head[:4] in (b'RIFF', b'RIFX') and head[8:12] == b'WAVE':
+        return _probe_wav(f)
+    if head[:4] == b'OggS':
+        return _probe_ogg(f)
+
+    offset = _skip_id3v2(f)
+    f.seek(offset)
+    magic = f.read(4)
+    f.seek(offset)
+    if magic == b'fLaC':
+        return _probe_flac(f)
+    if len(magic) >= 2 and magic[0] == 0xFF and (magic[1] & 0xE0) == 0xE0:
+        return _probe_mp3(f, offset)
+
+    raise ProbeError("未知的文件头")
+
+
+def probe_ffprobe(file_path: Path) -> AudioMetadata:
+    """调用一次 ffprobe 读取容器信息"""
+    prober = get_prober_name()
+    command = [
+        prober, '-v', 'error',
+        '-select_streams', 'a:0',
+        '-show_entries', 'stream=codec_name,sample_rate,channels,duration,bits_per_sample:format=duration',
+        '-of', 'json',
+        str(file_path),
+    ]
+    result = subprocess.run(command, capture_output=True, check=True)
+    info = json.loads(result.stdout.decode('utf-8', 'ignore') or '{}')
+
+    streams = info.get('streams') or []
+    if not streams:
+        raise ProbeError("ffprobe 未返回音频流")
+    stream = streams[0]
+
+    duration = stream.get('duration') or info.get('format', {}).get('duration')
+    if duration in (None, 'N/A'):
+        raise ProbeError("ffprobe 未返回时长")
+
+    bits = int(stream.get('bits_per_sample') or 0)
+    return AudioMetadata(
+        duration_ms=round(float(duration) * 1000),
+        sample_rate=int(stream.get('sample_rate') or 0),
+        channels=int(stream.get('channels') or 0),
+        codec=stream.get('codec_name') or 'unknown',
+        sample_width=bits // 8,
+        source='ffprobe',
+    )
+
+
+def probe_decode(file_path: Path,
+                 on_decode: Optional[Callable[[Path, AudioSegment], None]] = None) -> AudioMetadata:
+    """最后的兜底方案：完整解码音频"""
+    audio = AudioSegment.from_file(file_path)
+    if on_decode is not None:
+        on_decode(file_path, audio)
+    return AudioMetadata(
+        duration_ms=len(audio),
+        sample_rate=audio.frame_rate,
+        channels=audio.channels,
+        codec='pcm',
+        sample_width=audio.sample_width,
+        source='decode',
+    )
+
+
+def _duration_ms(samples: int, sample_rate: int) -> int:
+    """与 pydub 的 len() 保持一致的取整方式"""
+    return round(1000 * (samples / sample_rate))
+
+
+def _skip_id3v2(f) -> int:
+    """跳过 ID3v2 标签，返回音频数据起始偏移"""
+    header = f.read(10)
+    if len(header) == 10 and header[:3] == b'ID3':
+        size = (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        footer = 10 if header[5] & 0x10 else 0
+        return 10 + size + footer
+    return 0
+
+
+def _probe_wav(f) -> AudioMetadata:
+    """解析 WAV 的 fmt 与 data 块"""
+    riff = f.read(12)
+    endian = '>' if riff[:4] == b'RIFX' else '<'
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(12)
+
+    fmt = None
+    while True:
+        chunk_header = f.read(8)
+        if len(chunk_header) < 8:
+            break
+        chunk_id = chunk_header[:4]
+        chunk_size = struct.unpack(endian + 'I', chunk_header[4:])[0]
+
+        if chunk_id == b'fmt ':
+            fmt = f.read(chunk_size)
+            if chunk_size % 2:
+                f.seek(1, 1)
+            continue
+
+        if chunk_id == b'data':
+            if fmt is None:
+                raise ProbeError("WAV 缺少 fmt 块")
+            audio_format, channels, sample_rate, _, block_align, bits = struct.unpack(
+                endian + 'HHIIHH', fmt[:16]
+            )
+            if audio_format == 0xFFFE and len(fmt) >= 26:
+                audio_format = struct.unpack(endian + 'H', fmt[24:26])[0]
+            if not block_align or not sample_rate:
+                raise ProbeError("WAV fmt 块无效")
+
+            # 流式写入的 WAV 经常带有错误的 data 长度，按实际文件大小截断
+            data_size = min(chunk_size, file_size - f.tell())
+            codec = {1: 'pcm', 3: 'pcm_float'}.get(audio_format, f'wav_{audio_format:#x}')
+            return AudioMetadata(
+                duration_ms=_duration_ms(data_size // block_align, sample_rate),
+                sample_rate=sample_rate,
+                channels=channels,
+                codec=codec,
+                sample_width=bits // 8,
+            )
+
+        f.seek(chunk_size + (chunk_size % 2), 1)
+
+    raise ProbeError("WAV 缺少 data 块")
+
+
+def _probe_flac(f) -> AudioMetadata:
+    """解析 FLAC 的 STREAMINFO 元数据块"""
+    f.read(4)
+    block_header = f.read(4)
+    if len(block_header) < 4 or (block_header[0] & 0x7F) != 0:
+        raise ProbeError("FLAC 缺少 STREAMINFO")
+    info = f.read(34)
+    if len(info) < 34:
+        raise ProbeError("FLAC STREAMINFO 截断")
+
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        raise ProbeError("FLAC 未记录总采样数")
+
+    return AudioMetadata(
+        duration_ms=_duration_ms(total_samples, sample_rate),
+        sample_rate=sample_rate,
+        channels=channels,
+        codec='flac',
+        sample_width=(bits + 7) // 8,
+    )
+
+
+def _probe_ogg(f) -> AudioMetadata:
+    """解析 Ogg 首页的识别头与末页的 granule position"""
+    page = f.read(27)
+    if len(page) < 27:
+        raise ProbeError("Ogg 页头截断")
+    segment_count = page[26]
+    f.read(segment_count)
+    packet = f.read(64)
+
+    if packet[:7] == b'\x01vorbis':
+        if len(packet) < 16:
+            raise ProbeError("Vorbis 识别头截断")
+        channels = packet[11]
+        sample_rate = struct.unpack('<I', packet[12:16])[0]
+        granule_rate, pre_skip, codec = sample_rate, 0, 'vorbis'
+    elif packet[:8] == b'OpusHead':
+        if len(packet) < 12:
+            raise ProbeError("OpusHead 截断")
+        channels = packet[9]
+        pre_skip = struct.unpack('<H', packet[10:12])[0]
+        # OpusHead 中的采样率只是编码前的输入采样率，Opus 总是解码为 48kHz
+        sample_rate = granule_rate = 48000
+        codec = 'opus'
+    else:
+        raise ProbeError("不支持的 Ogg 编码")
+
+    granule = _last_ogg_granule(f)
+    if granule is None or not granule_rate:
+        raise ProbeError("Ogg 未找到末页")
+
+    return AudioMetadata(
+        duration_ms=_duration_ms(max(granule - pre_skip, 0), granule_rate),
+        sample_rate=sample_rate,
+        channels=channels,
+        codec=codec,
+    )
+
+
+def _last_ogg_granule(f) -> Optional[int]:
+    """从文件尾部查找最后一个 Ogg 页的 granule position"""
+    f.seek(0, 2)
+    size = f.tell()
+    f.seek(max(0, size - _OGG_TAIL_BYTES))
+    tail = f.read()
+    pos = tail.rfind(b'OggS')
+    while pos != -1:
+        if pos + 14 <= len(tail):
+            granule = struct.unpack('<q', tail[pos + 6:pos + 14])[0]
+            if granule >= 0:
+                return granule
+        pos = tail.rfind(b'OggS', 0, pos)
+    return None
+
+
+# MPEG 版本索引: 0 -> MPEG 2.5, 2 -> MPEG 2, 3 -> MPEG 1
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+_MP3_BITRATES = {
+    # (MPEG1?, layer) -> kbps 表
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+
+def _probe_mp3(f, offset: int) -> AudioMetadata:
+    """解析 MP3 帧头，优先使用 Xing/Info/VBRI 头中的帧数"""
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(offset)
+    data = f.read(_MP3_SYNC_SEARCH_BYTES)
+
+    # 层标记为 00 的同步字是 ADTS（AAC），交给 ffprobe
+    if len(data) >= 2 and (data[1] & 0x06) == 0:
+        raise ProbeError("ADTS 不是 MPEG 音频")
+
+    at_eof = offset + len(data) >= file_size
+    pos = 0
+    while pos + 4 <= len(data):
+        if data[pos] == 0xFF and (data[pos + 1] & 0xE0) == 0xE0:
+            header = _parse_mp3_header(data[pos:pos + 4])
+            if header is not None and _mp3_next_frame_matches(data, pos, header, at_eof):
+                break
+        pos += 1
+    else:
+        raise ProbeError("未找到 MP3 帧头")
+
+    version, layer, bitrate_kbps, sample_rate, channels = header
+    mpeg1 = version == 3
+    if layer == 1:
+        samples_per_frame = 384
+    elif layer == 3 and not mpeg1:
+        samples_per_frame = 576
+    else:
+        samples_per_frame = 1152
+
+    frame = data[pos:pos + 200]
+    frame_count = None
+
+    # Xing/Info 头位于边信息之后
+    if mpeg1:
+        side_info = 17 if channels == 1 else 32
+    else:
+        side_info = 9 if channels == 1 else 17
+    xing = 4 + side_info
+    if frame[xing:xing + 4] in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', frame[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            frame_count = struct.unpack('>I', frame[xing + 8:xing + 12])[0]
+    elif frame[36:40] == b'VBRI':
+        frame_count = struct.unpack('>I', frame[50:54])[0]
+
+    if frame_count:
+        duration_ms = _duration_ms(frame_count * samples_per_frame, sample_rate)
+    else:
+        # CBR：按码率估算，去掉 ID3v1 尾部
+        f.seek(max(0, file_size - 128))
+        tail_tag = 128 if f.read(3) == b'TAG' else 0
+        audio_bytes = file_size - (offset + pos) - tail_tag
+        if not bitrate_kbps:
+            raise ProbeError("MP3 自由码率无法估算时长")
+        duration_ms = round(audio_bytes * 8 / bitrate_kbps)
+
+    return AudioMetadata(
+        duration_ms=duration_ms,
+        sample_rate=sample_rate,
+        channels=channels,
+        codec='mp3' if layer == 3 else f'mp{layer}',
+    )
+
+
+def _parse_mp3_header(header: bytes):
+    """解析 4 字节 MPEG 音频帧头，无效时返回 None"""
+    b1, b2, b3 = header[1], header[2], header[3]
+    version = (b1 >> 3) & 0x3
+    layer_bits = (b1 >> 1) & 0x3
+    bitrate_index = (b2 >> 4) & 0xF
+    rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer_bits == 0 or bitrate_index == 0xF or rate_index == 3:
+        return None
+
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(version == 3, layer)][bitrate_index]
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    channels = 1 if (b3 >> 6) == 3 else 2
+    return version, layer, bitrate, sample_rate, channels
+
+
+def _mp3_frame_length(header: bytes, version: int, layer: int, bitrate_kbps: int, sample_rate: int) -> int:
+    """MPEG 音频帧的字节数（含帧头）"""
+    padding = (header[2] >> 1) & 0x1
+    if layer == 1:
+        return (12000 * bitrate_kbps // sample_rate + padding) * 4
+    coefficient = 72 if layer == 3 and version != 3 else 144
+    return coefficient * 1000 * bitrate_kbps // sample_rate + padding
+
+
+def _mp3_next_frame_matches(data: bytes, pos: int, header, at_eof: bool) -> bool:
+    """
+    下一帧位置上也是同一版本、层与采样率的帧头时才认为找到了帧
+
+    避免把其他格式（或 ID3 之后的填充）中偶然出现的同步字当作 MP3 帧头。
+    """
+    version, layer, bitrate_kbps, sample_rate, _ = header
+    if not bitrate_kbps:
+        return False  # 自由码率无法定位下一帧
+    next_pos = pos + _mp3_frame_length(data[pos:pos + 4], version, layer, bitrate_kbps, sample_rate)
+    following = data[next_pos:next_pos + 4]
+    if len(following) < 4:
+        return at_eof and next_pos >= len(data)
+    if following[:3] == b'TAG':
+        return True
+    if following[0] != 0xFF or (following[1] & 0xE0) != 0xE0:
+        return False
+    next_header = _parse_mp3_header(following)
+    return next_header is not None and next_header[:2] == (version, layer) and next_header[3] == sample_rate
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('AudioProcessor')
+
+# 报告中各阶段的顺序
+STAGE_ORDER = ('scan', 'index', 'probe', 'plan', 'execute', 'decode', 'normalize', 'concat', 'encode', 'stream_copy', 'splice', 'ffmpeg', 'commit')
+
+
+class _Measurement:
+    """一次计时，退出时把耗时、数量和字节数累加到 StageTimer"""
+    __slots__ = ('timer', 'stage', 'count', 'bytes', '_start')
+
+    def __init__(self, timer: 'StageTimer', stage: str, count: int, bytes: int):
+        self.timer = timer
+        self.stage = stage
+        self.count = count
+        self.bytes = bytes
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.stage, time.perf_counter() - self._start, self.count, self.bytes)
+        return False
+
+
+class _NullMeasurement:
+    """禁用时使用的共享空对象，进入退出都不做任何事，属性赋值也无副作用"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_MEASUREMENT = _NullMeasurement()
+
+
+class StageTimer:
+    """
+    按阶段累计耗时、调用次数与处理字节数
+
+    解码、拼接、编码在多个线程中并行执行，这些阶段的 seconds 是各线程耗时之和，
+    可能大于整个运行的墙钟时间；execute 记录执行阶段的墙钟时间。
+    禁用时 measure 返回共享的空对象，开销只有一次属性判断。
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._start = time.perf_counter()
+
+    def measure(self, stage: str, count: int = 1, bytes: int = 0):
+        """
+        计时上下文，可在 with 块内修改返回对象的 count 和 bytes
+
+        Args:
+            stage: 阶段名
+            count: 处理的条目数
+            bytes: 处理的字节数
+        """
+        if not self.enabled:
+            return _NULL_MEASUREMENT
+        return _Measurement(self, stage, count, bytes)
+
+    def add(self, stage: str, seconds: float, count: int = 1, bytes: int = 0):
+        """直接累加一次测量结果"""
+        if not self.enabled:
+            return
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = {'seconds': 0.0, 'calls': 0, 'count': 0, 'bytes': 0}
+            entry['seconds'] += seconds
+            entry['calls'] += 1
+            entry['count'] += count
+            entry['bytes'] += bytes
+
+    def reset(self):
+        """清空所有测量结果"""
+        with self._lock:
+            self._stages = {}
+            self._start = time.perf_counter()
+
+    def report(self) -> Dict:
+        """
+        生成各阶段的耗时报告
+
+        Returns:
+            包含 wall_s 与按 STAGE_ORDER 排列的 stages 的字典
+        """
+        with self._lock:
+            stages = {name: dict(entry) for name, entry in self._stages.items()}
+            wall_s = time.perf_counter() - self._start
+
+        ordered = {}
+        for name in sorted(stages, key=lambda n: (STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER), n)):
+            entry = stages[name]
+            seconds = entry['seconds']
+            entry['seconds'] = round(seconds, 6)
+            entry['mean_ms'] = round(seconds * 1000 / entry['calls'], 3) if entry['calls'] else 0.0
+            entry['mb_per_s'] = round(entry['bytes'] / (1024 * 1024) / seconds, 3) if seconds > 0 and entry['bytes'] else 0.0
+            ordered[name] = entry
+        return {'wall_s': round(wall_s, 6), 'stages': ordered}
+
+
+class ThreadProfiler:
+    """
+    为工作线程分别记录 cProfile 数据，结束后与主线程的结果合并
+
+    cProfile.Profile 只分析启用它的线程，解码、拼接、编码等工作线程需要各自的实例。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+
+    def wrap(self, target: Callable) -> Callable:
+        """包装线程入口函数，使其在本线程启用的 Profile 下运行"""
+        @functools.wraps(target)
+        def run(*args, **kwargs):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12 起同一时间只能启用一个 cProfile，已启用的那个会记录所有线程
+                return target(*args, **kwargs)
+            try:
+                return target(*args, **kwargs)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+        return run
+
+    def stats(self, *profiles: cProfile.Profile) -> Optional[pstats.Stats]:
+        """
+        合并给定的 Profile（例如主线程的）与各工作线程的结果
+
+        Returns:
+            合并后的 pstats.Stats；没有任何数据时返回 None
+        """
+        with self._lock:
+            profiles = [*profiles, *self._profiles]
+        merged = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if merged is None:
+                merged = pstats.Stats(profile)
+            else:
+                merged.add(profile)
+        return merged
+
+
+def write_profile(profile_path: str, report: Dict):
+    """把耗时报告写成 JSON 文件"""
+    profile_path = Path(profile_path)
+    os.makedirs(profile_path.parent, exist_ok=True)
+    with open(profile_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"已写出耗时报告: {profile_path}")
@@ -0,0 +1,236 @@
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional
+
+logger = logging.getLogger('AudioProcessor')
+
+# 运行阶段
+STAGES = ('idle', 'scan', 'probe', 'plan', 'execute', 'done')
+
+# 事件类型
+EVENT_KINDS = ('stage', 'scan', 'probe', 'plan', 'decode', 'export', 'error')
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    一条进度事件
+
+    Attributes:
+        kind: 事件类型，见 EVENT_KINDS
+        path: 相关的文件（输入文件或输出文件）
+        count: 本事件代表的数量（例如 plan 事件的组数）
+        bytes: 解码的输入字节数
+        audio_ms: 本事件涉及的音频时长（毫秒）
+        message: stage 事件为阶段名，error 事件为错误信息
+    """
+    kind: str
+    path: Optional[Path] = None
+    count: int = 1
+    bytes: int = 0
+    audio_ms: int = 0
+    message: str = ''
+
+
+@dataclass(frozen=True)
+class ProgressSnapshot:
+    """某一时刻的累计进度"""
+    stage: str
+    files_scanned: int
+    files_to_probe: int
+    files_probed: int
+    groups_planned: int
+    groups_to_export: int
+    groups_exported: int
+    files_decoded: int
+    bytes_decoded: int
+    audio_ms_decoded: int
+    audio_ms_to_export: int
+    audio_ms_exported: int
+    errors: int
+    stage_elapsed_s: float
+    elapsed_s: float
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """当前阶段完成比例，无法估计时为 None"""
+        if self.stage == 'probe' and self.files_to_probe:
+            return min(self.files_probed / self.files_to_probe, 1.0)
+        if self.stage == 'execute' and self.audio_ms_to_export:
+            return min(self.audio_ms_exported / self.audio_ms_to_export, 1.0)
+        if self.stage == 'done':
+            return 1.0
+        return None
+
+    @property
+    def realtime_factor(self) -> float:
+        """执行阶段每秒导出的音频秒数（倍速）"""
+        if self.stage_elapsed_s <= 0:
+            return 0.0
+        return self.audio_ms_exported / 1000 / self.stage_elapsed_s
+
+    @property
+    def decode_mb_per_s(self) -> float:
+        """执行阶段的解码吞吐量（MB/秒）"""
+        if self.stage_elapsed_s <= 0:
+            return 0.0
+        return self.bytes_decoded / (1024 * 1024) / self.stage_elapsed_s
+
+    @property
+    def eta_s(self) -> Optional[float]:
+        """按当前阶段的平均速度估计的剩余时间（秒）"""
+        fraction = self.fraction
+        if not fraction or self.stage == 'done':
+            return None
+        return self.stage_elapsed_s * (1 - fraction) / fraction
+
+
+ProgressListener = Callable[[ProgressEvent, ProgressSnapshot], None]
+
+
+class ProgressTracker:
+    """
+    线程安全的进度统计与事件分发
+
+    没有监听器时 emit 只在锁内更新几个整数；有监听器时每个事件构造一次快照并同步调用监听器，
+    监听器应当只保存快照或做节流，不要在其中做耗时操作。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listeners: List[ProgressListener] = []
+        self.reset()
+
+    def reset(self):
+        """清零所有计数"""
+        with self._lock:
+            self._stage = 'idle'
+            self._counts = dict.fromkeys((
+                'files_scanned', 'files_to_probe', 'files_probed', 'groups_planned',
+                'groups_to_export', 'groups_exported', 'files_decoded', 'bytes_decoded',
+                'audio_ms_decoded', 'audio_ms_to_export', 'audio_ms_exported', 'errors',
+            ), 0)
+            self._start = time.monotonic()
+            self._stage_start = self._start
+
+    def add_listener(self, listener: ProgressListener):
+        """注册监听器"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: ProgressListener):
+        """移除监听器"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def start_stage(self, stage: str, total: int = 0, audio_ms: int = 0):
+        """
+        进入新阶段
+
+        Args:
+            stage: 阶段名，见 STAGES
+            total: probe 阶段为待分析文件数，execute 阶段为待导出组数
+            audio_ms: execute 阶段待导出的音频总时长
+        """
+        with self._lock:
+            self._stage = stage
+            self._stage_start = time.monotonic()
+            if stage == 'probe':
+                self._counts['files_to_probe'] = total
+                self._counts['files_probed'] = 0
+            elif stage == 'execute':
+                self._counts['groups_to_export'] = total
+                self._counts['audio_ms_to_export'] = audio_ms
+                for key in ('groups_exported', 'files_decoded', 'bytes_decoded',
+                            'audio_ms_decoded', 'audio_ms_exported'):
+                    self._counts[key] = 0
+        self._dispatch(ProgressEvent('stage', count=total, audio_ms=audio_ms, message=stage))
+
+    def emit(self, kind: str, path: Optional[Path] = None, count: int = 1, bytes: int = 0,
+             audio_ms: int = 0, message: str = ''):
+        """
+        记录一个事件（可在任意线程调用）
+
+        Args:
+            kind: 事件类型，见 EVENT_KINDS
+            path: 相关文件
+            count: 数量
+            bytes: 解码的输入字节数
+            audio_ms: 涉及的音频时长（毫秒）
+            message: 错误信息
+        """
+        with self._lock:
+            counts = self._counts
+            if kind == 'scan':
+                counts['files_scanned'] += count
+            elif kind == 'probe':
+                counts['files_probed'] += count
+            elif kind == 'plan':
+                counts['groups_planned'] += count
+            elif kind == 'decode':
+                counts['files_decoded'] += count
+                counts['bytes_decoded'] += bytes
+                counts['audio_ms_decoded'] += audio_ms
+            elif kind == 'export':
+                counts['groups_exported'] += count
+                counts['audio_ms_exported'] += audio_ms
+            elif kind == 'error':
+                counts['errors'] += count
+            else:
+                raise ValueError(f"未知的事件类型: {kind}")
+            if not self._listeners:
+                return
+        self._dispatch(ProgressEvent(kind, path, count, bytes, audio_ms, message))
+
+    def snapshot(self) -> ProgressSnapshot:
+        """当前累计进度"""
+        with self._lock:
+            return self._snapshot_locked()
+
+    def _snapshot_locked(self) -> ProgressSnapshot:
+        now = time.monotonic()
+        return ProgressSnapshot(stage=self._stage, stage_elapsed_s=now - self._stage_start,
+                                elapsed_s=now - self._start, **self._counts)
+
+    def _dispatch(self, event: ProgressEvent):
+        with self._lock:
+            if not self._listeners:
+                return
+            listeners = list(self._listeners)
+            snapshot = self._snapshot_locked()
+        for listener in listeners:
+            try:
+                listener(event, snapshot)
+            except Exception as e:
+                logger.debug(f"进度监听器出错: {str(e)}")
+
+
+def format_progress(snapshot: ProgressSnapshot) -> str:
+    """单行进度文本，供命令行和图形界面显示"""
+    if snapshot.stage == 'scan':
+        return f"扫描: {snapshot.files_scanned} 个文件"
+    if snapshot.stage == 'probe':
+        text = f"分析: {snapshot.files_probed}/{snapshot.files_to_probe}"
+    elif snapshot.stage == 'plan':
+        return f"分组: {snapshot.groups_planned} 组"
+    elif snapshot.stage == 'execute':
+        text = (f"导出: {snapshot.groups_exported}/{snapshot.groups_to_export} 组 | "
+                f"解码 {snapshot.bytes_decoded / (1024 * 1024):.1f}MB "
+                f"({snapshot.decode_mb_per_s:.1f}MB/s) | {snapshot.realtime_factor:.1f}x 实时")
+    elif snapshot.stage == 'done':
+        return (f"完成: {snapshot.groups_exported} 组, 用时 {snapshot.elapsed_s:.1f}秒"
+                + (f", 错误 {snapshot.errors}" if snapshot.errors else ""))
+    else:
+        return "就绪"
+
+    if snapshot.errors:
+        text += f" | 错误 {snapshot.errors}"
+    eta = snapshot.eta_s
+    if eta is not None:
+        minutes, seconds = divmod(int(eta), 60)
+        text += f" | 剩余 {minutes:02d}:{seconds:02d}"
+    return text
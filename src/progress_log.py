@@ -0,0 +1,46 @@
+import time
+import logging
+from typing import Optional
+
+logger = logging.getLogger('AudioProcessor')
+
+
+class ProgressLog:
+    """
+    按时间间隔汇总的进度日志
+
+    大批量处理时不逐个文件输出 INFO 日志，而是每隔 interval_s 秒输出一行
+    “已完成/总数”，结束时再输出一行；逐个文件的细节使用 DEBUG 级别。
+    """
+
+    def __init__(self, label: str, total: int, interval_s: float = 2.0,
+                 log: Optional[logging.Logger] = None):
+        """
+        初始化进度日志
+
+        Args:
+            label: 阶段名称，例如 "分析音频"
+            total: 总数
+            interval_s: 两行进度日志之间的最短间隔（秒）
+            log: 使用的 logger，默认 AudioProcessor
+        """
+        self.label = label
+        self.total = total
+        self.interval_s = interval_s
+        self.count = 0
+        self._log = log or logger
+        self._start = time.monotonic()
+        self._last = self._start
+
+    def step(self, n: int = 1):
+        """完成 n 个，距上次输出超过间隔时输出一行进度"""
+        self.count += n
+        now = time.monotonic()
+        if self.count >= self.total or now - self._last >= self.interval_s:
+            self._last = now
+            self._log.info(f"{self.label}: {self.count}/{self.total}")
+
+    def done(self):
+        """输出完成汇总"""
+        elapsed = time.monotonic() - self._start
+        self._log.info(f"{self.label}完成: {self.count}/{self.total}, 用时 {elapsed:.1f}秒")
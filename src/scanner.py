@@ -0,0 +1,110 @@
+import os
+import sys
+import logging
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence
+
+logger = logging.getLogger('AudioProcessor')
+
+
+def _matches(rel_path: str, name: str, patterns: Sequence[str]) -> bool:
+    """相对路径或文件名匹配任一通配符"""
+    return any(fnmatch(rel_path, p) or fnmatch(name, p) for p in patterns)
+
+
+def scan_audio_files(directory: Path, suffixes: Iterable[str], recursive: bool = False,
+                     include: Optional[Sequence[str]] = None,
+                     exclude: Optional[Sequence[str]] = None,
+                     skip_dirs: Iterable[Path] = ()) -> Iterator[Path]:
+    """
+    用 os.scandir 逐个产出目录中的音频文件
+
+    每个目录内按文件名排序（先产出文件，再进入子目录），因此结果顺序与文件系统无关；
+    DirEntry 自带文件类型，不需要为每个文件单独 stat。
+
+    Args:
+        directory: 扫描的目录
+        suffixes: 支持的文件后缀（小写，带点）
+        recursive: 是否进入子目录
+        include: 只保留相对路径或文件名匹配其中任一通配符的文件
+        exclude: 跳过相对路径或文件名匹配其中任一通配符的文件和目录
+        skip_dirs: 不进入的目录（例如位于输入目录内的输出目录）
+
+    Yields:
+        音频文件路径
+    """
+    suffixes = set(suffixes)
+    include = list(include or ())
+    exclude = list(exclude or ())
+    skip = {os.path.realpath(d) for d in skip_dirs}
+    stack = [(Path(directory), '')]
+
+    while stack:
+        current, prefix = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"无法读取目录 {current}: {str(e)}")
+            continue
+
+        subdirs = []
+        for entry in entries:
+            rel_path = prefix + entry.name
+            try:
+                if entry.is_dir():
+                    if (recursive and not _matches(rel_path, entry.name, exclude)
+                            and os.path.realpath(entry.path) not in skip):
+                        subdirs.append((Path(entry.path), rel_path + '/'))
+                    continue
+                if not entry.is_file():
+                    continue
+            except OSError:
+                continue
+
+            if os.path.splitext(entry.name)[1].lower() not in suffixes:
+                logger.debug(f"跳过不支持的文件: {rel_path}")
+                continue
+            if include and not _matches(rel_path, entry.name, include):
+                continue
+            if exclude and _matches(rel_path, entry.name, exclude):
+                continue
+            yield Path(entry.path)
+
+        # 倒序入栈，使子目录按名称顺序处理
+        stack.extend(reversed(subdirs))
+
+
+def read_file_list(source: str, suffixes: Iterable[str]) -> Iterator[Path]:
+    """
+    从文件（或 "-" 表示标准输入）逐行读取输入文件路径，不遍历任何目录
+
+    空行、以 # 开头的行和重复的路径会被忽略，相对路径相对于当前目录。
+
+    Args:
+        source: 列表文件路径，或 "-"
+        suffixes: 支持的文件后缀（小写，带点）
+
+    Yields:
+        音频文件路径
+    """
+    suffixes = set(suffixes)
+    seen = set()
+    stream = sys.stdin if source == '-' else open(source, 'r', encoding='utf-8')
+    try:
+        for line in stream:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = Path(line)
+            if path.suffix.lower() not in suffixes:
+                logger.debug(f"跳过不支持的文件: {path}")
+                continue
+            if path in seen:
+                continue
+            seen.add(path)
+            yield path
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .planner import MergeGroup
+
+logger = logging.getLogger('AudioProcessor')
+
+# 分片报告文件名格式（写在共享的输出目录下）
+REPORT_PATTERN = 'shard-{index}-of-{count}.report.json'
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    解析 K/N 形式的分片参数
+
+    Args:
+        spec: 分片参数，例如 "2/4" 表示共 4 个分片中的第 2 个（从 1 开始）
+
+    Returns:
+        (分片序号, 分片总数)
+
+    Raises:
+        ValueError: 格式不正确或序号越界
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"分片参数应为 K/N 形式: {spec}")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"分片序号应在 1 到 {count} 之间: {spec}")
+    return index, count
+
+
+def shard_groups(groups: List[MergeGroup], index: int, count: int) -> List[MergeGroup]:
+    """
+    选出属于第 index 个分片的组
+
+    按组在计划中的序号轮流分配，只要各节点使用同一份计划，
+    每个组都恰好属于一个分片。
+    """
+    return [group for group in groups if group.index % count == index - 1]
+
+
+def shard_report_path(output_dir: Path, index: int, count: int) -> Path:
+    """分片报告文件路径"""
+    return Path(output_dir) / REPORT_PATTERN.format(index=index, count=count)
+
+
+def write_shard_report(report_path: Path, report: Dict):
+    """
+    写出单个分片的运行报告（先写临时文件再原子替换）
+
+    Args:
+        report_path: 报告文件路径
+        report: 报告内容
+    """
+    report = dict(report, finished_at=time.strftime('%Y-%m-%dT%H:%M:%S%z'))
+    tmp_path = report_path.with_name(report_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, report_path)
+    logger.info(f"已写出分片报告: {report_path}")
+
+
+def merge_reports(report_paths: Iterable[Path]) -> Dict:
+    """
+    合并各分片的运行报告
+
+    Args:
+        report_paths: 分片报告文件路径
+
+    Returns:
+        合并后的报告，missing_shards 列出尚未产生报告的分片序号
+
+    Raises:
+        ValueError: 报告来自分片总数不同的运行
+    """
+    merged = {
+        'shard_count': None,
+        'shards': [],
+        'groups': 0,
+        'outputs': [],
+        'failed_groups': [],
+        'stream_copy': 0,
+        'reencode': 0,
+    }
+    for report_path in sorted(report_paths):
+        with open(report_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        if merged['shard_count'] is None:
+            merged['shard_count'] = report['shard_count']
+        elif report['shard_count'] != merged['shard_count']:
+            raise ValueError(f"分片总数不一致: {report_path}")
+        merged['shards'].append(report['shard_index'])
+        merged['groups'] += report['groups']
+        merged['outputs'].extend(report['outputs'])
+        merged['failed_groups'].extend(report['failed_groups'])
+        merged['stream_copy'] += report['stream_copy']
+        merged['reencode'] += report['reencode']
+
+    merged['shards'].sort()
+    merged['failed_groups'].sort()
+    count = merged['shard_count'] or 0
+    merged['missing_shards'] = [i for i in range(1, count + 1) if i not in merged['shards']]
+    return merged
+
+
+def find_shard_reports(output_dir: Path) -> List[Path]:
+    """列出输出目录下的所有分片报告"""
+    return sorted(Path(output_dir).glob(REPORT_PATTERN.format(index='*', count='*')))
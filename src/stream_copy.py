@@ -0,0 +1,82 @@
+import os
+import logging
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from pydub import AudioSegment
+
+from .probe import AudioMetadata
+
+logger = logging.getLogger('AudioProcessor')
+
+# 文件后缀到 ffmpeg 封装格式名的映射
+CONTAINER_FORMATS = {
+    '.mp3': 'mp3',
+    '.wav': 'wav',
+    '.flac': 'flac',
+    '.ogg': 'ogg',
+    '.m4a': 'ipod',
+    '.aac': 'adts',
+}
+
+
+def can_stream_copy(paths: List[Path], metadata: List[Optional[AudioMetadata]]) -> bool:
+    """
+    判断一组文件能否不重新编码直接拼接
+
+    要求所有文件后缀（封装格式）、编码、采样率、声道数与采样位宽都相同
+
+    Args:
+        paths: 组内文件路径
+        metadata: 与 paths 一一对应的探测元数据
+
+    Returns:
+        是否可以直接复制码流
+    """
+    if not paths or any(m is None for m in metadata):
+        return False
+
+    suffixes = {p.suffix.lower() for p in paths}
+    if len(suffixes) != 1 or next(iter(suffixes)) not in CONTAINER_FORMATS:
+        return False
+
+    signatures = {(m.codec, m.sample_rate, m.channels, m.sample_width) for m in metadata}
+    if len(signatures) != 1:
+        return False
+
+    codec, sample_rate, channels, _ = next(iter(signatures))
+    return codec != 'unknown' and sample_rate > 0 and channels > 0
+
+
+def concat_copy(paths: List[Path], output_path: Path, suffix: Optional[str] = None):
+    """
+    使用 ffmpeg concat demuxer 拼接文件，不解码也不重新编码
+
+    Args:
+        paths: 按拼接顺序排列的输入文件
+        output_path: 输出文件路径
+        suffix: 决定封装格式的后缀，为 None 时使用 output_path 的后缀（写入临时文件时传入最终文件的后缀）
+
+    Raises:
+        subprocess.CalledProcessError: ffmpeg 执行失败
+    """
+    container = CONTAINER_FORMATS[(suffix or output_path.suffix).lower()]
+
+    fd, list_path = tempfile.mkstemp(suffix='.txt', prefix='concat_')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for path in paths:
+                escaped = os.path.abspath(path).replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+
+        command = [
+            AudioSegment.converter, '-hide_banner', '-loglevel', 'error', '-y',
+            '-f', 'concat', '-safe', '0', '-i', list_path,
+            '-map', '0:a', '-c', 'copy',
+            '-f', container, str(output_path),
+        ]
+        subprocess.run(command, capture_output=True, check=True)
+    finally:
+        os.remove(list_path)
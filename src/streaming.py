@@ -0,0 +1,162 @@
+import wave
+import logging
+import subprocess
+from pathlib import Path
+from typing import List, Optional
+
+from pydub import AudioSegment
+
+try:
+    import audioop
+except ImportError:
+    import pyaudioop as audioop
+
+from .normalize import DEFAULT_SAMPLE_WIDTH, PcmFormat, normalize, segment_format
+from .output_format import container_for
+
+logger = logging.getLogger('AudioProcessor')
+
+# pydub 的 raw PCM 位宽与 ffmpeg 输入格式的对应关系（pydub 内部的 8 位采样是有符号数）
+_RAW_FORMATS = {1: 's8', 2: 's16le', 3: 's24le', 4: 's32le'}
+
+
+def estimate_pcm_bytes(duration_ms: int, pcm_format: Optional[PcmFormat]) -> int:
+    """估算一组解码后的 PCM 字节数，格式未知时按 48kHz 16 位立体声估算"""
+    frame_rate, sample_width, channels = pcm_format or (48000, DEFAULT_SAMPLE_WIDTH, 2)
+    return duration_ms * frame_rate // 1000 * sample_width * channels
+
+
+def wav_frames(data: bytes, sample_width: int) -> bytes:
+    """写入 WAV 的采样数据：8 位 WAV 是无符号数，与 AudioSegment.export 一样加上偏置"""
+    return audioop.bias(data, 1, 128) if sample_width == 1 else data
+
+
+def pcm_input_args(pcm_format: PcmFormat) -> List[str]:
+    """ffmpeg 从标准输入读取 raw PCM 的输入参数"""
+    frame_rate, sample_width, channels = pcm_format
+    return ['-f', _RAW_FORMATS[sample_width], '-ar', str(frame_rate), '-ac', str(channels), '-i', 'pipe:0']
+
+
+class StreamingExport:
+    """
+    边解码边写出的导出器
+
+    每个成员解码后立即转换到目标格式并写入打开的 WAV 文件或 ffmpeg 编码进程，
+    内存占用只与单个输入文件相当，与整组时长无关。
+    写入失败后忽略后续数据，在 finish 时抛出异常。
+    """
+
+    def __init__(self, output_path: Path, pcm_format: Optional[PcmFormat] = None,
+                 suffix: Optional[str] = None, encoder_args: Optional[List[str]] = None):
+        """
+        Args:
+            output_path: 写入的文件路径（通常是临时文件）
+            pcm_format: 目标 (采样率, 位宽, 声道数)，为 None 时使用第一段音频的格式
+            suffix: 决定输出格式的后缀，为 None 时使用 output_path 的后缀
+            encoder_args: 传给 ffmpeg 的编码参数（输出 WAV 时不使用）
+        """
+        self.output_path = Path(output_path)
+        suffix = (suffix or self.output_path.suffix).lower()
+        self.container = container_for(suffix)
+        self.encoder_args = list(encoder_args or [])
+        self.format = pcm_format
+        self.frame_count = 0
+        self.bytes_written = 0
+        self._wav = None
+        self._process = None
+        self._error: Optional[Exception] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.frame_count == 0
+
+    def __len__(self) -> int:
+        """已写入的时长（毫秒）"""
+        if self.format is None:
+            return 0
+        return round(1000 * self.frame_count / self.format[0])
+
+    def append(self, segment: AudioSegment):
+        """转换到目标格式并写入一段音频（与 SegmentAccumulator.append 接口一致）"""
+        if self._error is not None:
+            return
+        try:
+            if self.format is None:
+                self.format = segment_format(segment)
+            else:
+                segment = normalize(segment, self.format)
+            if self._wav is None and self._process is None:
+                self._open()
+            data = segment.raw_data
+            if self._wav is not None:
+                self._wav.writeframesraw(wav_frames(data, self.format[1]))
+            else:
+                self._process.stdin.write(data)
+            self.frame_count += int(segment.frame_count())
+            self.bytes_written += len(data)
+        except Exception as e:
+            logger.error(f"流式写入 {self.output_path.name} 失败: {str(e)}")
+            self._error = e
+
+    def finish(self):
+        """
+        结束写入并等待编码完成
+
+        Raises:
+            写入或编码过程中发生的错误
+        """
+        try:
+            if self._wav is not None:
+                # 关闭时按实际帧数回填文件头
+                self._wav.close()
+            elif self._process is not None:
+                self._process.stdin.close()
+                stderr = self._process.stderr.read()
+                if self._process.wait() != 0 and self._error is None:
+                    self._error = subprocess.CalledProcessError(
+                        self._process.returncode, self._process.args, stderr=stderr)
+        finally:
+            self._wav = None
+            self._process = None
+        if self._error is not None:
+            raise self._error
+        if self.empty:
+            raise ValueError("没有可导出的音频")
+
+    def abort(self):
+        """放弃写入，结束编码进程并删除已写出的部分文件"""
+        if self._wav is not None:
+            try:
+                self._wav.close()
+            except Exception:
+                pass
+        if self._process is not None:
+            self._process.kill()
+            try:
+                self._process.stdin.close()
+            except OSError:
+                pass
+            self._process.wait()
+        self._wav = None
+        self._process = None
+        if self.output_path.exists():
+            self.output_path.unlink()
+
+    def _open(self):
+        """按输出格式打开 WAV 写入器或 ffmpeg 编码进程"""
+        frame_rate, sample_width, channels = self.format
+        if self.container == 'wav':
+            self._wav = wave.open(str(self.output_path), 'wb')
+            self._wav.setnchannels(channels)
+            self._wav.setsampwidth(sample_width)
+            self._wav.setframerate(frame_rate)
+            return
+
+        command = [
+            AudioSegment.converter, '-hide_banner', '-loglevel', 'error', '-y',
+            *pcm_input_args(self.format),
+            *self.encoder_args,
+            '-f', self.container, str(self.output_path),
+        ]
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import errno
+import ctypes
+import ctypes.util
+import select
+import struct
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger('AudioProcessor')
+
+# inotify 事件：文件写完关闭、文件被移入目录
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_ISDIR = 0x40000000
+_EVENT_HEADER = struct.Struct('iIII')
+
+
+class _InotifyBackend:
+    """通过 libc 的 inotify 接口等待新文件（仅 Linux）"""
+
+    def __init__(self, directory: Path):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        if libc.inotify_add_watch(fd, os.fsencode(str(directory)), _IN_CLOSE_WRITE | _IN_MOVED_TO) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, os.strerror(err))
+        self._fd = fd
+
+    def poll(self, timeout: float) -> List[str]:
+        """等待至多 timeout 秒，返回写完或移入的文件名"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return []
+            raise
+
+        names = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if name and not mask & _IN_ISDIR:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _PollingBackend:
+    """
+    定期扫描目录
+
+    新文件在连续两次扫描中大小不变才会报告，避免读取仍在写入的文件。
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self._known = set(self._sizes())
+        self._candidates: Dict[str, int] = {}
+
+    def _sizes(self) -> Dict[str, int]:
+        sizes = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        sizes[entry.name] = entry.stat().st_size
+                except OSError:
+                    continue
+        return sizes
+
+    def poll(self, timeout: float) -> List[str]:
+        """睡眠 timeout 秒后扫描一次，返回大小已稳定的新文件名"""
+        time.sleep(timeout)
+        names = []
+        candidates = {}
+        for name, size in self._sizes().items():
+            if name in self._known:
+                continue
+            if self._candidates.get(name) == size:
+                self._known.add(name)
+                names.append(name)
+            else:
+                candidates[name] = size
+        self._candidates = candidates
+        return sorted(names)
+
+    def close(self):
+        pass
+
+
+class DirectoryWatcher:
+    """监视目录中新出现的音频文件，优先使用 inotify，不可用时退化为轮询"""
+
+    def __init__(self, directory: Path, suffixes: Iterable[str], poll_interval_s: float = 1.0,
+                 use_inotify: bool = True):
+        """
+        初始化监视器（启动前已存在的文件不会被报告）
+
+        Args:
+            directory: 监视的目录
+            suffixes: 关心的文件后缀（小写，带点）
+            poll_interval_s: 每次等待的最长时间（秒）
+            use_inotify: 是否尝试使用 inotify
+        """
+        self.directory = Path(directory)
+        self.suffixes = set(suffixes)
+        self.poll_interval_s = poll_interval_s
+        self._backend = None
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._backend = _InotifyBackend(self.directory)
+                logger.info(f"使用 inotify 监视目录: {self.directory}")
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify 不可用，改为轮询: {str(e)}")
+        if self._backend is None:
+            self._backend = _PollingBackend(self.directory)
+            logger.info(f"轮询监视目录: {self.directory} (间隔 {poll_interval_s} 秒)")
+
+    def wait(self, timeout: Optional[float] = None) -> List[Path]:
+        """
+        等待新文件
+
+        Args:
+            timeout: 最长等待时间（秒），默认使用 poll_interval_s
+
+        Returns:
+            新出现的音频文件（按出现顺序），超时时为空列表
+        """
+        timeout = self.poll_interval_s if timeout is None else timeout
+        paths = []
+        seen = set()
+        for name in self._backend.poll(timeout):
+            path = self.directory / name
+            if name in seen or path.suffix.lower() not in self.suffixes:
+                continue
+            seen.add(name)
+            paths.append(path)
+        return paths
+
+    def close(self):
+        """释放监视资源"""
+        self._backend.close()
@@ -0,0 +1,204 @@
+import os
+import mmap
+import errno
+import struct
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+logger = logging.getLogger('AudioProcessor')
+
+# WAVE_FORMAT_PCM 与 WAVE_FORMAT_EXTENSIBLE
+_FORMAT_PCM = 0x0001
+_FORMAT_EXTENSIBLE = 0xFFFE
+
+# 不支持零拷贝时回退到 mmap 写出的分块大小
+_FALLBACK_CHUNK = 8 * 1024 * 1024
+
+# 这些错误表示内核或文件系统不支持该拷贝方式，而不是文件本身有问题
+_UNSUPPORTED_ERRNOS = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+class SpliceError(Exception):
+    """无法用原生方式拼接 WAV 文件"""
+
+
+@dataclass(frozen=True)
+class WavLayout:
+    """PCM WAV 文件的格式与采样数据位置"""
+    path: Path
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    block_align: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def signature(self) -> Tuple[int, int, int, int]:
+        """决定能否直接拼接的格式参数"""
+        return self.channels, self.sample_rate, self.bits_per_sample, self.block_align
+
+
+def read_layout(file_path: Path) -> WavLayout:
+    """
+    映射文件并解析 fmt 与 data 块，只接受小端整数 PCM
+
+    Raises:
+        SpliceError: 不是可以直接拼接的 PCM WAV
+    """
+    file_path = Path(file_path)
+    with open(file_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        if file_size < 12:
+            raise SpliceError(f"{file_path.name} 不是 WAV 文件")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:4] != b'RIFF' or mm[8:12] != b'WAVE':
+                raise SpliceError(f"{file_path.name} 不是 RIFF WAV 文件")
+
+            fmt = None
+            pos = 12
+            while pos + 8 <= file_size:
+                chunk_id = mm[pos:pos + 4]
+                chunk_size = struct.unpack_from('<I', mm, pos + 4)[0]
+                body = pos + 8
+                if chunk_id == b'fmt ':
+                    fmt = mm[body:body + chunk_size]
+                elif chunk_id == b'data':
+                    return _layout(file_path, fmt, body, min(chunk_size, file_size - body))
+                pos = body + chunk_size + (chunk_size % 2)
+
+    raise SpliceError(f"{file_path.name} 缺少 data 块")
+
+
+def _layout(file_path: Path, fmt, data_offset: int, data_size: int) -> WavLayout:
+    """校验 fmt 块并生成 WavLayout"""
+    if fmt is None or len(fmt) < 16:
+        raise SpliceError(f"{file_path.name} 缺少有效的 fmt 块")
+    audio_format, channels, sample_rate, _, block_align, bits = struct.unpack_from('<HHIIHH', fmt)
+    if audio_format == _FORMAT_EXTENSIBLE and len(fmt) >= 26:
+        audio_format = struct.unpack_from('<H', fmt, 24)[0]
+    if audio_format != _FORMAT_PCM:
+        raise SpliceError(f"{file_path.name} 不是整数 PCM 编码")
+    if not channels or not sample_rate or bits not in (8, 16, 24, 32) or block_align != channels * bits // 8:
+        raise SpliceError(f"{file_path.name} 的 fmt 块无效")
+    # 流式写入的 WAV 经常带有错误的 data 长度，按实际文件大小截断到整帧
+    data_size -= data_size % block_align
+    return WavLayout(file_path, channels, sample_rate, bits, block_align, data_offset, data_size)
+
+
+def wav_header(channels: int, sample_rate: int, bits_per_sample: int, data_size: int) -> bytes:
+    """生成与 wave 模块（pydub 导出 WAV 时使用）相同的 44 字节文件头"""
+    block_align = channels * bits_per_sample // 8
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, _FORMAT_PCM, channels, sample_rate, sample_rate * block_align, block_align, bits_per_sample,
+        b'data', data_size,
+    )
+
+
+def compatible_layouts(paths: List[Path]) -> List[WavLayout]:
+    """
+    解析一组文件并确认格式一致
+
+    Raises:
+        SpliceError: 任一文件无法解析或格式与其他文件不同
+    """
+    layouts = [read_layout(p) for p in paths]
+    if not layouts:
+        raise SpliceError("没有可拼接的文件")
+    signatures = {layout.signature for layout in layouts}
+    if len(signatures) != 1:
+        raise SpliceError("组内 WAV 格式不一致")
+    if sum(layout.data_size for layout in layouts) + 36 > 0xFFFFFFFF:
+        raise SpliceError("拼接结果超过 WAV 的 4GB 上限")
+    return layouts
+
+
+def splice_wav(layouts: List[WavLayout], output_path: Path) -> int:
+    """
+    写出一个文件头，再把各文件的采样数据依次拼接到输出文件
+
+    优先使用 copy_file_range（同一文件系统上可由内核完成甚至共享数据块），
+    其次 sendfile，都不支持时才通过 mmap 写出；采样数据不会复制到 Python 对象中。
+
+    Args:
+        layouts: compatible_layouts 的结果，按拼接顺序排列
+        output_path: 输出文件路径
+
+    Returns:
+        写出的采样数据字节数
+    """
+    first = layouts[0]
+    data_size = sum(layout.data_size for layout in layouts)
+    header = wav_header(first.channels, first.sample_rate, first.bits_per_sample, data_size)
+
+    out_fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        _write_all(out_fd, header)
+        for layout in layouts:
+            in_fd = os.open(layout.path, os.O_RDONLY)
+            try:
+                _copy_range(in_fd, out_fd, layout.data_offset, layout.data_size)
+            finally:
+                os.close(in_fd)
+    finally:
+        os.close(out_fd)
+    return data_size
+
+
+def _write_all(fd: int, data) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _copy_range(in_fd: int, out_fd: int, offset: int, count: int):
+    """把 in_fd 中 [offset, offset + count) 的数据追加到 out_fd 的当前位置"""
+    if count == 0:
+        return
+    for copy in _ZERO_COPY:
+        try:
+            n = copy(in_fd, out_fd, offset, count)
+        except OSError as e:
+            # 只有第一次调用失败时才能换用其他方式，此时输出位置尚未移动
+            if e.errno not in _UNSUPPORTED_ERRNOS:
+                raise
+            logger.debug(f"零拷贝方式不可用，尝试下一种: {str(e)}")
+            continue
+        while True:
+            if n == 0:
+                raise SpliceError("输入文件在拼接过程中被截断")
+            offset += n
+            count -= n
+            if count == 0:
+                return
+            n = copy(in_fd, out_fd, offset, count)
+    _copy_mmap(in_fd, out_fd, offset, count)
+
+
+# 可用的零拷贝方式，参数统一为 (in_fd, out_fd, offset, count)，返回复制的字节数
+_ZERO_COPY = []
+if hasattr(os, 'copy_file_range'):
+    _ZERO_COPY.append(lambda in_fd, out_fd, offset, count: os.copy_file_range(in_fd, out_fd, count, offset))
+if hasattr(os, 'sendfile'):
+    _ZERO_COPY.append(lambda in_fd, out_fd, offset, count: os.sendfile(out_fd, in_fd, offset, count))
+
+
+def _copy_mmap(in_fd: int, out_fd: int, offset: int, count: int):
+    """映射输入文件并分块写出"""
+    if count == 0:
+        return
+    with mmap.mmap(in_fd, 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            end = offset + count
+            while offset < end:
+                chunk = min(_FALLBACK_CHUNK, end - offset)
+                with view[offset:offset + chunk] as part:
+                    _write_all(out_fd, part)
+                offset += chunk
+        finally:
+            view.release()
@@ -0,0 +1,48 @@
+import unittest
+from pydub import AudioSegment
+from pydub.generators import Sine
+from src.accumulator import SegmentAccumulator
+
+class TestSegmentAccumulator(unittest.TestCase):
+    """线性拼接器单元测试"""
+
+    def test_matches_pydub_concatenation(self):
+        """测试拼接结果与 AudioSegment += 完全一致"""
+        segments = [Sine(220 * (i + 1)).to_audio_segment(duration=300 + 50 * i) for i in range(5)]
+        expected = segments[0]
+        for segment in segments[1:]:
+            expected += segment
+
+        accumulator = SegmentAccumulator()
+        for segment in segments:
+            accumulator.append(segment)
+
+        self.assertEqual(len(accumulator), len(expected))
+        result = accumulator.to_segment()
+        self.assertEqual(result.raw_data, expected.raw_data)
+        self.assertEqual(result.frame_rate, expected.frame_rate)
+
+    def test_mixed_formats_upgrade_target(self):
+        """测试混合格式时统一到较大的采样率和声道数"""
+        mono = AudioSegment.silent(duration=500, frame_rate=8000)
+        stereo = AudioSegment.silent(duration=500, frame_rate=16000).set_channels(2)
+
+        accumulator = SegmentAccumulator()
+        accumulator.append(mono)
+        accumulator.append(stereo)
+        result = accumulator.to_segment()
+
+        self.assertEqual(result.frame_rate, 16000)
+        self.assertEqual(result.channels, 2)
+        self.assertEqual(len(result), 1000)
+
+    def test_empty_accumulator(self):
+        """测试空累积器不能导出"""
+        accumulator = SegmentAccumulator()
+        self.assertTrue(accumulator.empty)
+        with self.assertRaises(ValueError):
+            accumulator.to_segment()
+
+
+if __name__ == "__main__":
+    unittest.main()
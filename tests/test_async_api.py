@@ -0,0 +1,120 @@
+import os
+import time
+import asyncio
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+
+class TestAsyncApi(unittest.TestCase):
+    """asyncio 接口单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        self._create_inputs(self.input_dir)
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def _create_inputs(self, input_dir):
+        os.makedirs(input_dir)
+        for i in range(4):
+            AudioSegment.silent(duration=5000).export(input_dir / f"a{i}.wav", format="wav")
+
+    def test_process_async(self):
+        """测试异步处理与同步处理结果一致"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        self.assertEqual(asyncio.run(processor.process_async()), 2)
+        self.assertEqual(processor.report, {'stream_copy': 0, 'reencode': 2})
+        outputs = list(self.output_dir.iterdir())
+        self.assertEqual(len(outputs), 2)
+        for file_path in outputs:
+            self.assertEqual(len(AudioSegment.from_file(file_path)), 10000)
+
+    def test_groups_are_streamed(self):
+        """测试每完成一组就产出，产出时输出文件已就位"""
+        async def collect():
+            results = []
+            async for group, output_path in processor.iter_groups_async():
+                self.assertTrue(output_path.exists())
+                results.append((group.index, output_path))
+            return results
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        results = asyncio.run(collect())
+        self.assertEqual(sorted(i for i, _ in results), [0, 1])
+        self.assertEqual(sorted(p for _, p in results), sorted(processor.outputs))
+
+    def test_close_iterator_during_next_run(self):
+        """测试提前停止的迭代在之后才关闭时，不会关闭同一处理器下一次运行的进程池"""
+        async def overlap():
+            groups = processor.iter_groups_async()
+            await groups.__anext__()
+            run = asyncio.ensure_future(processor.process_async())
+            await asyncio.sleep(0)
+            await groups.aclose()
+            pools.append(processor._executor)
+            return await run
+
+        pools = []
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000, jobs=2)
+        self.assertEqual(asyncio.run(overlap()), 2)
+        self.assertIsNotNone(pools[0])
+        self.assertIsNone(processor._executor)
+
+    def test_processors_share_event_loop(self):
+        """测试多个处理器在同一事件循环中共享并发上限"""
+        other_input = self.temp_dir / "other_input"
+        other_output = self.temp_dir / "other_output"
+        self._create_inputs(other_input)
+
+        async def run_both():
+            limiter = asyncio.Semaphore(1)
+            return await asyncio.gather(
+                AudioProcessor(str(self.input_dir), str(self.output_dir),
+                               min_duration_ms=10000).process_async(limiter=limiter),
+                AudioProcessor(str(other_input), str(other_output),
+                               min_duration_ms=10000).process_async(limiter=limiter))
+
+        self.assertEqual(asyncio.run(run_both()), [2, 2])
+        self.assertEqual(len(list(other_output.iterdir())), 2)
+
+    def test_cancel_kills_ffmpeg(self):
+        """测试取消时终止 ffmpeg 进程并删除临时文件"""
+        pid_file = self.temp_dir / "pids"
+        converter = self.temp_dir / "fake_ffmpeg"
+        converter.write_text(f"#!/bin/sh\necho $$ >> {pid_file}\nexec sleep 30\n")
+        converter.chmod(0o755)
+
+        async def run_and_cancel():
+            task = asyncio.ensure_future(processor.process_async(concurrency=2))
+            deadline = time.monotonic() + 10
+            while not (pid_file.exists() and len(pid_file.read_text().split()) == 2):
+                self.assertLess(time.monotonic(), deadline)
+                await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   min_duration_ms=10000, ffmpeg_concat=True)
+        start = time.monotonic()
+        with mock.patch.object(AudioSegment, 'converter', str(converter)):
+            asyncio.run(run_and_cancel())
+        self.assertLess(time.monotonic() - start, 20)
+
+        for pid in map(int, pid_file.read_text().split()):
+            with self.assertRaises(ProcessLookupError):
+                os.kill(pid, 0)
+        self.assertEqual(list(self.output_dir.iterdir()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
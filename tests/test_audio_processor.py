@@ -107,7 +107,8 @@ class TestAudioProcessor(unittest.TestCase):
         processor = AudioProcessor(
             input_dir=str(self.input_dir),
             output_dir=str(self.output_dir),
-            min_duration_ms=15000  # 设置最小时长为15秒
+            min_duration_ms=15000,  # 设置最小时长为15秒
+            strategy='balanced'  # 默认的 greedy 会把不足最小时长的剩余部分单独输出
         )
         
         # 处理音频
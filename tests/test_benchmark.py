@@ -0,0 +1,86 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+import benchmark
+from generate_corpus import file_spec, generate_corpus
+
+
+def _crash(corpus_dir, options, result_queue):
+    os._exit(3)
+
+
+class TestBenchmark(unittest.TestCase):
+    """基准测试工具单元测试"""
+
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def _baseline(self, **metrics):
+        return {'results': {'100': metrics}}
+
+    def test_ffmpeg_processes_is_exact_limit(self):
+        """测试 ffmpeg 进程数不套用容差"""
+        baseline = self._baseline(ffmpeg_processes=4)
+        self.assertEqual(benchmark.compare({'100': {'ffmpeg_processes': 4}}, baseline, 0.5), [])
+        self.assertEqual(len(benchmark.compare({'100': {'ffmpeg_processes': 5}}, baseline, 0.5)), 1)
+
+    def test_lower_is_better_tolerance(self):
+        """测试越小越好的指标只在超出容差时算作回退"""
+        baseline = self._baseline(wall_s=10.0)
+        self.assertEqual(benchmark.compare({'100': {'wall_s': 10.9}}, baseline, 0.1), [])
+        self.assertEqual(len(benchmark.compare({'100': {'wall_s': 11.5}}, baseline, 0.1)), 1)
+        self.assertEqual(benchmark.compare({'100': {'wall_s': 2.0}}, baseline, 0.1), [])
+
+    def test_higher_is_better_tolerance(self):
+        """测试越大越好的指标只在低于容差下限时算作回退"""
+        baseline = self._baseline(files_per_s=100.0)
+        self.assertEqual(benchmark.compare({'100': {'files_per_s': 91.0}}, baseline, 0.1), [])
+        self.assertEqual(len(benchmark.compare({'100': {'files_per_s': 85.0}}, baseline, 0.1)), 1)
+        self.assertEqual(benchmark.compare({'100': {'files_per_s': 500.0}}, baseline, 0.1), [])
+
+    def test_missing_sizes_and_metrics_are_skipped(self):
+        """测试基准中没有的规模或指标不参与比较"""
+        baseline = self._baseline(wall_s=1.0, peak_rss_mb=None)
+        results = {'100': {'wall_s': 1.0, 'peak_rss_mb': 999.0}, '1000': {'wall_s': 999.0}}
+        self.assertEqual(benchmark.compare(results, baseline, 0.1), [])
+
+    def test_file_spec_is_deterministic(self):
+        """测试同一种子生成相同的文件描述，不同种子结果不同"""
+        args = (('wav',), 0.5, 6.0, 0.2)
+        specs = [file_spec(7, i, *args) for i in range(20)]
+        self.assertEqual(specs, [file_spec(7, i, *args) for i in range(20)])
+        self.assertNotEqual(specs, [file_spec(8, i, *args) for i in range(20)])
+
+    def test_corpus_is_deterministic(self):
+        """测试同一种子生成的语料逐字节一致"""
+        infos = []
+        for name in ('a', 'b'):
+            infos.append(generate_corpus(self.test_dir / name, 8, seed=42, formats=('wav',),
+                                         max_duration=1.0, corrupt_ratio=0.3, jobs=1))
+        self.assertEqual(infos[0], infos[1])
+        names = sorted(p.name for p in (self.test_dir / 'a').iterdir())
+        self.assertEqual(names, sorted(p.name for p in (self.test_dir / 'b').iterdir()))
+        for name in names:
+            self.assertEqual((self.test_dir / 'a' / name).read_bytes(),
+                             (self.test_dir / 'b' / name).read_bytes())
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), '依赖 fork 启动子进程')
+    def test_crashed_child_does_not_hang(self):
+        """测试子进程崩溃时报错而不是一直等待结果"""
+        with mock.patch.object(benchmark, '_run_once', _crash):
+            with self.assertRaises(RuntimeError):
+                benchmark.run_benchmark(self.test_dir, {}, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
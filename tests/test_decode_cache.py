@@ -0,0 +1,67 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.decode_cache import DecodeCache
+from src.probe import ProbeError
+
+class TestDecodeCache(unittest.TestCase):
+    """解码缓存单元测试"""
+
+    def test_lru_eviction_by_bytes(self):
+        """测试按字节数淘汰最久未使用的条目"""
+        segment = AudioSegment.silent(duration=1000, frame_rate=8000)  # 16000 字节
+        cache = DecodeCache(max_bytes=len(segment.raw_data) * 2)
+
+        cache.put(Path("a"), segment)
+        cache.put(Path("b"), segment)
+        self.assertIsNotNone(cache.get(Path("a")))
+        cache.put(Path("c"), segment)
+
+        self.assertIn(Path("a"), cache)
+        self.assertNotIn(Path("b"), cache)
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.current_bytes, len(segment.raw_data) * 2)
+
+    def test_oversized_entry_not_cached(self):
+        """测试超过容量的条目不会被缓存"""
+        cache = DecodeCache(max_bytes=10)
+        cache.put(Path("a"), AudioSegment.silent(duration=1000))
+        self.assertEqual(len(cache), 0)
+
+    def test_take_counts_hits_and_misses(self):
+        """测试 take 的命中计数并移除条目"""
+        cache = DecodeCache(max_bytes=1024 * 1024)
+        cache.put(Path("a"), AudioSegment.silent(duration=100))
+
+        self.assertIsNotNone(cache.take(Path("a")))
+        self.assertIsNone(cache.take(Path("a")))
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.current_bytes, 0)
+
+    def test_each_input_decoded_once(self):
+        """测试文件头解析失败时，每个文件在一次运行中只解码一次"""
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            input_dir = temp_dir / "input"
+            os.makedirs(input_dir)
+            for i in range(3):
+                AudioSegment.silent(duration=6000).export(input_dir / f"a{i}.wav", format="wav")
+
+            processor = AudioProcessor(str(input_dir), str(temp_dir / "output"))
+            with mock.patch('src.probe.probe_header', side_effect=ProbeError("x")), \
+                    mock.patch('src.probe.probe_ffprobe', side_effect=ProbeError("x")), \
+                    mock.patch.object(AudioSegment, 'from_file', wraps=AudioSegment.from_file) as from_file:
+                processor.process()
+                self.assertEqual(from_file.call_count, 3)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+import tempfile
+import shutil
+import subprocess
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src import ffmpeg_concat
+from src.ffmpeg_concat import build_command, concat_encode
+
+class TestFfmpegConcat(unittest.TestCase):
+    """每组一个 ffmpeg 进程的拼接单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i in range(4):
+            AudioSegment.silent(duration=5000).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_command(self):
+        """测试命令包含全部输入、统一格式的 concat 滤镜与 PCM 编码"""
+        inputs = [Path("a.mp3"), Path("b:1.flac"), Path("c.ogg")]
+        command = build_command(inputs, Path("out.wav"), (44100, 2, 2), 'wav')
+        self.assertEqual(command.count('-i'), 3)
+        self.assertIn('file:' + os.path.abspath("b:1.flac"), command)
+        graph = command[command.index('-filter_complex') + 1]
+        self.assertIn("aresample=44100", graph)
+        self.assertIn("channel_layouts=stereo", graph)
+        self.assertTrue(graph.endswith("[a0][a1][a2]concat=n=3:v=0:a=1[out]"))
+        self.assertEqual(command[command.index('-c:a') + 1], 'pcm_s16le')
+        self.assertNotIn('-c:a', build_command(inputs, Path("out.mp3"), (44100, 2, 2), 'mp3'))
+
+    def test_input_limit_splits_commands(self):
+        """测试超过输入上限时分段拼接，每条命令的输入数都不超过上限"""
+        commands = []
+
+        def fake_run(command):
+            commands.append(command)
+            Path(command[-1][len('file:'):]).write_bytes(b'')
+
+        inputs = [self.input_dir / f"a{i % 4}.wav" for i in range(5)]
+        with mock.patch.object(ffmpeg_concat, '_run', side_effect=fake_run):
+            invocations = concat_encode(inputs, self.temp_dir / "out.mp3", (44100, 2, 2), max_inputs=2)
+        self.assertEqual(invocations, len(commands))
+        self.assertEqual(invocations, 6)
+        self.assertTrue(all(c.count('-i') <= 2 for c in commands))
+        self.assertEqual(commands[-1][-1], 'file:' + str(self.temp_dir / "out.mp3"))
+        self.assertEqual(commands[-1][commands[-1].index('-f', -3) + 1], 'mp3')
+
+    def test_groups_use_one_process(self):
+        """测试每组只调用一次 ffmpeg 拼接，失败的组回退到逐个文件解码"""
+        def fake_encode(paths, output_path, target, suffix=None, max_inputs=None):
+            output_path.write_bytes(b'')
+            return 1
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   min_duration_ms=10000, ffmpeg_concat=True)
+        with mock.patch('src.audio_processor.concat_encode', side_effect=fake_encode) as encode:
+            self.assertEqual(processor.process(), 2)
+            self.assertEqual(encode.call_count, 2)
+        self.assertEqual(processor.report, {'stream_copy': 0, 'reencode': 2})
+
+        fallback_dir = self.temp_dir / "fallback"
+        processor = AudioProcessor(str(self.input_dir), str(fallback_dir),
+                                   min_duration_ms=10000, ffmpeg_concat=True)
+        error = subprocess.CalledProcessError(1, ['ffmpeg'], stderr=b'Invalid data found')
+        with mock.patch('src.audio_processor.concat_encode', side_effect=error):
+            self.assertEqual(processor.process(), 2)
+        self.assertEqual(processor.report, {'stream_copy': 0, 'reencode': 2})
+        for file_path in fallback_dir.iterdir():
+            self.assertEqual(len(AudioSegment.from_file(file_path)), 10000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import io
+import os
+import unittest
+import tempfile
+import shutil
+import subprocess
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.in_memory import _probe, encode_segment, merge_clips
+
+class _PipeWriter(io.RawIOBase):
+    """只能顺序写入的流，模拟上传管道"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+class TestInMemory(unittest.TestCase):
+    """内存输入输出接口单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.clips = []
+        for i in range(4):
+            buffer = io.BytesIO()
+            AudioSegment.silent(duration=5000, frame_rate=44100).export(buffer, format="wav")
+            self.clips.append((f"a{i}.wav", buffer.getvalue()))
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_merge_returns_bytes(self):
+        """测试返回的字节串可解码，输出名称与按目录处理时一致"""
+        results = merge_clips(self.clips, min_duration_ms=10000)
+        self.assertEqual(len(results), 2)
+        for clip in results:
+            self.assertEqual(len(AudioSegment.from_file(io.BytesIO(clip.data), format="wav")), 10000)
+            self.assertEqual(len(clip.members), 2)
+
+        input_dir = self.temp_dir / "input"
+        output_dir = self.temp_dir / "output"
+        os.makedirs(input_dir)
+        for name, data in self.clips:
+            (input_dir / name).write_bytes(data)
+        AudioProcessor(str(input_dir), str(output_dir), min_duration_ms=10000).process()
+        self.assertEqual(sorted(c.name for c in results), sorted(p.name for p in output_dir.iterdir()))
+
+    def test_write_to_streams(self):
+        """测试结果写入不支持随机访问的流，输入可以是文件对象"""
+        streams = {}
+
+        def open_output(name):
+            streams[name] = _PipeWriter()
+            return streams[name]
+
+        inputs = [(name, io.BytesIO(data)) for name, data in self.clips]
+        results = merge_clips(inputs, min_duration_ms=10000, open_output=open_output)
+        self.assertEqual(sorted(streams), sorted(c.name for c in results))
+        for clip in results:
+            self.assertIsNone(clip.data)
+            data = b''.join(streams[clip.name].chunks)
+            self.assertEqual(len(AudioSegment.from_file(io.BytesIO(data), format="wav")), 10000)
+
+    def test_invalid_inputs(self):
+        """测试重复名称报错，无法读取的输入被跳过"""
+        with self.assertRaises(ValueError):
+            merge_clips(self.clips + [self.clips[0]])
+        with mock.patch('src.in_memory._decode', side_effect=ValueError("bad data")):
+            results = merge_clips(self.clips[:2] + [("broken.wav", b"not audio")], min_duration_ms=10000)
+        self.assertEqual(results, [])
+        results = merge_clips(self.clips[:2] + [("broken.wav", b"not audio")], min_duration_ms=10000)
+        self.assertEqual(len(results), 1)
+        self.assertNotIn("broken.wav", results[0].members)
+
+    def test_8bit_wav_matches_export(self):
+        """测试 8 位 WAV 输出与 AudioSegment.export 逐字节相同"""
+        segment = AudioSegment.silent(duration=500, frame_rate=8000).set_sample_width(1)
+        output, expected = io.BytesIO(), io.BytesIO()
+        encode_segment(segment, output, '.wav')
+        segment.export(expected, format="wav")
+        self.assertEqual(output.getvalue(), expected.getvalue())
+
+    def test_truncated_header_falls_back_to_decode(self):
+        """测试 fmt 块被截断的文件头解析失败时改为完整解码"""
+        name, data = self.clips[0]
+        fmt = data.index(b'fmt ')
+        broken = data[:fmt + 4] + (4).to_bytes(4, 'little') + data[fmt + 8:fmt + 12] + data[data.index(b'data'):]
+        decoded = {}
+        audio = AudioSegment.silent(duration=5000, frame_rate=44100)
+        with mock.patch('src.in_memory._decode', return_value=audio):
+            metadata = _probe(Path(name), broken, decoded)
+        self.assertEqual((metadata.source, metadata.duration_ms), ('decode', 5000))
+        self.assertIs(decoded[Path(name)], audio)
+
+    def test_encode_through_pipes(self):
+        """测试非 WAV 输出经由标准输入输出与 ffmpeg 交换数据"""
+        converter = self.temp_dir / "fake_ffmpeg"
+        converter.write_text("#!/bin/sh\nexec cat\n")
+        converter.chmod(0o755)
+        segment = AudioSegment.silent(duration=3000, frame_rate=44100)
+
+        output = io.BytesIO()
+        with mock.patch.object(AudioSegment, 'converter', str(converter)):
+            encode_segment(segment, output, '.mp3', ['-b:a', '192k'])
+        self.assertEqual(output.getvalue(), segment.raw_data)
+
+        converter.write_text("#!/bin/sh\necho 'Unknown encoder' >&2\nexit 1\n")
+        with mock.patch.object(AudioSegment, 'converter', str(converter)):
+            with self.assertRaises(subprocess.CalledProcessError) as ctx:
+                encode_segment(segment, io.BytesIO(), '.mp3')
+        self.assertIn(b'Unknown encoder', ctx.exception.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+import os
+import json
+import time
+import unittest
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+from unittest import mock
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+from pydub import AudioSegment
+from src.job_server import JobServer, make_http_server
+from src.job_store import FINAL_STATUSES, JobStore
+
+class TestJobStore(unittest.TestCase):
+    """持久化任务队列单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.store = JobStore(str(self.temp_dir / "jobs.sqlite"))
+
+    def tearDown(self):
+        """测试后清理"""
+        self.store.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_claim_alternates_between_clients(self):
+        """测试运行中任务少的提交方优先，同一提交方先进先出"""
+        a = [self.store.submit({'n': i}, 'team-a') for i in range(3)]
+        b = self.store.submit({'n': 0}, 'team-b')
+        claimed = [self.store.claim_next()['id'] for _ in range(3)]
+        self.assertEqual(claimed, [a[0], b, a[1]])
+        self.assertEqual(self.store.get(a[0])['status'], 'running')
+        self.assertEqual(self.store.get(a[0])['attempts'], 1)
+
+    def test_cancel_and_requeue(self):
+        """测试取消排队与运行中的任务，以及重启后重新排队"""
+        queued, running, interrupted = (self.store.submit({}) for _ in range(3))
+        self.store.claim_next()
+        self.store.claim_next()
+        self.assertEqual(self.store.cancel(running)['status'], 'running')
+        self.assertTrue(self.store.cancel_requested(running))
+        self.assertEqual(self.store.cancel(interrupted)['status'], 'cancelled')
+
+        self.assertEqual(self.store.requeue_interrupted(), 1)
+        self.assertEqual(self.store.get(queued)['status'], 'queued')
+        self.assertEqual(self.store.get(running)['status'], 'cancelled')
+        self.assertEqual(self.store.claim_next()['attempts'], 2)
+
+        self.assertTrue(self.store.finish(queued, 'succeeded', result={'outputs': 1}))
+        self.assertFalse(self.store.finish(queued, 'failed'))
+        self.assertEqual(self.store.get(queued)['result'], {'outputs': 1})
+
+
+class TestJobServer(unittest.TestCase):
+    """任务服务单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i in range(4):
+            AudioSegment.silent(duration=5000).export(self.input_dir / f"a{i}.wav", format="wav")
+
+        self.job_server = JobServer(str(self.temp_dir / "jobs.sqlite"), workers=1,
+                                    journal_dir=str(self.temp_dir / "journals"), poll_interval_s=0.05)
+        self.http_server = make_http_server(self.job_server, port=0)
+        threading.Thread(target=self.http_server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.http_server.server_address[1]}"
+        self.job_server.start()
+
+    def tearDown(self):
+        """测试后清理"""
+        self.http_server.shutdown()
+        self.http_server.server_close()
+        self.job_server.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def _request(self, method, path, body=None):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = Request(self.base_url + path, data=data, method=method,
+                          headers={'Content-Type': 'application/json'})
+        try:
+            with urlopen(request, timeout=10) as response:
+                return response.status, json.loads(response.read())
+        except HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    def _wait(self, job_id, statuses=FINAL_STATUSES, timeout_s=60):
+        deadline = time.monotonic() + timeout_s
+        while True:
+            status, job = self._request('GET', f"/jobs/{job_id}")
+            if job['status'] in statuses or time.monotonic() > deadline:
+                return job
+            time.sleep(0.05)
+
+    def test_run_job(self):
+        """测试提交的任务在工作进程中完成并记录结果与进度"""
+        status, job = self._request('POST', '/jobs', {
+            'input_dir': str(self.input_dir), 'output_dir': str(self.output_dir),
+            'min_duration': 10, 'client': 'team-a'})
+        self.assertEqual(status, 201)
+        self.assertEqual((job['status'], job['client']), ('queued', 'team-a'))
+
+        job = self._wait(job['id'])
+        self.assertEqual(job['status'], 'succeeded', job['error'])
+        self.assertEqual(job['result']['outputs'], 2)
+        self.assertEqual(job['result']['files'], sorted(p.name for p in self.output_dir.iterdir()))
+        self.assertEqual(job['progress']['stage'], 'done')
+
+        status, body = self._request('GET', '/jobs?status=succeeded')
+        self.assertEqual([j['id'] for j in body['jobs']], [job['id']])
+
+    def test_invalid_requests(self):
+        """测试参数不合法时返回 400，任务不存在时返回 404"""
+        for body in ({'output_dir': str(self.output_dir)},
+                     {'input_dir': str(self.temp_dir / "missing"), 'output_dir': str(self.output_dir)},
+                     {'input_dir': str(self.input_dir), 'output_dir': str(self.output_dir), 'jobs': 64},
+                     {'input_dir': str(self.input_dir), 'output_dir': str(self.output_dir), 'preset': 'tiny'}):
+            self.assertEqual(self._request('POST', '/jobs', body)[0], 400)
+        self.assertEqual(self._request('GET', '/jobs/999')[0], 404)
+        self.assertEqual(self._request('DELETE', '/jobs/999')[0], 404)
+        self.assertEqual(self._request('GET', '/jobs')[1], {'jobs': []})
+
+    def test_cancel_running_job(self):
+        """测试取消运行中的任务时终止其 ffmpeg 进程并清理其临时文件"""
+        bin_dir = self.temp_dir / "bin"
+        os.makedirs(bin_dir)
+        pid_file = self.temp_dir / "pids"
+        converter = bin_dir / "ffmpeg"
+        converter.write_text(f"#!/bin/sh\necho $$ >> {pid_file}\nexec sleep 30\n")
+        converter.chmod(0o755)
+
+        with mock.patch.dict(os.environ, {'PATH': f"{bin_dir}{os.pathsep}{os.environ['PATH']}"}):
+            status, job = self._request('POST', '/jobs', {
+                'input_dir': str(self.input_dir), 'output_dir': str(self.output_dir),
+                'min_duration': 10, 'ffmpeg_concat': True})
+            deadline = time.monotonic() + 60
+            while not pid_file.exists():
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.05)
+
+        # 运行中任务的输出目录不能再被其他任务使用
+        spec = {'input_dir': str(self.input_dir), 'output_dir': str(self.output_dir)}
+        self.assertEqual(self._request('POST', '/jobs', spec)[0], 400)
+        status, queued = self._request('POST', '/jobs', dict(spec, output_dir=str(self.temp_dir / "other")))
+        self.assertEqual(status, 201)
+        self.assertEqual(self._request('POST', f"/jobs/{queued['id']}/cancel")[1]['status'], 'cancelled')
+
+        # 只清理该任务计划写出的文件的临时文件
+        outputs = self._request('GET', f"/jobs/{job['id']}")[1]['outputs']
+        self.assertEqual(len(outputs), 2)
+        (self.output_dir / (outputs[0] + '.partial')).write_bytes(b'partial')
+        foreign = self.output_dir / 'other_run.wav.partial'
+        foreign.write_bytes(b'partial')
+
+        status, job = self._request('POST', f"/jobs/{job['id']}/cancel")
+        self.assertEqual(status, 200)
+        self.assertTrue(job['cancel_requested'])
+        job = self._wait(job['id'])
+        self.assertEqual(job['status'], 'cancelled')
+
+        for pid in map(int, pid_file.read_text().split()):
+            deadline = time.monotonic() + 10
+            while _alive(pid) and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertFalse(_alive(pid))
+        self.assertEqual(list(self.output_dir.glob('*.partial')), [foreign])
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    unittest.main()
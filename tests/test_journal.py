@@ -0,0 +1,66 @@
+import os
+import json
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.journal import journal_path, load_completed, partial_path
+
+class TestJournal(unittest.TestCase):
+    """运行日志与恢复运行单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        self.journal_dir = self.temp_dir / "journals"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000, 4000, 6000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def _processor(self, **kwargs):
+        return AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                              journal_dir=str(self.journal_dir), **kwargs)
+
+    def test_journal_records_every_group(self):
+        """测试每个完成的组都写入日志，且不留下临时文件"""
+        processor = self._processor()
+        count = processor.process()
+
+        completed = load_completed(self.journal_dir, self.output_dir)
+        self.assertEqual(len(completed), count)
+        self.assertEqual(sorted(completed), sorted(p.name for p in self.output_dir.iterdir()))
+
+    def test_resume_skips_completed_groups(self):
+        """测试恢复运行时跳过已完成的组并清理临时文件"""
+        first = self._processor()
+        total = first.process()
+        names = sorted(p.name for p in self.output_dir.iterdir())
+
+        # 模拟中断：最后一组未记录，且留下了半个临时文件
+        path = journal_path(self.journal_dir, self.output_dir)
+        lines = path.read_text(encoding='utf-8').splitlines(keepends=True)
+        path.write_text(''.join(lines[:-1]) + '{"output_name": "merg', encoding='utf-8')
+        unfinished = self.output_dir / json.loads(lines[-1])['output_name']
+        unfinished.unlink()
+        partial_path(unfinished).write_bytes(b'partial')
+
+        resumed = self._processor(resume=True)
+        with mock.patch.object(AudioProcessor, '_export_group', wraps=resumed._export_group) as export:
+            self.assertEqual(resumed.process(), total)
+        self.assertEqual(resumed.resumed + export.call_count, total)
+        self.assertEqual(export.call_count, 1)
+        self.assertEqual(sorted(p.name for p in self.output_dir.iterdir()), names)
+        self.assertEqual(len(load_completed(self.journal_dir, self.output_dir)), total)
+
+
+if __name__ == "__main__":
+    unittest.main()
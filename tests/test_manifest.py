@@ -0,0 +1,60 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+
+class TestManifest(unittest.TestCase):
+    """规划/执行分离与 JSON 清单单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        self.manifest_path = self.temp_dir / "plan.json"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000, 4000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_plan_writes_no_audio(self):
+        """测试规划阶段不生成音频"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        plan = processor.plan()
+        processor.save_manifest(plan, str(self.manifest_path))
+
+        self.assertTrue(self.manifest_path.exists())
+        self.assertEqual(list(self.output_dir.iterdir()), [])
+        self.assertTrue(all(group.output_name for group in plan.groups))
+
+    def test_execute_from_manifest_without_reprobing(self):
+        """测试按清单执行时不重新扫描和分析"""
+        planner = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        plan = planner.plan()
+        planner.save_manifest(plan, str(self.manifest_path))
+
+        executor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        loaded = executor.load_manifest(str(self.manifest_path))
+        self.assertEqual([g.members for g in loaded.groups], [g.members for g in plan.groups])
+        self.assertEqual(executor.audio_metadata, planner.audio_metadata)
+
+        with mock.patch.object(AudioProcessor, '_get_audio_files') as scan, \
+                mock.patch('src.parallel.probe_audio') as probe:
+            count = executor.execute(loaded)
+            scan.assert_not_called()
+            probe.assert_not_called()
+
+        self.assertEqual(count, plan.expected_outputs)
+        self.assertEqual(sorted(p.name for p in self.output_dir.iterdir()),
+                         sorted(g.output_name for g in plan.groups))
+
+
+if __name__ == "__main__":
+    unittest.main()
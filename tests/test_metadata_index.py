@@ -0,0 +1,95 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.metadata_index import MetadataIndex
+from src.probe import probe_audio
+
+class TestMetadataIndex(unittest.TestCase):
+    """元数据索引单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        self.index_path = self.temp_dir / "index.sqlite"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([2000, 4000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_lookup_requires_same_size_and_mtime(self):
+        """测试文件变化后索引失效"""
+        file_path = self.input_dir / "a0.wav"
+        stat = file_path.stat()
+        with MetadataIndex(str(self.index_path)) as index:
+            index.store_many([(file_path, stat, probe_audio(file_path), 'fp')])
+            self.assertEqual(index.lookup(file_path, stat).duration_ms, 2000)
+            self.assertEqual(index.fingerprint(file_path), 'fp')
+
+            os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+            self.assertIsNone(index.lookup(file_path, file_path.stat()))
+
+    def test_concurrent_connections(self):
+        """测试两个连接同时写入同一个索引"""
+        file_path = self.input_dir / "a0.wav"
+        stat = file_path.stat()
+        metadata = probe_audio(file_path)
+        with MetadataIndex(str(self.index_path)) as first, MetadataIndex(str(self.index_path)) as second:
+            first.store_many([(file_path, stat, metadata, 'one')])
+            second.store_many([(file_path, stat, metadata, 'two')])
+            self.assertEqual(first.fingerprint(file_path), 'two')
+
+    def test_unchanged_files_are_not_probed_again(self):
+        """测试第二次运行不再打开未变化的文件"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        first = processor._get_audio_info(processor._get_audio_files())
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        with mock.patch('src.parallel.probe_audio') as probe:
+            second = processor._get_audio_info(processor._get_audio_files())
+            probe.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_touched_and_renamed_files_are_not_probed_again(self):
+        """测试修改时间或路径变化但内容不变的文件按指纹沿用索引记录"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        first = processor._get_audio_info(processor._get_audio_files())
+
+        stat = (self.input_dir / "a0.wav").stat()
+        os.utime(self.input_dir / "a0.wav", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        os.rename(self.input_dir / "a1.wav", self.input_dir / "b1.wav")
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        with mock.patch('src.parallel.probe_audio') as probe:
+            second = processor._get_audio_info(processor._get_audio_files())
+            probe.assert_not_called()
+        self.assertEqual([d for _, d in first], [d for _, d in second])
+
+        # 以新的键写回后不再计算指纹
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        with mock.patch('src.metadata_index.file_fingerprint') as fingerprint:
+            processor._get_audio_info(processor._get_audio_files())
+            fingerprint.assert_not_called()
+
+    def test_rebuild_index(self):
+        """测试重建索引后重新分析"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), index_path=str(self.index_path))
+        processor._get_audio_info(processor._get_audio_files())
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   index_path=str(self.index_path), rebuild_index=True)
+        with mock.patch('src.parallel.probe_audio', wraps=probe_audio) as probe:
+            processor._get_audio_info(processor._get_audio_files())
+            self.assertEqual(probe.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
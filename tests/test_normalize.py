@@ -0,0 +1,110 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from pydub.generators import Sine
+from src.audio_processor import AudioProcessor
+from src.accumulator import SegmentAccumulator
+from src.probe import AudioMetadata
+from src import normalize as normalize_module
+from src.normalize import normalize, segment_format, target_format
+
+class TestNormalize(unittest.TestCase):
+    """格式归一化单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        self.tone = Sine(440).to_audio_segment(duration=500).set_frame_rate(22050)
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_target_format(self):
+        """测试目标格式取各项最大值，元数据缺失时无法预先确定"""
+        metadata = [AudioMetadata(1000, 22050, 1, 'pcm', 2), AudioMetadata(1000, 48000, 2, 'mp3')]
+        self.assertEqual(target_format(metadata), (48000, 2, 2))
+        self.assertIsNone(target_format(metadata + [None]))
+
+    def test_unchanged_format_is_not_copied(self):
+        """测试格式已一致时直接返回原对象"""
+        self.assertIs(normalize(self.tone, segment_format(self.tone)), self.tone)
+
+    @unittest.skipIf(normalize_module.np is None, "需要 NumPy")
+    def test_channels_and_width_are_exact(self):
+        """测试声道复制与位宽提升是无损的，并与 pydub 结果一致"""
+        stereo = normalize(self.tone, (22050, 2, 2))
+        self.assertEqual(stereo.raw_data, self.tone.set_channels(2).raw_data)
+        wide = normalize(self.tone, (22050, 3, 1))
+        self.assertEqual(wide.raw_data, self.tone.set_sample_width(3).raw_data)
+        self.assertEqual(normalize(wide, (22050, 2, 1)).raw_data, self.tone.raw_data)
+        back = normalize(stereo, (22050, 2, 1))
+        self.assertEqual(back.raw_data, self.tone.raw_data)
+
+    @unittest.skipIf(normalize_module.np is None, "需要 NumPy")
+    def test_8bit_samples_are_signed(self):
+        """测试 8 位输入按 pydub 的有符号存储转换，结果与 pydub 一致"""
+        narrow = self.tone.set_sample_width(1)
+        for target in ((22050, 2, 1), (22050, 2, 2), (22050, 1, 2)):
+            self.assertEqual(normalize(narrow, target).raw_data,
+                             normalize_module._normalize_pydub(narrow, target).raw_data)
+        silence = AudioSegment.silent(duration=100, frame_rate=22050).set_sample_width(1)
+        self.assertEqual(normalize(silence, (22050, 2, 1)).max, 0)
+        self.assertEqual(normalize(self.tone, (22050, 1, 1)).raw_data,
+                         normalize_module._normalize_pydub(self.tone, (22050, 1, 1)).raw_data)
+
+    def test_resample_matches_pydub(self):
+        """测试重采样与声道、位宽转换的结果与 pydub 逐字节相同"""
+        stereo = self.tone.set_channels(2).set_frame_rate(48000)
+        for segment, target in ((self.tone, (48000, 2, 2)), (self.tone, (44100, 4, 1)),
+                                (stereo, (44100, 2, 1)), (stereo, (22050, 1, 2))):
+            ours = normalize(segment, target)
+            self.assertEqual(segment_format(ours), target)
+            self.assertEqual(ours.raw_data, normalize_module._normalize_pydub(segment, target).raw_data)
+
+    @unittest.skipIf(normalize_module.np is None, "需要 NumPy")
+    def test_multichannel_remix(self):
+        """测试 pydub 不支持的多声道互转"""
+        six = AudioSegment.from_mono_audiosegments(*[self.tone] * 6)
+        stereo = normalize(six, (22050, 2, 2))
+        self.assertEqual(stereo.raw_data, self.tone.set_channels(2).raw_data)
+        wide = normalize(self.tone, (22050, 2, 6))
+        self.assertEqual(wide.split_to_mono()[5].raw_data, self.tone.raw_data)
+
+    def test_processor_converts_each_input_once(self):
+        """测试混合格式的组在解码后按整组目标格式各转换一次，拼接时不再转换"""
+        Sine(440).to_audio_segment(duration=6000).set_frame_rate(16000).export(
+            self.input_dir / "a.wav", format="wav")
+        Sine(440).to_audio_segment(duration=6000).set_frame_rate(44100).set_channels(2).export(
+            self.input_dir / "b.wav", format="wav")
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        with mock.patch.object(SegmentAccumulator, '_convert_chunks') as reconvert:
+            self.assertEqual(processor.process(), 1)
+            reconvert.assert_not_called()
+        self.assertEqual(processor.conversions,
+                         [(self.input_dir / "a.wav", (16000, 2, 1), (44100, 2, 2))])
+        output = AudioSegment.from_wav(next(self.output_dir.iterdir()))
+        self.assertEqual(segment_format(output), (44100, 2, 2))
+        self.assertAlmostEqual(len(output), 12000, delta=5)
+
+    def test_processor_keeps_8bit_silence_silent(self):
+        """测试 8 位与 16 位输入混合时输出不出现直流偏移"""
+        AudioSegment.silent(duration=6000).set_sample_width(1).export(self.input_dir / "a.wav", format="wav")
+        AudioSegment.silent(duration=6000).export(self.input_dir / "b.wav", format="wav")
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000)
+        self.assertEqual(processor.process(), 1)
+        output = AudioSegment.from_wav(next(self.output_dir.iterdir()))
+        self.assertEqual(output.sample_width, 2)
+        self.assertEqual(output.max, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
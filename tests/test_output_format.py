@@ -0,0 +1,69 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.output_format import PRESETS, container_for, resolve_output_format
+
+class TestOutputFormat(unittest.TestCase):
+    """输出格式与编码预设单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i in range(4):
+            AudioSegment.silent(duration=5000).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_resolve_output_format(self):
+        """测试格式、预设与单项参数的组合规则"""
+        self.assertIsNone(resolve_output_format())
+        mp3 = resolve_output_format('mp3', bitrate='192k', threads=2)
+        self.assertEqual(mp3.encoder_args(), ['-c:a', 'libmp3lame', '-b:a', '192k', '-threads', '2'])
+        self.assertEqual(mp3.export_kwargs(), {'format': 'mp3', 'codec': 'libmp3lame', 'bitrate': '192k',
+                                               'parameters': ['-threads', '2']})
+        archive = resolve_output_format(preset='archive', quality='5')
+        self.assertEqual((archive.suffix, archive.compression_level, archive.quality), ('.flac', 8, '5'))
+        self.assertEqual(PRESETS['archive'].quality, None)
+        self.assertEqual(resolve_output_format('m4a').container, 'ipod')
+        for kwargs in ({'name': 'wma'}, {'preset': 'tiny'}, {'name': 'mp3', 'preset': 'archive'},
+                       {'bitrate': '128k'}):
+            with self.assertRaises(ValueError):
+                resolve_output_format(**kwargs)
+
+    def test_suffix_is_mapped_to_container(self):
+        """测试未指定输出格式时后缀换算成 ffmpeg 封装格式名"""
+        self.assertEqual(container_for('.M4A'), 'ipod')
+        self.assertEqual(container_for('.aac'), 'adts')
+        self.assertEqual(container_for('.wav'), 'wav')
+
+    def test_processor_uses_output_format(self):
+        """测试输出文件后缀与导出参数都来自指定的输出格式"""
+        calls = []
+
+        def fake_export(segment, out_f=None, **kwargs):
+            calls.append(kwargs)
+            Path(out_f).write_bytes(b'')
+            return mock.MagicMock()
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   output_format=resolve_output_format(preset='fast-lossless'))
+        with mock.patch.object(AudioSegment, 'export', autospec=True, side_effect=fake_export):
+            self.assertEqual(processor.process(), 2)
+
+        self.assertTrue(all(p.suffix == '.flac' for p in self.output_dir.iterdir()))
+        self.assertEqual(calls, [{'format': 'flac', 'codec': 'flac',
+                                  'parameters': ['-compression_level', '0']}] * 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
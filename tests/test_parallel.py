@@ -0,0 +1,47 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.parallel import imap_ordered
+
+class TestParallel(unittest.TestCase):
+    """多进程分析与解码单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([4000, 2000, 6000, 2000, 9000, 3000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_imap_ordered_keeps_input_order(self):
+        """测试串行模式下按输入顺序产出结果"""
+        results = [(item, future.result()) for item, future in imap_ordered(lambda x: x * 2, [3, 1, 2])]
+        self.assertEqual(results, [(3, 6), (1, 2), (2, 4)])
+
+    def test_parallel_matches_serial(self):
+        """测试多进程与单进程的排序和分组结果一致"""
+        serial = AudioProcessor(str(self.input_dir), str(self.temp_dir / "serial"), min_duration_ms=8000)
+        parallel = AudioProcessor(str(self.input_dir), str(self.temp_dir / "parallel"),
+                                  min_duration_ms=8000, jobs=2)
+
+        files = serial._get_audio_files()
+        with parallel._worker_pool():
+            self.assertEqual(parallel._get_audio_info(files), serial._get_audio_info(files))
+
+        self.assertEqual(parallel.process(), serial.process())
+        serial_durations = sorted(len(AudioSegment.from_file(p)) for p in (self.temp_dir / "serial").iterdir())
+        parallel_durations = sorted(len(AudioSegment.from_file(p)) for p in (self.temp_dir / "parallel").iterdir())
+        self.assertEqual(parallel_durations, serial_durations)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import time
+import random
+import unittest
+import threading
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.pipeline import MergePipeline
+from src.planner import MergeGroup, greedy_groups
+from src.accumulator import SegmentAccumulator
+from src.streaming import StreamingExport
+
+class TestPipeline(unittest.TestCase):
+    """解码/拼接/编码流水线单元测试"""
+
+    def _groups(self):
+        audio_info = [(Path(f"{i}.wav"), 100 * (i % 5 + 1)) for i in range(30)]
+        return greedy_groups(audio_info, 700)
+
+    def test_members_concatenated_in_order(self):
+        """测试乱序完成的解码结果按组内顺序拼接"""
+        groups = self._groups()
+        exported = {}
+
+        def decode(path):
+            time.sleep(random.uniform(0, 0.002))
+            index = int(path.stem)
+            return AudioSegment.silent(duration=100 * (index % 5 + 1))
+
+        def export(group, segment):
+            exported[group.index] = len(segment)
+            return Path(f"out{group.index}")
+
+        pipeline = MergePipeline(decode, export, decode_workers=4, encode_workers=2, queue_size=2)
+        outputs = pipeline.run(groups)
+
+        self.assertEqual(len(outputs), len(groups))
+        self.assertEqual(exported, {g.index: g.duration_ms for g in groups})
+        depths = pipeline.max_queue_depths()
+        self.assertLessEqual(depths['decode'], 2)
+        self.assertLessEqual(depths['encode'], 2)
+        self.assertLessEqual(depths['reorder'], 2 + 4)
+
+    def test_failed_decode_skips_member(self):
+        """测试单个文件解码失败不影响其余文件"""
+        groups = [MergeGroup(index=0, members=[(Path("0.wav"), 100), (Path("bad.wav"), 100)]),
+                  MergeGroup(index=1, members=[(Path("bad2.wav"), 100)])]
+
+        def decode(path):
+            if path.stem.startswith("bad"):
+                raise ValueError("broken")
+            return AudioSegment.silent(duration=100)
+
+        exported = []
+        pipeline = MergePipeline(decode, lambda g, s: exported.append(len(s)) or Path("out"))
+        outputs = pipeline.run(groups)
+
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(exported, [100])
+
+    def test_failed_append_skips_group(self):
+        """测试写入导出器出错时放弃该组，流水线仍能结束"""
+        groups = self._groups()
+        streams = {}
+
+        def open_stream(group):
+            stream = mock.Mock(spec=StreamingExport)
+            stream.empty = False
+            if group.index == 0:
+                stream.append.side_effect = OSError("broken pipe")
+            streams[group.index] = stream
+            return stream
+
+        pipeline = MergePipeline(lambda path: AudioSegment.silent(duration=100), lambda g, s: None,
+                                 decode_workers=2, queue_size=2, open_stream=open_stream,
+                                 finish_stream=lambda g, stream: Path(f"out{g.index}"))
+        outputs = []
+        runner = threading.Thread(target=lambda: outputs.extend(pipeline.run(groups)), daemon=True)
+        runner.start()
+        runner.join(timeout=10)
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(sorted(outputs), sorted(Path(f"out{g.index}") for g in groups[1:]))
+        streams[0].append.assert_called_once()
+        streams[0].abort.assert_called_once()
+
+    def test_assemble_failure_does_not_hang(self):
+        """测试拼接线程在拼接之外出错时，送料与解码线程也能结束"""
+        groups = self._groups()
+        sinks = [SegmentAccumulator(), RuntimeError("cannot start ffmpeg")]
+        exported = []
+        pipeline = MergePipeline(lambda path: AudioSegment.silent(duration=100),
+                                 lambda g, s: exported.append(g.index) or Path(f"out{g.index}"),
+                                 decode_workers=2, queue_size=1)
+        outputs = []
+        with mock.patch.object(pipeline, '_new_sink', side_effect=sinks):
+            runner = threading.Thread(target=lambda: outputs.extend(pipeline.run(groups)), daemon=True)
+            runner.start()
+            runner.join(timeout=10)
+
+        self.assertFalse(runner.is_alive())
+        self.assertEqual(exported, [0])
+        self.assertEqual(outputs, [Path("out0")])
+
+
+if __name__ == "__main__":
+    unittest.main()
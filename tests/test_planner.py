@@ -0,0 +1,64 @@
+import random
+import unittest
+from pathlib import Path
+from src.planner import plan_groups, STRATEGIES
+
+class TestPlanner(unittest.TestCase):
+    """分组规划单元测试"""
+
+    def _audio_info(self, durations):
+        return sorted(((Path(f"{i}.wav"), d) for i, d in enumerate(durations)), key=lambda x: x[1])
+
+    def test_greedy_keeps_legacy_behaviour(self):
+        """测试 greedy 与原有的从短到长切分一致"""
+        plan = plan_groups(self._audio_info([5000, 7000, 10000, 3000]), 15000, 'greedy')
+        self.assertEqual([g.duration_ms for g in plan.groups], [15000, 10000])
+        self.assertEqual(plan.undersized, 1)
+
+    def test_balanced_minimises_overshoot(self):
+        """测试 balanced 选择刚好补足差额的文件"""
+        plan = plan_groups(self._audio_info([10000, 9000, 6000, 5000, 1000]), 15000, 'balanced')
+        self.assertEqual(sorted(g.duration_ms for g in plan.groups), [15000, 16000])
+        self.assertEqual(plan.total_overshoot_ms, 1000)
+        self.assertEqual(plan.undersized, 0)
+
+    def test_ffd_uses_first_fitting_bin(self):
+        """测试 ffd 把文件放入第一个放得下的箱子，而不只是当前的箱子"""
+        plan = plan_groups(self._audio_info([9000, 8000, 7000, 6000]), 15000, 'ffd')
+        self.assertEqual([g.duration_ms for g in plan.groups], [15000, 15000])
+        self.assertEqual(plan.total_overshoot_ms, 0)
+
+    def test_all_strategies_use_every_file_once(self):
+        """测试所有策略都恰好使用每个文件一次"""
+        rng = random.Random(7)
+        audio_info = self._audio_info([rng.randint(500, 12000) for _ in range(500)])
+        for strategy in STRATEGIES:
+            plan = plan_groups(audio_info, 30000, strategy)
+            members = [m for g in plan.groups for m in g.members]
+            self.assertEqual(sorted(members), sorted(audio_info), strategy)
+            self.assertEqual([g.index for g in plan.groups], list(range(plan.expected_outputs)))
+            if strategy != 'greedy':
+                self.assertEqual(plan.undersized, 0, strategy)
+
+    def test_balanced_not_worse_than_greedy(self):
+        """测试 balanced 的超出时长不多于 greedy"""
+        rng = random.Random(11)
+        audio_info = self._audio_info([rng.randint(1000, 20000) for _ in range(2000)])
+        greedy = plan_groups(audio_info, 60000, 'greedy')
+        balanced = plan_groups(audio_info, 60000, 'balanced')
+        self.assertLessEqual(balanced.total_overshoot_ms, greedy.total_overshoot_ms)
+
+    def test_total_below_minimum(self):
+        """测试总时长不足时只生成一组"""
+        for strategy in STRATEGIES:
+            plan = plan_groups(self._audio_info([1000, 2000]), 15000, strategy)
+            self.assertEqual(plan.expected_outputs, 1)
+
+    def test_unknown_strategy(self):
+        """测试未知策略"""
+        with self.assertRaises(ValueError):
+            plan_groups([], 15000, 'random')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import os
+import struct
+import random
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.probe import probe_audio, probe_header, ProbeError
+
+class TestProbe(unittest.TestCase):
+    """元数据探测单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_probe_wav_matches_decoded_length(self):
+        """测试WAV文件头时长与解码时长一致"""
+        file_path = self.temp_dir / "a.wav"
+        segment = AudioSegment.silent(duration=3217, frame_rate=22050).set_channels(2)
+        segment.export(file_path, format="wav")
+
+        metadata = probe_audio(file_path)
+
+        self.assertEqual(metadata.source, 'header')
+        self.assertEqual(metadata.duration_ms, len(AudioSegment.from_file(file_path)))
+        self.assertEqual(metadata.sample_rate, 22050)
+        self.assertEqual(metadata.channels, 2)
+        self.assertEqual(metadata.codec, 'pcm')
+        self.assertEqual(metadata.sample_width, 2)
+
+    def test_probe_flac_streaminfo(self):
+        """测试解析FLAC STREAMINFO"""
+        sample_rate, channels, bits, total = 44100, 2, 16, 44100 * 4
+        packed = (sample_rate << 44) | ((channels - 1) << 41) | ((bits - 1) << 36) | total
+        streaminfo = b'\x00' * 10 + packed.to_bytes(8, 'big') + b'\x00' * 16
+        file_path = self.temp_dir / "a.flac"
+        file_path.write_bytes(b'fLaC' + b'\x80' + len(streaminfo).to_bytes(3, 'big') + streaminfo)
+
+        metadata = probe_header(file_path)
+
+        self.assertEqual(metadata.duration_ms, 4000)
+        self.assertEqual(metadata.sample_rate, 44100)
+        self.assertEqual(metadata.channels, 2)
+        self.assertEqual(metadata.codec, 'flac')
+
+    def test_probe_ogg_vorbis(self):
+        """测试解析Ogg Vorbis识别头和末页"""
+        ident = b'\x01vorbis' + struct.pack('<IBI', 0, 1, 48000) + b'\x00' * 15
+        first = b'OggS\x00\x02' + struct.pack('<q', 0) + b'\x00' * 12 + bytes([1, len(ident)]) + ident
+        last = b'OggS\x00\x04' + struct.pack('<q', 48000 * 2) + b'\x00' * 12 + b'\x00'
+        file_path = self.temp_dir / "a.ogg"
+        file_path.write_bytes(first + b'\x00' * 100 + last)
+
+        metadata = probe_header(file_path)
+
+        self.assertEqual(metadata.duration_ms, 2000)
+        self.assertEqual(metadata.channels, 1)
+        self.assertEqual(metadata.codec, 'vorbis')
+
+    def test_probe_mp3_cbr(self):
+        """测试按CBR码率估算MP3时长"""
+        # MPEG1 Layer III, 128kbps, 44100Hz, 立体声
+        frame = bytes([0xFF, 0xFB, 0x90, 0x00]) + b'\x00' * 413
+        file_path = self.temp_dir / "a.mp3"
+        file_path.write_bytes((frame * 116)[:16000 * 3])
+
+        metadata = probe_header(file_path)
+
+        self.assertEqual(metadata.duration_ms, 3000)
+        self.assertEqual(metadata.sample_rate, 44100)
+        self.assertEqual(metadata.channels, 2)
+        self.assertEqual(metadata.codec, 'mp3')
+
+    def test_probe_ogg_opus_reports_decoded_rate(self):
+        """测试Ogg Opus按解码后的48kHz报告采样率，而不是OpusHead中的输入采样率"""
+        ident = b'OpusHead' + struct.pack('<BBHIhB', 1, 2, 312, 44100, 0, 0)
+        first = b'OggS\x00\x02' + struct.pack('<q', 0) + b'\x00' * 12 + bytes([1, len(ident)]) + ident
+        last = b'OggS\x00\x04' + struct.pack('<q', 48000 * 2 + 312) + b'\x00' * 12 + b'\x00'
+        file_path = self.temp_dir / "a.opus"
+        file_path.write_bytes(first + b'\x00' * 100 + last)
+
+        metadata = probe_header(file_path)
+
+        self.assertEqual(metadata.duration_ms, 2000)
+        self.assertEqual(metadata.sample_rate, 48000)
+        self.assertEqual(metadata.codec, 'opus')
+
+    def test_truncated_ogg_identification(self):
+        """测试Ogg识别头被截断时报告ProbeError，交给ffprobe与解码处理"""
+        for ident in (b'\x01vorbis\x00\x00', b'OpusHead\x01'):
+            file_path = self.temp_dir / "a.ogg"
+            file_path.write_bytes(b'OggS\x00\x02' + struct.pack('<q', 0) + b'\x00' * 12 + bytes([1, len(ident)]) + ident)
+            with self.assertRaises(ProbeError):
+                probe_header(file_path)
+
+    def test_adts_is_not_mp3(self):
+        """测试ADTS AAC与下一帧对不上的同步字不会被当作MP3"""
+        rng = random.Random(0)
+        frames = []
+        for _ in range(200):
+            payload = bytes(rng.randrange(256) for _ in range(200))
+            length = 7 + len(payload)
+            # AAC LC, 44100Hz, 立体声
+            frames.append(bytes([0xFF, 0xF1, 0x50, 0x80 | (length >> 11), (length >> 3) & 0xFF,
+                                 ((length & 0x7) << 5) | 0x1F, 0xFC]) + payload)
+        file_path = self.temp_dir / "a.aac"
+        file_path.write_bytes(b''.join(frames))
+
+        with self.assertRaises(ProbeError):
+            probe_header(file_path)
+
+        # 下一帧位置上没有帧头的同步字不算 MP3 帧
+        file_path.write_bytes(bytes([0xFF, 0xFB, 0x90, 0x00]) + b'\x00' * 4096)
+        with self.assertRaises(ProbeError):
+            probe_header(file_path)
+
+    def test_unknown_header(self):
+        """测试无法识别的文件头"""
+        file_path = self.temp_dir / "a.aac"
+        file_path.write_bytes(b'\x00' * 64)
+
+        with self.assertRaises(ProbeError):
+            probe_header(file_path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import cProfile
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.profiling import StageTimer, ThreadProfiler
+
+class TestProfiling(unittest.TestCase):
+    """阶段计时单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_disabled_timer_records_nothing(self):
+        """测试禁用时不记录且返回共享的空对象"""
+        timer = StageTimer()
+        first = timer.measure('decode', bytes=10)
+        with first as m:
+            m.count = 3
+        self.assertIs(first, timer.measure('encode'))
+        self.assertEqual(timer.report()['stages'], {})
+
+    def test_enabled_timer_accumulates(self):
+        """测试启用时累计次数、数量与字节数"""
+        timer = StageTimer(enabled=True)
+        for _ in range(3):
+            with timer.measure('decode', bytes=1024):
+                pass
+        with timer.measure('scan') as m:
+            m.count = 42
+        stages = timer.report()['stages']
+        self.assertEqual(list(stages), ['scan', 'decode'])
+        self.assertEqual((stages['decode']['calls'], stages['decode']['bytes']), (3, 3072))
+        self.assertEqual(stages['scan']['count'], 42)
+
+    def test_processor_profile_report(self):
+        """测试处理器报告覆盖各个阶段"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   profile=True)
+        count = processor.process()
+        report = processor.profile_report()
+        for stage in ('scan', 'index', 'probe', 'plan', 'execute', 'decode', 'concat', 'encode', 'commit'):
+            self.assertIn(stage, report['stages'])
+        self.assertEqual(report['stages']['scan']['count'], 4)
+        self.assertEqual(report['stages']['decode']['calls'], 4)
+        self.assertEqual(report['stages']['encode']['calls'], count)
+        self.assertEqual(report['run']['outputs'], count)
+
+
+    def test_thread_profiler_covers_pipeline_threads(self):
+        """测试 cProfile 结果包含流水线工作线程中的解码与编码"""
+        thread_profiler = ThreadProfiler()
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   thread_profiler=thread_profiler)
+        main = cProfile.Profile()
+        main.enable()
+        processor.process()
+        main.disable()
+
+        functions = {name for _, _, name in thread_profiler.stats(main).stats}
+        for name in ('process', '_decode_worker', '_assemble', '_encode_worker', '_export_group'):
+            self.assertIn(name, functions)
+
+
+if __name__ == "__main__":
+    unittest.main()
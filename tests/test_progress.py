@@ -0,0 +1,62 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.progress import ProgressTracker, format_progress
+
+class TestProgress(unittest.TestCase):
+    """进度事件 API 单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_counts_without_listeners(self):
+        """测试没有监听器时仍累计计数"""
+        tracker = ProgressTracker()
+        tracker.start_stage('execute', total=2, audio_ms=20000)
+        tracker.emit('decode', bytes=1024, audio_ms=5000)
+        tracker.emit('export', audio_ms=10000)
+        snapshot = tracker.snapshot()
+        self.assertEqual((snapshot.files_decoded, snapshot.bytes_decoded, snapshot.groups_exported),
+                         (1, 1024, 1))
+        self.assertEqual(snapshot.fraction, 0.5)
+        self.assertIsNotNone(snapshot.eta_s)
+        self.assertIn("1/2", format_progress(snapshot))
+        with self.assertRaises(ValueError):
+            tracker.emit('unknown')
+
+    def test_processor_emits_events(self):
+        """测试处理过程中依次产生各阶段事件并统计完整"""
+        events = []
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   progress_listener=lambda event, snapshot: events.append((event, snapshot)))
+        count = processor.process()
+
+        stages = [e.message for e, _ in events if e.kind == 'stage']
+        self.assertEqual(stages, ['scan', 'probe', 'plan', 'execute', 'done'])
+        final = processor.progress.snapshot()
+        self.assertEqual(final.files_scanned, 4)
+        self.assertEqual(final.files_probed, 4)
+        self.assertEqual(final.groups_planned, count)
+        self.assertEqual(final.groups_exported, count)
+        self.assertEqual(final.files_decoded, 4)
+        self.assertEqual(final.audio_ms_exported, 25000)
+        self.assertEqual(final.errors, 0)
+        self.assertEqual(final.fraction, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import logging
+from unittest import mock
+from src.progress_log import ProgressLog
+
+class TestProgressLog(unittest.TestCase):
+    """汇总进度日志单元测试"""
+
+    def test_rate_limited(self):
+        """测试间隔内只输出一次进度，完成时总会输出"""
+        log = mock.Mock(spec=logging.Logger)
+        with mock.patch('src.progress_log.time.monotonic', return_value=100.0):
+            progress = ProgressLog("分析音频", 1000, interval_s=2.0, log=log)
+            for _ in range(999):
+                progress.step()
+            self.assertEqual(log.info.call_count, 0)
+            progress.step()
+        self.assertEqual(log.info.call_args_list, [mock.call("分析音频: 1000/1000")])
+
+    def test_logs_after_interval(self):
+        """测试超过间隔后输出一行进度"""
+        log = mock.Mock(spec=logging.Logger)
+        with mock.patch('src.progress_log.time.monotonic', side_effect=[0.0, 1.0, 2.5, 3.0]):
+            progress = ProgressLog("分析音频", 10, interval_s=2.0, log=log)
+            progress.step()
+            progress.step()
+            progress.step()
+        self.assertEqual(log.info.call_args_list, [mock.call("分析音频: 2/10")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from src.audio_processor import AudioProcessor
+from src.scanner import read_file_list, scan_audio_files
+
+SUFFIXES = {'.wav', '.mp3'}
+
+class TestScanner(unittest.TestCase):
+    """目录扫描与文件列表单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        for rel in ["b.wav", "a.mp3", "notes.txt", "sub/c.wav", "sub/deep/d.WAV",
+                    "skip/e.wav", "sub/tmp_f.wav"]:
+            path = self.temp_dir / rel
+            os.makedirs(path.parent, exist_ok=True)
+            path.write_bytes(b'')
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def _rel(self, paths):
+        return [p.relative_to(self.temp_dir).as_posix() for p in paths]
+
+    def test_flat_scan_is_sorted(self):
+        """测试默认只扫描顶层并按文件名排序"""
+        self.assertEqual(self._rel(scan_audio_files(self.temp_dir, SUFFIXES)), ["a.mp3", "b.wav"])
+
+    def test_recursive_scan_with_globs(self):
+        """测试递归扫描与包含/排除通配符"""
+        found = scan_audio_files(self.temp_dir, SUFFIXES, recursive=True,
+                                 exclude=["skip", "tmp_*"])
+        self.assertEqual(self._rel(found), ["a.mp3", "b.wav", "sub/c.wav", "sub/deep/d.WAV"])
+
+        found = scan_audio_files(self.temp_dir, SUFFIXES, recursive=True, include=["sub/*"])
+        self.assertEqual(self._rel(found), ["sub/c.wav", "sub/tmp_f.wav", "sub/deep/d.WAV"])
+
+    def test_recursive_scan_skips_output_dir(self):
+        """测试递归扫描不会进入位于输入目录内的输出目录"""
+        processor = AudioProcessor(str(self.temp_dir), str(self.temp_dir / "sub"), recursive=True)
+        self.assertEqual(self._rel(processor.iter_audio_files()), ["a.mp3", "b.wav", "skip/e.wav"])
+
+    def test_files_from_skips_directory_walk(self):
+        """测试从文件列表读取时不扫描目录"""
+        list_path = self.temp_dir / "list.txt"
+        list_path.write_text(f"# comment\n{self.temp_dir / 'sub/c.wav'}\n\n"
+                             f"{self.temp_dir / 'notes.txt'}\n{self.temp_dir / 'sub/c.wav'}\n",
+                             encoding='utf-8')
+        self.assertEqual(self._rel(read_file_list(str(list_path), SUFFIXES)), ["sub/c.wav"])
+
+        processor = AudioProcessor(str(self.temp_dir / "missing"), str(self.temp_dir / "out"),
+                                   files_from=str(list_path))
+        self.assertEqual(self._rel(processor.iter_audio_files()), ["sub/c.wav"])
+
+
+if __name__ == "__main__":
+    unittest.main()
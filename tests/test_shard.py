@@ -0,0 +1,66 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.shard import find_shard_reports, merge_reports, parse_shard
+
+class TestShard(unittest.TestCase):
+    """分片执行单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000, 4000, 6000, 8000]):
+            AudioSegment.silent(duration=duration_ms).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_parse_shard(self):
+        """测试分片参数解析"""
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for spec in ("0/4", "5/4", "1", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_plans_match_across_nodes(self):
+        """测试不同节点得到相同的分组和输出文件名"""
+        plans = [AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000).plan()
+                 for _ in range(2)]
+        self.assertEqual([(g.members, g.output_name) for g in plans[0].groups],
+                         [(g.members, g.output_name) for g in plans[1].groups])
+
+    def test_shards_cover_plan_once(self):
+        """测试所有分片合起来恰好生成计划中的每个组"""
+        count = 3
+        expected = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000).plan()
+        for index in range(1, count + 1):
+            processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                       min_duration_ms=10000, shard=(index, count))
+            processor.process()
+
+        merged = merge_reports(find_shard_reports(self.output_dir))
+        self.assertEqual(merged['shards'], [1, 2, 3])
+        self.assertEqual(merged['missing_shards'], [])
+        self.assertEqual(merged['failed_groups'], [])
+        self.assertEqual(sorted(merged['outputs']), sorted(g.output_name for g in expected.groups))
+        audio = sorted(p.name for p in self.output_dir.iterdir() if p.suffix == '.wav')
+        self.assertEqual(audio, sorted(merged['outputs']))
+
+    def test_missing_shard_reported(self):
+        """测试缺少的分片会在合并时列出"""
+        AudioProcessor(str(self.input_dir), str(self.output_dir),
+                       min_duration_ms=10000, shard=(2, 3)).process()
+        merged = merge_reports(find_shard_reports(self.output_dir))
+        self.assertEqual(merged['missing_shards'], [1, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()
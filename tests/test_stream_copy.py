@@ -0,0 +1,91 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.probe import AudioMetadata
+from src.stream_copy import can_stream_copy, concat_copy
+
+class TestStreamCopy(unittest.TestCase):
+    """直接复制码流拼接单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i in range(4):
+            AudioSegment.silent(duration=5000).export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_can_stream_copy(self):
+        """测试编码参数一致性判断"""
+        mp3 = AudioMetadata(1000, 44100, 2, 'mp3')
+        paths = [Path("a.mp3"), Path("b.mp3")]
+        self.assertTrue(can_stream_copy(paths, [mp3, mp3]))
+        self.assertFalse(can_stream_copy(paths, [mp3, AudioMetadata(1000, 48000, 2, 'mp3')]))
+        self.assertFalse(can_stream_copy([Path("a.mp3"), Path("b.MP4")], [mp3, mp3]))
+        self.assertFalse(can_stream_copy(paths, [mp3, None]))
+
+    def test_groups_use_stream_copy(self):
+        """测试符合条件的组走直接复制路径"""
+        def fake_copy(paths, output_path, suffix=None):
+            output_path.write_bytes(b'')
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   min_duration_ms=10000, stream_copy=True)
+        with mock.patch('src.audio_processor.concat_copy', side_effect=fake_copy) as concat:
+            self.assertEqual(processor.process(), 2)
+            self.assertEqual(concat.call_count, 2)
+        self.assertEqual(processor.report, {'stream_copy': 2, 'reencode': 0})
+
+    def test_failed_copy_falls_back_to_reencode(self):
+        """测试直接复制失败时回退到解码重新编码"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   min_duration_ms=10000, stream_copy=True)
+        with mock.patch('src.audio_processor.concat_copy', side_effect=OSError("ffmpeg missing")):
+            self.assertEqual(processor.process(), 2)
+        self.assertEqual(processor.report, {'stream_copy': 0, 'reencode': 2})
+        for file_path in self.output_dir.iterdir():
+            self.assertEqual(len(AudioSegment.from_file(file_path)), 10000)
+
+    def test_stream_copy_command(self):
+        """测试直接复制路径构造的 ffmpeg 命令：concat 列表、-c copy 与封装格式"""
+        commands, lists = [], []
+
+        def fake_run(command, **kwargs):
+            commands.append(command)
+            lists.append(Path(command[command.index('-i') + 1]).read_text(encoding='utf-8'))
+            Path(command[-1]).write_bytes(b'')
+
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir),
+                                   min_duration_ms=10000, stream_copy=True)
+        with mock.patch('src.stream_copy.subprocess.run', side_effect=fake_run):
+            self.assertEqual(processor.process(), 2)
+        self.assertEqual(processor.report, {'stream_copy': 2, 'reencode': 0})
+
+        listed = sorted(line for text in lists for line in text.splitlines())
+        self.assertEqual(listed, [f"file '{os.path.abspath(self.input_dir / f'a{i}.wav')}'" for i in range(4)])
+        for command in commands:
+            self.assertEqual(command[command.index('-f') + 1], 'concat')
+            self.assertEqual(command[command.index('-c') + 1], 'copy')
+            self.assertEqual(command[-3:-1], ['-f', 'wav'])
+            self.assertTrue(command[-1].endswith('.wav.partial'))
+
+    def test_concat_copy_uses_final_suffix(self):
+        """测试写入 .partial 临时文件时按最终文件的后缀选择封装格式"""
+        with mock.patch('src.stream_copy.subprocess.run') as run:
+            concat_copy([self.input_dir / "a0.wav"], self.output_dir / "out.mp3.partial", suffix='.mp3')
+        command = run.call_args[0][0]
+        self.assertEqual(command[-3:], ['-f', 'mp3', str(self.output_dir / "out.mp3.partial")])
+
+
+if __name__ == "__main__":
+    unittest.main()
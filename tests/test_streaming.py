@@ -0,0 +1,94 @@
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.accumulator import SegmentAccumulator
+from src.streaming import StreamingExport
+
+class TestStreaming(unittest.TestCase):
+    """流式导出单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000]):
+            audio = AudioSegment.silent(duration=duration_ms, frame_rate=48000).set_channels(2)
+            audio.export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_matches_in_memory_concat(self):
+        """测试混合格式流式写出的 PCM 与内存拼接结果一致"""
+        segments = [
+            AudioSegment.silent(duration=1000, frame_rate=22050),
+            AudioSegment.silent(duration=2000, frame_rate=44100).set_channels(2),
+        ]
+        accumulator = SegmentAccumulator()
+        for segment in segments:
+            accumulator.append(segment)
+        expected = accumulator.to_segment()
+
+        stream = StreamingExport(self.temp_dir / "out.wav", (44100, 2, 2))
+        for segment in segments:
+            stream.append(segment)
+        stream.finish()
+        written = AudioSegment.from_wav(self.temp_dir / "out.wav")
+        self.assertEqual((written.frame_rate, written.channels), (44100, 2))
+        self.assertEqual(written.raw_data, expected.raw_data)
+
+    def test_8bit_wav_matches_export(self):
+        """测试 8 位 WAV 与 AudioSegment.export 的结果逐字节相同"""
+        segment = AudioSegment.silent(duration=500, frame_rate=8000).set_sample_width(1)
+        segment.export(self.temp_dir / "reference.wav", format="wav")
+        stream = StreamingExport(self.temp_dir / "out.wav")
+        stream.append(segment)
+        stream.finish()
+        self.assertEqual((self.temp_dir / "out.wav").read_bytes(),
+                         (self.temp_dir / "reference.wav").read_bytes())
+
+    def test_abort_removes_partial_file(self):
+        """测试放弃写入时删除部分文件"""
+        stream = StreamingExport(self.temp_dir / "out.wav")
+        stream.append(AudioSegment.silent(duration=500))
+        stream.abort()
+        self.assertFalse((self.temp_dir / "out.wav").exists())
+        with self.assertRaises(ValueError):
+            StreamingExport(self.temp_dir / "empty.wav").finish()
+
+    def test_processor_stream_export(self):
+        """测试流式导出与内存拼接生成相同的文件"""
+        default_dir = self.temp_dir / "default"
+        AudioProcessor(str(self.input_dir), str(default_dir), min_duration_ms=10000).process()
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   stream_export=True)
+        count = processor.process()
+
+        self.assertEqual(count, len(os.listdir(default_dir)))
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted(os.listdir(default_dir)))
+        for name in os.listdir(default_dir):
+            self.assertEqual(AudioSegment.from_wav(self.output_dir / name).raw_data,
+                             AudioSegment.from_wav(default_dir / name).raw_data)
+        self.assertEqual(processor.report, {'stream_copy': 0, 'reencode': count})
+
+    def test_max_memory_switches_to_streaming(self):
+        """测试预计内存超过上限的组自动改为流式导出"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   max_memory_mb=5)
+        plan = processor.plan()
+        streamed = [g for g in plan.groups if processor._open_stream(g) is not None]
+        # 48kHz 16 位立体声每秒约 188KB，10 秒的组两倍估算约 3.7MB，只有 15 秒的组超过 5MB
+        self.assertEqual([g.duration_ms for g in streamed], [15000])
+        self.assertGreater(processor.execute(plan), 0)
+        self.assertTrue(all(not name.endswith('.partial') for name in os.listdir(self.output_dir)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import time
+import unittest
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+from pydub import AudioSegment
+from src.audio_processor import AudioProcessor
+from src.watcher import DirectoryWatcher
+
+class TestWatcher(unittest.TestCase):
+    """监视模式单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        self.staging_dir = self.temp_dir / "staging"
+        os.makedirs(self.input_dir)
+        os.makedirs(self.staging_dir)
+        AudioSegment.silent(duration=2000).export(self.input_dir / "existing.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def _drop(self, name, duration_ms):
+        """先写到别处再移入，模拟录音机落盘"""
+        staged = self.staging_dir / name
+        AudioSegment.silent(duration=duration_ms).export(staged, format="wav")
+        os.replace(staged, self.input_dir / name)
+
+    def _wait_for_outputs(self, count, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if len(list(self.output_dir.glob("*.wav"))) >= count:
+                return
+            time.sleep(0.05)
+
+    def test_watcher_reports_only_new_files(self):
+        """测试只报告启动后出现的音频文件"""
+        for use_inotify in (True, False):
+            watcher = DirectoryWatcher(self.input_dir, {'.wav'}, poll_interval_s=0.05, use_inotify=use_inotify)
+            try:
+                name = f"new_{use_inotify}.wav"
+                self._drop(name, 500)
+                (self.input_dir / "notes.txt").write_text("x")
+                found = []
+                for _ in range(10):
+                    found.extend(watcher.wait())
+                self.assertEqual(found, [self.input_dir / name])
+            finally:
+                watcher.close()
+
+    def _run_watch(self, use_inotify):
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=5000)
+        stop_event = threading.Event()
+        result = {}
+        thread = threading.Thread(target=lambda: result.update(count=processor.watch(
+            idle_timeout_s=30, poll_interval_s=0.05, stop_event=stop_event, use_inotify=use_inotify)))
+        thread.start()
+        try:
+            time.sleep(0.2)
+            self._drop(f"a_{use_inotify}.wav", 3000)
+            self._drop(f"b_{use_inotify}.wav", 3000)
+            # 达到最小时长后立即导出，不等待空闲
+            self._wait_for_outputs(1)
+            self.assertEqual(len(list(self.output_dir.glob("*.wav"))), 1)
+            self._drop(f"c_{use_inotify}.wav", 1000)
+            time.sleep(0.3)
+        finally:
+            stop_event.set()
+            thread.join(timeout=10)
+        return result['count']
+
+    def test_watch_emits_and_flushes_on_stop(self):
+        """测试监视模式达到最小时长即导出，停止时导出剩余部分"""
+        for use_inotify in (True, False):
+            shutil.rmtree(self.output_dir, ignore_errors=True)
+            self.assertEqual(self._run_watch(use_inotify), 2)
+            durations = sorted(len(AudioSegment.from_file(p)) for p in self.output_dir.glob("*.wav"))
+            self.assertEqual(durations, [1000, 6000])
+
+    def test_watch_flushes_on_idle(self):
+        """测试空闲超时后导出不足最小时长的组"""
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=5000)
+        stop_event = threading.Event()
+        thread = threading.Thread(target=processor.watch, kwargs=dict(
+            idle_timeout_s=0.3, poll_interval_s=0.05, stop_event=stop_event))
+        thread.start()
+        try:
+            time.sleep(0.2)
+            self._drop("a.wav", 1000)
+            self._wait_for_outputs(1)
+            self.assertEqual(len(list(self.output_dir.glob("*.wav"))), 1)
+        finally:
+            stop_event.set()
+            thread.join(timeout=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
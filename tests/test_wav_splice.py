@@ -0,0 +1,92 @@
+import os
+import struct
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest import mock
+from pydub import AudioSegment
+from pydub.generators import Sine
+from src.audio_processor import AudioProcessor
+from src import wav_splice
+from src.wav_splice import SpliceError, compatible_layouts, read_layout, splice_wav
+
+class TestWavSplice(unittest.TestCase):
+    """原生 WAV 拼接单元测试"""
+
+    def setUp(self):
+        """测试前准备"""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "input"
+        self.output_dir = self.temp_dir / "output"
+        os.makedirs(self.input_dir)
+        for i, duration_ms in enumerate([3000, 5000, 7000, 10000]):
+            tone = Sine(220 * (i + 1)).to_audio_segment(duration=duration_ms).set_channels(2)
+            tone.export(self.input_dir / f"a{i}.wav", format="wav")
+
+    def tearDown(self):
+        """测试后清理"""
+        shutil.rmtree(self.temp_dir)
+
+    def _write_with_extra_chunk(self, path: Path, segment: AudioSegment):
+        """写出在 fmt 与 data 之间带有 LIST 块的 WAV"""
+        data = segment.raw_data
+        fmt = struct.pack('<HHIIHH', 1, segment.channels, segment.frame_rate,
+                          segment.frame_rate * segment.frame_width, segment.frame_width, segment.sample_width * 8)
+        body = b'WAVE' + b'fmt ' + struct.pack('<I', 16) + fmt
+        body += b'LIST' + struct.pack('<I', 5) + b'INFOx\x00'
+        body += b'data' + struct.pack('<I', len(data)) + data
+        path.write_bytes(b'RIFF' + struct.pack('<I', len(body)) + body)
+
+    def test_splice_matches_pydub(self):
+        """测试拼接结果与 pydub 拼接后导出的文件完全相同"""
+        paths = sorted(self.input_dir.glob("*.wav"))
+        segments = [AudioSegment.from_wav(p) for p in paths]
+        extra = self.temp_dir / "extra.wav"
+        self._write_with_extra_chunk(extra, segments[0])
+        paths.append(extra)
+
+        expected = sum(segments[1:] + [segments[0]], segments[0])
+        expected.export(self.temp_dir / "expected.wav", format="wav")
+        splice_wav(compatible_layouts(paths), self.temp_dir / "spliced.wav")
+        self.assertEqual((self.temp_dir / "spliced.wav").read_bytes(),
+                         (self.temp_dir / "expected.wav").read_bytes())
+
+    def test_fallback_copy_without_zero_copy(self):
+        """测试零拷贝不可用时通过 mmap 写出相同结果"""
+        paths = sorted(self.input_dir.glob("*.wav"))
+        splice_wav(compatible_layouts(paths), self.temp_dir / "zero_copy.wav")
+        with mock.patch.object(wav_splice, '_ZERO_COPY', []):
+            splice_wav(compatible_layouts(paths), self.temp_dir / "mmap.wav")
+        self.assertEqual((self.temp_dir / "zero_copy.wav").read_bytes(),
+                         (self.temp_dir / "mmap.wav").read_bytes())
+
+    def test_rejects_incompatible_files(self):
+        """测试格式不一致或不是 PCM WAV 时拒绝拼接"""
+        mono = self.temp_dir / "mono.wav"
+        AudioSegment.silent(duration=1000).export(mono, format="wav")
+        with self.assertRaises(SpliceError):
+            compatible_layouts([self.input_dir / "a0.wav", mono])
+        garbage = self.temp_dir / "garbage.wav"
+        garbage.write_bytes(b'not a wav file at all')
+        with self.assertRaises(SpliceError):
+            read_layout(garbage)
+
+    def test_processor_native_wav(self):
+        """测试处理器直接拼接 WAV 组，不解码任何文件"""
+        default_dir = self.temp_dir / "default"
+        AudioProcessor(str(self.input_dir), str(default_dir), min_duration_ms=10000).process()
+        processor = AudioProcessor(str(self.input_dir), str(self.output_dir), min_duration_ms=10000,
+                                   native_wav=True)
+        with mock.patch('src.audio_processor.decode_file') as decode:
+            count = processor.process()
+            decode.assert_not_called()
+
+        self.assertEqual(processor.report, {'stream_copy': count, 'reencode': 0})
+        self.assertEqual(sorted(os.listdir(self.output_dir)), sorted(os.listdir(default_dir)))
+        for name in os.listdir(default_dir):
+            self.assertEqual((self.output_dir / name).read_bytes(), (default_dir / name).read_bytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
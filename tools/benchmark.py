@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+基准测试脚本 - 在合成语料上测量 AudioProcessor.process 的端到端与分阶段吞吐量
+
+每次测量在独立的子进程中运行，记录墙钟时间、各阶段耗时、峰值内存（RSS）
+与启动的 ffmpeg/ffprobe 进程数；结果可以保存为基准，之后与基准比较以发现性能回退。
+"""
+import os
+import sys
+import json
+import time
+import queue
+import tempfile
+import argparse
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from generate_corpus import generate_corpus
+
+# 比较时越小越好的指标与越大越好的指标
+LOWER_IS_BETTER = ('wall_s', 'peak_rss_mb', 'ffmpeg_processes')
+HIGHER_IS_BETTER = ('files_per_s', 'audio_x_realtime', 'input_mb_per_s')
+
+_FFMPEG_NAMES = {'ffmpeg', 'ffprobe', 'avconv', 'avprobe', 'ffmpeg.exe', 'ffprobe.exe'}
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='AudioProcessor 基准测试',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('--sizes', default='100,1000',
+                        help='逗号分隔的语料规模（文件数），例如 100,1000,10000,100000')
+    parser.add_argument('--corpus-root', default=str(Path(tempfile.gettempdir()) / 'audio_processor_bench'),
+                        help='语料缓存目录，相同参数的语料会被复用')
+    parser.add_argument('--seed', type=int, default=20250101, help='语料随机种子')
+    parser.add_argument('--repeat', type=int, default=1, help='每个规模重复测量次数，取最快的一次')
+    parser.add_argument('-d', '--min-duration', type=float, default=30.0, help='最小输出时长（秒）')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='传给 AudioProcessor 的进程数')
+    parser.add_argument('--strategy', default='balanced', help='分组策略')
+    parser.add_argument('--stream-copy', action='store_true', help='启用直接复制码流')
+    parser.add_argument('-o', '--output', help='把本次结果写成 JSON')
+    parser.add_argument('--save-baseline', metavar='PATH', help='把本次结果保存为基准')
+    parser.add_argument('--compare', metavar='PATH', help='与基准比较，出现回退时返回非零退出码')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='允许的相对波动')
+
+    return parser.parse_args()
+
+
+def _install_ffmpeg_counter(counter):
+    """
+    统计 ffmpeg/ffprobe 进程数
+
+    pydub 与直接复制码流都通过 subprocess.Popen 启动 ffmpeg；替换 Popen 后，
+    以 fork 方式创建的进程池子进程也会继承计数（spawn 方式的子进程不计入）。
+    """
+    original = subprocess.Popen
+
+    class CountingPopen(original):
+        def __init__(self, args, *rest, **kwargs):
+            argv0 = args if isinstance(args, (str, bytes, os.PathLike)) else args[0]
+            if os.path.basename(os.fsdecode(argv0)).split(' ')[0] in _FFMPEG_NAMES:
+                with counter.get_lock():
+                    counter.value += 1
+            super().__init__(args, *rest, **kwargs)
+
+    subprocess.Popen = CountingPopen
+
+
+def _peak_rss_mb():
+    """本进程与已结束子进程中最大者的峰值 RSS 之和（MB），不支持 resource 的平台返回 None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Linux 上 ru_maxrss 以 KB 为单位，macOS 上以字节为单位
+    unit = 1 if sys.platform == 'darwin' else 1024
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(peak * unit / (1024 * 1024), 1)
+
+
+def _run_once(corpus_dir, options, result_queue):
+    """子进程入口：运行一次 process 并回报测量结果"""
+    import logging
+    from src.audio_processor import AudioProcessor
+
+    logging.getLogger('AudioProcessor').setLevel(logging.WARNING)
+    counter = multiprocessing.Value('i', 0)
+    _install_ffmpeg_counter(counter)
+
+    with tempfile.TemporaryDirectory(prefix='bench_out_') as output_dir:
+        processor = AudioProcessor(
+            input_dir=str(corpus_dir),
+            output_dir=output_dir,
+            min_duration_ms=int(options['min_duration'] * 1000),
+            jobs=options['jobs'],
+            strategy=options['strategy'],
+            stream_copy=options['stream_copy'],
+            profile=True
+        )
+        start = time.perf_counter()
+        outputs = processor.process()
+        wall_s = time.perf_counter() - start
+        report = processor.profile_report()
+        snapshot = processor.progress.snapshot()
+
+    result_queue.put({
+        'wall_s': round(wall_s, 4),
+        'outputs': outputs,
+        'errors': snapshot.errors,
+        'peak_rss_mb': _peak_rss_mb(),
+        'ffmpeg_processes': counter.value,
+        'stages': report['stages'],
+    })
+
+
+def _wait_result(process, result_queue, poll_s=1.0):
+    """
+    等待子进程回报结果
+
+    Raises:
+        RuntimeError: 子进程没有回报结果就退出（例如崩溃或被信号终止）
+    """
+    while True:
+        try:
+            result = result_queue.get(timeout=poll_s)
+            break
+        except queue.Empty:
+            if process.is_alive():
+                continue
+        # 子进程已退出，结果可能刚好在退出前写入
+        try:
+            result = result_queue.get(timeout=poll_s)
+            break
+        except queue.Empty:
+            process.join()
+            raise RuntimeError(f"基准测试子进程异常退出 (exit code {process.exitcode})")
+    process.join()
+    return result
+
+
+def run_benchmark(corpus_dir, corpus_info, options, repeat=1):
+    """
+    在独立子进程中运行 repeat 次，返回最快一次的结果及派生的吞吐量指标
+    """
+    best = None
+    context = multiprocessing.get_context('fork' if sys.platform.startswith('linux') else 'spawn')
+    for _ in range(max(repeat, 1)):
+        result_queue = context.Queue()
+        process = context.Process(target=_run_once, args=(corpus_dir, options, result_queue))
+        process.start()
+        result = _wait_result(process, result_queue)
+        if best is None or result['wall_s'] < best['wall_s']:
+            best = result
+
+    wall_s = max(best['wall_s'], 1e-9)
+    best['files_per_s'] = round(corpus_info['files'] / wall_s, 2)
+    best['audio_x_realtime'] = round(corpus_info['audio_ms'] / 1000 / wall_s, 2)
+    best['input_mb_per_s'] = round(corpus_info['bytes'] / (1024 * 1024) / wall_s, 2)
+    return best
+
+
+def compare(results, baseline, tolerance):
+    """
+    与基准比较
+
+    Returns:
+        回退描述列表，为空表示没有回退
+    """
+    regressions = []
+    for size, result in results.items():
+        base = baseline.get('results', {}).get(size)
+        if base is None:
+            continue
+        for key in LOWER_IS_BETTER:
+            if result.get(key) is None or base.get(key) is None:
+                continue
+            limit = base[key] * (1 + tolerance) if key != 'ffmpeg_processes' else base[key]
+            if result[key] > limit:
+                regressions.append(f"{size} 个文件: {key} {base[key]} -> {result[key]}")
+        for key in HIGHER_IS_BETTER:
+            if result.get(key) is None or base.get(key) is None:
+                continue
+            if result[key] < base[key] * (1 - tolerance):
+                regressions.append(f"{size} 个文件: {key} {base[key]} -> {result[key]}")
+    return regressions
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    options = {
+        'min_duration': args.min_duration,
+        'jobs': args.jobs,
+        'strategy': args.strategy,
+        'stream_copy': args.stream_copy,
+    }
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(',')):
+        corpus_dir = Path(args.corpus_root) / f"corpus_{size}_{args.seed}"
+        print(f"准备语料: {size} 个文件 -> {corpus_dir}")
+        corpus_info = generate_corpus(corpus_dir, size, seed=args.seed)
+        result = run_benchmark(corpus_dir, corpus_info, options, args.repeat)
+        results[str(size)] = result
+        print(f"  用时 {result['wall_s']:.2f}秒, {result['files_per_s']} 文件/秒, "
+              f"{result['audio_x_realtime']}x 实时, 峰值内存 {result['peak_rss_mb']}MB, "
+              f"ffmpeg 进程 {result['ffmpeg_processes']} 个, 错误 {result['errors']} 个")
+        for stage, entry in result['stages'].items():
+            print(f"    {stage:<12} {entry['seconds']:>9.3f}秒  {entry['calls']:>7} 次  {entry['mb_per_s']:>9.1f}MB/s")
+
+    output = {'options': options, 'seed': args.seed, 'results': results,
+              'python': sys.version.split()[0], 'platform': sys.platform}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+            print(f"结果已写出: {path}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("发现性能回退:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("与基准相比没有性能回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+基准测试语料生成脚本 - 用固定种子并行生成可复现的大规模测试音频
+
+格式、采样率、声道数与时长都由种子决定，同一组参数总是生成相同的文件；
+一部分文件会被故意损坏（空文件、截断的文件头、随机字节），用于检验错误处理路径。
+"""
+import os
+import sys
+import json
+import math
+import wave
+import array
+import random
+import shutil
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pydub import AudioSegment
+
+SAMPLE_RATES = (8000, 16000, 22050, 32000, 44100, 48000)
+CHANNELS = (1, 2)
+FORMATS = ('wav', 'mp3', 'flac', 'ogg')
+CORRUPT_KINDS = ('empty', 'truncated', 'garbage')
+
+# 语料目录中记录生成参数的文件
+CORPUS_INFO = 'corpus.json'
+
+
+def parse_args():
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(
+        description='生成基准测试语料',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+
+    parser.add_argument('-o', '--output-dir', required=True, help='输出目录')
+    parser.add_argument('-n', '--num-files', type=int, default=1000, help='生成文件数量（100 到 100000）')
+    parser.add_argument('--seed', type=int, default=20250101, help='随机种子')
+    parser.add_argument('--formats', default=','.join(FORMATS),
+                        help='逗号分隔的格式列表，ffmpeg 不可用时只生成 wav')
+    parser.add_argument('--min-duration', type=float, default=0.5, help='最短时长（秒）')
+    parser.add_argument('--max-duration', type=float, default=6.0, help='最长时长（秒）')
+    parser.add_argument('--corrupt-ratio', type=float, default=0.01, help='损坏文件的比例')
+    parser.add_argument('-j', '--jobs', type=int, default=0, help='并行进程数，0 表示全部 CPU')
+    parser.add_argument('--force', action='store_true', help='即使已有相同参数的语料也重新生成')
+
+    return parser.parse_args()
+
+
+def available_formats(requested):
+    """过滤出当前环境能够生成的格式（非 wav 格式需要 ffmpeg）"""
+    if shutil.which(AudioSegment.converter) is None:
+        return ['wav']
+    return [f for f in requested if f in FORMATS] or ['wav']
+
+
+def file_spec(seed, index, formats, min_duration, max_duration, corrupt_ratio):
+    """
+    由种子和序号确定单个文件的参数，与生成顺序和进程无关
+
+    Returns:
+        包含 name、format、sample_rate、channels、duration_ms、frequency、corrupt 的字典
+    """
+    digest = hashlib.sha256(f"{seed}:{index}".encode('ascii')).digest()
+    rng = random.Random(digest)
+    fmt = rng.choice(formats)
+    return {
+        'name': f"clip_{index:06d}.{fmt}",
+        'format': fmt,
+        'sample_rate': rng.choice(SAMPLE_RATES),
+        'channels': rng.choice(CHANNELS),
+        'duration_ms': int(rng.uniform(min_duration, max_duration) * 1000),
+        'frequency': rng.choice((220, 330, 440, 660, 880)),
+        'corrupt': rng.choice(CORRUPT_KINDS) if rng.random() < corrupt_ratio else None,
+        'noise_seed': rng.getrandbits(32),
+    }
+
+
+def _pcm(spec):
+    """生成一个周期的正弦波再重复，避免逐个采样计算整段音频"""
+    rate = spec['sample_rate']
+    period = max(int(round(rate / spec['frequency'])), 1)
+    cycle = array.array('h', (int(8000 * math.sin(2 * math.pi * i / period)) for i in range(period)))
+    if spec['channels'] == 2:
+        cycle = array.array('h', (s for sample in cycle for s in (sample, sample)))
+    frames = rate * spec['duration_ms'] // 1000
+    cycle_bytes = cycle.tobytes()
+    frame_bytes = 2 * spec['channels']
+    repeats = frames // period + 1
+    return (cycle_bytes * repeats)[:frames * frame_bytes]
+
+
+def write_file(output_dir, spec):
+    """生成单个文件，返回写入的字节数"""
+    path = Path(output_dir) / spec['name']
+    if spec['corrupt'] == 'empty':
+        path.write_bytes(b'')
+    elif spec['corrupt'] == 'garbage':
+        path.write_bytes(random.Random(spec['noise_seed']).randbytes(4096))
+    else:
+        pcm = _pcm(spec)
+        if spec['format'] == 'wav':
+            with wave.open(str(path), 'wb') as f:
+                f.setnchannels(spec['channels'])
+                f.setsampwidth(2)
+                f.setframerate(spec['sample_rate'])
+                f.writeframes(pcm)
+        else:
+            segment = AudioSegment(pcm, frame_rate=spec['sample_rate'], sample_width=2,
+                                   channels=spec['channels'])
+            segment.export(path, format=spec['format']).close()
+        if spec['corrupt'] == 'truncated':
+            with open(path, 'r+b') as f:
+                f.truncate(min(path.stat().st_size, 24))
+    return path.stat().st_size
+
+
+def _write_batch(output_dir, specs):
+    return sum(write_file(output_dir, spec) for spec in specs)
+
+
+def generate_corpus(output_dir, num_files, seed=20250101, formats=FORMATS, min_duration=0.5,
+                    max_duration=6.0, corrupt_ratio=0.01, jobs=0, force=False):
+    """
+    生成语料，已有相同参数的语料时直接复用
+
+    Returns:
+        语料信息（参数、文件数、损坏文件数、总字节数）
+    """
+    output_dir = Path(output_dir)
+    formats = available_formats(formats)
+    params = {
+        'num_files': num_files, 'seed': seed, 'formats': formats,
+        'min_duration': min_duration, 'max_duration': max_duration, 'corrupt_ratio': corrupt_ratio,
+    }
+    info_path = output_dir / CORPUS_INFO
+    if not force and info_path.exists():
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if info.get('params') == params:
+            return info
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+
+    specs = [file_spec(seed, i, formats, min_duration, max_duration, corrupt_ratio) for i in range(num_files)]
+    workers = jobs if jobs > 0 else (os.cpu_count() or 1)
+    batch_size = max(1, min(500, num_files // (workers * 4) or 1))
+    batches = [specs[i:i + batch_size] for i in range(0, len(specs), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        total_bytes = sum(executor.map(_write_batch, [output_dir] * len(batches), batches))
+
+    info = {
+        'params': params,
+        'files': num_files,
+        'corrupt': sum(1 for s in specs if s['corrupt']),
+        'audio_ms': sum(s['duration_ms'] for s in specs if not s['corrupt']),
+        'bytes': total_bytes,
+    }
+    with open(info_path, 'w', encoding='utf-8') as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    return info
+
+
+def main():
+    """主函数"""
+    args = parse_args()
+    info = generate_corpus(
+        args.output_dir, args.num_files, args.seed, args.formats.split(','),
+        args.min_duration, args.max_duration, args.corrupt_ratio, args.jobs, args.force
+    )
+    print(f"语料目录: {args.output_dir}")
+    print(f"文件 {info['files']} 个（损坏 {info['corrupt']} 个）, 格式 {','.join(info['params']['formats'])}, "
+          f"音频 {info['audio_ms']/1000:.1f}秒, {info['bytes']/(1024*1024):.1f}MB")
+
+
+if __name__ == "__main__":
+    main()